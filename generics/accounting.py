@@ -0,0 +1,189 @@
+"""
+Wall and CPU time accounting for the phases of a task
+"""
+import os
+import sys
+import json
+import uuid
+import functools
+import threading
+from time import perf_counter
+from settings import base
+
+try:
+    from time import thread_time
+    THREAD_CPU = True
+except ImportError:
+    # Python 3.6
+    from time import process_time as thread_time
+    THREAD_CPU = False
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, peak RSS is then not reported
+    resource = None
+
+
+PHASES = ['load', 'compute', 'validate', 'save']
+
+
+def get_peak_rss():
+    """
+    Return the peak resident set size of the process in bytes, None when unknown
+    """
+    if resource is None:
+        return None
+    # kilobytes on linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def cpu_timed(function, *args):
+    """
+    Return (function(*args), the CPU seconds it took), measured in the thread or process running it
+    """
+    started = thread_time()
+    result = function(*args)
+    return result, thread_time() - started
+
+
+class TaskAccount(object):
+    """
+    The resources a single run of a task used.
+    Phases nest, e.g. a load inside the compute phase, and time is only ever
+    counted against the innermost phase.
+    """
+    def __init__(self):
+        self.phases = {phase: {'wall': 0.0, 'cpu': 0.0} for phase in PHASES}
+        self.wall = 0.0
+        self.cpu = 0.0
+        # CPU time of the work the task handed out to worker threads and processes
+        self.worker_cpu = 0.0
+        self.peak_rss_delta = None
+        self.bytes_read = 0
+        self.files_read = 0
+        self.bytes_written = 0
+        self.files_written = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.thread = None
+        self._stack = []
+        self._started = None
+        self._start_rss = None
+        self._lock = threading.Lock()
+
+    def _charge(self):
+        # charge the time since the last switch to the phase on top of the stack
+        wall, cpu = perf_counter(), thread_time()
+        if self._stack:
+            phase, since_wall, since_cpu = self._stack[-1]
+            self.phases[phase]['wall'] += wall - since_wall
+            self.phases[phase]['cpu'] += cpu - since_cpu
+            self._stack[-1] = (phase, wall, cpu)
+        return wall, cpu
+
+    def enter(self, phase):
+        wall, cpu = self._charge()
+        self._stack.append((phase, wall, cpu))
+
+    def exit(self):
+        wall, cpu = self._charge()
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1] = (self._stack[-1][0], wall, cpu)
+
+    def start(self):
+        self.thread = threading.current_thread()
+        self._started = (perf_counter(), thread_time())
+        self._start_rss = get_peak_rss()
+        self.enter('compute')
+
+    def stop(self):
+        while self._stack:
+            self.exit()
+        self.wall = perf_counter() - self._started[0]
+        self.cpu = thread_time() - self._started[1] + self.worker_cpu
+        peak_rss = get_peak_rss()
+        if peak_rss is not None and self._start_rss is not None:
+            self.peak_rss_delta = peak_rss - self._start_rss
+
+    def record_worker_cpu(self, phase, seconds, in_process=False):
+        """
+        Charge the CPU seconds a worker spent on the task to phase, in_process for a worker process
+        """
+        if not (in_process or THREAD_CPU):
+            # process_time of a worker thread is already counted by the task's own clock
+            return
+        with self._lock:
+            self.phases[phase]['cpu'] += seconds
+            self.worker_cpu += seconds
+
+    def get_phase(self):
+        """
+        Return the phase the task is in, the one work it hands out is charged to
+        """
+        return self._stack[-1][0] if self._stack else 'compute'
+
+    def record_read(self, nbytes, rows=0, files=1):
+        with self._lock:
+            self.files_read += files
+            self.bytes_read += nbytes
+            self.rows_in += rows
+
+    def record_write(self, nbytes, rows=0):
+        with self._lock:
+            self.files_written += 1
+            self.bytes_written += nbytes
+            self.rows_out += rows
+
+    def to_dict(self):
+        return {
+            'wall': self.wall,
+            'cpu': self.cpu,
+            'worker_cpu': self.worker_cpu,
+            'phases': self.phases,
+            'peak_rss_delta': self.peak_rss_delta,
+            'bytes_read': self.bytes_read,
+            'files_read': self.files_read,
+            'bytes_written': self.bytes_written,
+            'files_written': self.files_written,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out
+        }
+
+
+def accounted_phase(phase):
+    """
+    Decorator charging the time spent in a Task method to the given phase of its account
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            account = getattr(self, 'account', None)
+            # phases are only tracked on the thread running the task
+            if account is None or not account._stack or threading.current_thread() is not account.thread:
+                return function(self, *args, **kwargs)
+
+            account.enter(phase)
+            try:
+                return function(self, *args, **kwargs)
+            finally:
+                account.exit()
+        return wrapper
+    return decorator
+
+
+def write_run_report(report):
+    """
+    Write a pipeline's run report to settings.RUN_REPORT_DIR under LOCAL_PATH, returning its path
+    """
+    report_dir = os.path.join(base.LOCAL_PATH, base.RUN_REPORT_DIR, report['pipeline'])
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, f'{report["run_id"]}.json')
+    temp_path = f'{path}.{uuid.uuid4().hex}.part'
+
+    with open(temp_path, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    os.replace(temp_path, path)
+    return path
@@ -1,26 +1,107 @@
+import io
 import os
 import json
 import uuid
-import boto3
 import logging
 import hashlib
-import botocore
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from settings import base
+from generics import columnar
+from generics.cache import get_artifact_cache
+from generics.artifact_bus import get_artifact_bus
+from generics.parse_cache import get_parse_cache
+from generics.lazy_data import LazyDataMap
+from generics.accounting import cpu_timed
+from generics.schema import artifact_schemas
+from generics.fingerprint import fingerprint_frame
+from generics.s3_transfer import get_s3_transfer_manager
 from generics.file_type_enum import SupportedFileType, SupportedFileReadType
 
 
 logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
 
+# { (path, size, mtime_ns): sha1 } of the files hashed without a digest file, e.g. raw inputs
+_hashed_files = {}
+
+
+def parse_local_file(full_local_file_path, extension, read_options=None):
+    """
+    Parse a local data file with the reader for its extension, read_options
+    are handed to the csv reader.
+    This lives at module level so it can be shipped to a process pool.
+    """
+    if extension == SupportedFileType.CSV.value:
+        return pd.read_csv(full_local_file_path, **(read_options or {}))
+
+    elif extension == SupportedFileType.JSON.value:
+        return pd.read_json(full_local_file_path, typ='series')
+
+    elif extension in [SupportedFileType.XLS.value, SupportedFileType.XLSX.value]:
+        return pd.read_excel(full_local_file_path)
+
+    elif extension == SupportedFileType.PARQUET.value:
+        return columnar.read_parquet(full_local_file_path)
+
+    elif extension == SupportedFileType.FEATHER.value:
+        return columnar.read_feather(full_local_file_path)
+
+    elif extension == SupportedFileType.NPZ.value:
+        return columnar.read_npz(full_local_file_path)
+
+
+class _HashingWriter(io.TextIOBase):
+    """
+    File-like wrapper that SHA-1 hashes everything written through it,
+    so a file's digest is known as soon as it has been serialized
+    """
+    def __init__(self, file):
+        super().__init__()
+        self.file = file
+        self.sha1 = hashlib.sha1()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.sha1.update(data)
+        return self.file.write(data)
+
+    def flush(self):
+        if not self.file.closed:
+            self.file.flush()
+
+    def hexdigest(self):
+        return self.sha1.hexdigest()
+
 
 class ArtifactDataManager(object):
     """
     A Data Manager class responsible for reading and writing data from
     multiple sources and of various types. This class ought to be able 
-    to read/write csv, xls and json files from the local FS and from the 
-    a remote S3 bucket.
+    to read/write csv, xls, json and columnar (parquet, feather, npz) files
+    from the local FS and from the a remote S3 bucket. Parsed files are kept
+    in the process-wide artifact cache when settings.USE_CACHE is enabled,
+    and raw csv/excel sources in the on-disk parse cache when
+    settings.USE_PARSE_CACHE is enabled.
+
+    Artifacts listed in intermediate_artifacts keep their logical (.csv) name
+    in the tasks but are stored as settings.INTERMEDIATE_FILE_TYPE.
     """
-    supported_file_types = [SupportedFileType.CSV, SupportedFileType.JSON, SupportedFileType.XLS, SupportedFileType.XLSX]
+    supported_file_types = [
+        SupportedFileType.CSV, SupportedFileType.JSON, SupportedFileType.XLS, SupportedFileType.XLSX,
+        SupportedFileType.PARQUET, SupportedFileType.FEATHER, SupportedFileType.NPZ
+    ]
+    columnar_file_types = [SupportedFileType.PARQUET.value, SupportedFileType.FEATHER.value, SupportedFileType.NPZ.value]
+    # text formats slow enough to parse that the result is kept in the parse cache
+    parse_cached_file_types = [SupportedFileType.CSV.value, SupportedFileType.XLS.value, SupportedFileType.XLSX.value]
+    intermediate_artifacts = frozenset()
+    # folder configs are read from instead of settings.CONFIG_PATH, e.g. a scenario's, see generics.scenario
+    config_dir = None
+    # TaskAccount reads and writes are counted towards, set by Task.run
+    account = None
 
     def _parse_extension(self, filename):
         name, extension = os.path.splitext(filename)
@@ -34,116 +115,394 @@ class ArtifactDataManager(object):
 
         return extension
 
+    def _get_storage_name(self, filename):
+        """
+        Return the name an artifact is stored under on disk
+        """
+        if filename in self.intermediate_artifacts:
+            name, extension = os.path.splitext(filename)
+            return f'{name}{base.INTERMEDIATE_FILE_TYPE}'
+        return filename
+
+    def _flatten_index(self, df):
+        """
+        Columnar files keep the index of the frame that was written. Tasks expect
+        the layout a csv round-trip gives them, so named index levels become
+        columns again and unnamed ones (the old 'Unnamed: 0') are dropped.
+        """
+        named_levels = [name for name in df.index.names if name is not None]
+        if named_levels:
+            df = df.reset_index(level=named_levels)
+        if df.index.names != [None] or type(df.index) is not pd.RangeIndex:
+            df = df.reset_index(drop=True)
+        return df
+
+    def _get_config_path(self, filename):
+        return f'{self.config_dir or base.CONFIG_PATH}/{filename}'
+
     def _read_config(self, filename):
         # currently we only support configuration files that are json
         extension = self._parse_extension(filename)
         if extension != SupportedFileType.JSON.value:
             raise ValueError('We currently do not support configurations files that are not .json')
 
-        with open(f'{base.CONFIG_PATH}/{filename}') as json_file:  
+        full_config_file_path = self._get_config_path(filename)
+
+        if base.USE_CACHE:
+            return get_artifact_cache().get_or_load(full_config_file_path, lambda: self._parse_config(full_config_file_path))
+
+        return self._parse_config(full_config_file_path)
+
+    def _parse_config(self, full_config_file_path):
+        with open(full_config_file_path) as json_file:  
             config_data = json.load(json_file)
             return config_data
 
-    def _read_file(self, filename):
-        extension = self._parse_extension(filename)
-        full_local_file_path = f'{base.LOCAL_PATH}/{filename}'
+    def _read_file(self, filename, process_pool=None):
+        self._parse_extension(filename)
+
+        artifact_bus = get_artifact_bus()
+        if artifact_bus:
+            # produced earlier in this run, either still in memory or about to be on disk
+            df = artifact_bus.get(filename)
+            if df is not None:
+                self._record_read(None, df)
+                return df
+            artifact_bus.wait_for(filename)
+
+        storage_filename = self._get_storage_name(filename)
+        extension = self._parse_extension(storage_filename)
+        full_local_file_path = f'{base.LOCAL_PATH}/{storage_filename}'
         
         # let's ensure first that the file exists locally
         if not self.does_file_exist(filename):
             # otherwise, let's try to grab it from s3
-            logger.info(f'Attempting to load {filename} from S3')
-            self._read_from_s3(filename)
+            logger.info(f'Attempting to load {storage_filename} from S3')
+            self._read_from_s3(storage_filename)
         
         # if no exception is thrown, we can safely attempt to read the file
-        try:            
-            if extension == SupportedFileType.CSV.value:
-                df = pd.read_csv(full_local_file_path)
-            
-            elif extension == SupportedFileType.JSON.value:
-                df = pd.read_json(full_local_file_path, typ='series')
-            
-            elif extension in [SupportedFileType.XLS.value, SupportedFileType.XLSX.value]:
-                df = pd.read_excel(full_local_file_path)
+        if base.USE_CACHE:
+            df = get_artifact_cache().get_or_load(full_local_file_path, lambda: self._parse_file(filename, extension, process_pool))
+        else:
+            df = self._parse_file(filename, extension, process_pool)
+
+        self._record_read(full_local_file_path, df)
+        return df
+
+    def _record_read(self, full_local_file_path, data):
+        """
+        Count an artifact read towards the account of the task reading it, see generics.accounting
+        """
+        if self.account is not None:
+            nbytes = os.path.getsize(full_local_file_path) if full_local_file_path else 0
+            self.account.record_read(nbytes, len(data) if isinstance(data, pd.DataFrame) else 0)
+
+    def _parse_file(self, filename, extension, process_pool=None):
+        storage_filename = self._get_storage_name(filename)
+        full_local_file_path = f'{base.LOCAL_PATH}/{storage_filename}'
+        schema = artifact_schemas.lookup(filename)
+        read_options = schema.read_options() if schema and extension == SupportedFileType.CSV.value else {}
+
+        def parse():
+            if process_pool:
+                df, cpu = process_pool.submit(cpu_timed, parse_local_file, full_local_file_path, extension, read_options).result()
+                if self.account is not None:
+                    self.account.record_worker_cpu('load', cpu, in_process=True)
+                return df
+            return parse_local_file(full_local_file_path, extension, read_options)
+
+        try:
+            # intermediates are rewritten every run, only raw sources are worth keeping
+            if base.USE_PARSE_CACHE and extension in self.parse_cached_file_types and filename not in self.intermediate_artifacts:
+                df = get_parse_cache().get_or_parse(full_local_file_path, parse, variant=repr(read_options))
+            else:
+                df = parse()
         
         except FileNotFoundError as fe:
-            logger.exception(f'Could not find the file {filename} in the local system at local_data/')
+            logger.exception(f'Could not find the file {storage_filename} in the local system at local_data/')
             raise fe
+
+        if storage_filename != filename and extension in self.columnar_file_types:
+            df = self._flatten_index(df)
+
+        if schema and isinstance(df, pd.DataFrame):
+            df = schema.on_read(df)
         
         return df
 
+    def read_csv_chunks(self, filename, chunksize, usecols=None):
+        """
+        Yield a csv artifact as DataFrames of at most chunksize rows, so files
+        larger than memory can be streamed. usecols (a list of names or a
+        callable on each column name) limits which columns are parsed at all.
+        Chunks bypass both caches.
+        """
+        storage_filename = self._get_storage_name(filename)
+
+        if self._parse_extension(storage_filename) != SupportedFileType.CSV.value:
+            raise TypeError(f'Only .csv artifacts can be read in chunks and {storage_filename} is not one')
+
+        if not self.does_file_exist(filename):
+            logger.info(f'Attempting to load {storage_filename} from S3')
+            self._read_from_s3(storage_filename)
+
+        full_local_file_path = f'{base.LOCAL_PATH}/{storage_filename}'
+        self._record_read(full_local_file_path, None)
+
+        for chunk in pd.read_csv(full_local_file_path, chunksize=chunksize, usecols=usecols):
+            if self.account is not None:
+                self.account.record_read(0, len(chunk), files=0)
+            yield chunk
+
     def _read_from_s3(self, filename):
-        temp_filename = str(uuid.uuid4())
-        s3 = boto3.client('s3')
+        get_s3_transfer_manager().download(filename)
+
+    def _prefetch_from_s3(self, data_files):
+        """
+        Download every missing data file in one concurrent batch. Failures are
+        left for _read_file to raise, in the order the files were declared.
+        """
+        artifact_bus = get_artifact_bus()
+        missing_filenames = [
+            self._get_storage_name(entry['name']) for entry in data_files
+            if entry['read_type'] is SupportedFileReadType.DATA and not self.does_file_exist(entry['name'])
+            and not (artifact_bus and artifact_bus.holds(entry['name']))
+        ]
+
+        if len(missing_filenames) > 1:
+            logger.info(f'Attempting to load {len(missing_filenames)} files from S3')
+            get_s3_transfer_manager().download_many(missing_filenames)
+
+    def _serialize(self, stream, extension, df, index=True):
+        if extension == SupportedFileType.CSV.value:
+            df.to_csv(stream, index=index)
+            return
+
+        if extension == SupportedFileType.JSON.value:
+            stream.write(df.to_json())
+            return
+
+        buffer = io.BytesIO()
+
+        if extension == SupportedFileType.PARQUET.value:
+            columnar.write_parquet(df, buffer)
+
+        elif extension == SupportedFileType.FEATHER.value:
+            columnar.write_feather(df, buffer)
+
+        elif extension == SupportedFileType.NPZ.value:
+            columnar.write_npz(df, buffer)
+
+        stream.write(buffer.getvalue())
+
+    def _write_temp_file(self, filename, df):
+        """
+        Serialize df exactly once into a temp file next to the storage file of filename,
+        hashing the bytes on their way to disk.
+        Returns the temp file name and the SHA-1 hex digest of its contents.
+        """
+        storage_filename = self._get_storage_name(filename)
+        directory, name = os.path.split(storage_filename)
+        extension = self._parse_extension(storage_filename)
+        temp_filename = os.path.join(directory, f'__{uuid.uuid4().hex}__{extension}')
+
+        # intermediates with a schema are stored in its layout, which carries no anonymous index,
+        # deliverables keep the format their consumers read
+        schema = artifact_schemas.lookup(filename)
+        index = True
+        if schema and isinstance(df, pd.DataFrame) and filename in self.intermediate_artifacts:
+            df = schema.on_write(df)
+            index = False
+
+        full_temp_path = f'{base.LOCAL_PATH}/{temp_filename}'
         try:
-            s3.download_file(base.REMOTE_PATH, f'{filename}', temp_filename)
-            os.rename(temp_filename, f'{base.LOCAL_PATH}/{filename}')
-        except botocore.exceptions.ClientError as e:
-            # try:
-            #     s3.download_file(base.REMOTE_PATH, f'ceus/{filename}', temp_filename)
-            #     os.rename(temp_filename, f'{base.LOCAL_PATH}/{filename}')
-            # except botocore.exceptions.ClientError as e:
-            #     try:
-            #         s3.download_file(base.REMOTE_PATH, f'mix/{filename}', temp_filename)
-            #         os.rename(temp_filename, f'{base.LOCAL_PATH}/{filename}')
-            #     except botocore.exceptions.ClientError as e:
-            if e.response['Error']['Code'] == "404":
-                logger.exception(f'File {filename} does not exist in S3 under {base.REMOTE_PATH}')
+            if extension in [SupportedFileType.XLS.value, SupportedFileType.XLSX.value]:
+                # pandas picks the excel engine from the extension of the file it writes
+                df.to_excel(full_temp_path, index=index)
+                hex_digest = self._hash_local_file(full_temp_path)
             else:
-                logger.exception(e)
-            raise e
+                with open(full_temp_path, 'wb') as file:
+                    stream = _HashingWriter(file)
+                    self._serialize(stream, extension, df, index)
+                hex_digest = stream.hexdigest()
+        except Exception:
+            if os.path.exists(full_temp_path):
+                os.remove(full_temp_path)
+            raise
+
+        if self.account is not None:
+            self.account.record_write(os.path.getsize(full_temp_path), len(df) if isinstance(df, pd.DataFrame) else 0)
+
+        return temp_filename, hex_digest
+
+    def _commit_temp_file(self, temp_filename, storage_filename, hex_digest):
+        """
+        Atomically move a temp file written by _write_temp_file into place
+        and record the digest of its contents
+        """
+        full_local_file_path = f'{base.LOCAL_PATH}/{storage_filename}'
+        os.replace(f'{base.LOCAL_PATH}/{temp_filename}', full_local_file_path)
+        get_artifact_cache().invalidate(full_local_file_path)
+        self._store_file_hash(storage_filename, hex_digest)
 
     def save_data(self, filename, df):
-        extension = self._parse_extension(filename)
-        full_local_file_path = f'{base.LOCAL_PATH}/{filename}'
-            
-        if extension == SupportedFileType.CSV.value:
-            df.to_csv(full_local_file_path)
+        """
+        Write df to filename atomically and return the SHA-1 of the written bytes
+        """
+        self._parse_extension(filename)
+        storage_filename = self._get_storage_name(filename)
+        temp_filename, hex_digest = self._write_temp_file(filename, df)
+        self._commit_temp_file(temp_filename, storage_filename, hex_digest)
+        return hex_digest
+
+    def _get_digest_path(self, storage_filename):
+        directory, name = os.path.split(f'{base.LOCAL_PATH}/{storage_filename}')
+        return os.path.join(directory, f'.{name}.sha1')
+
+    def _store_file_hash(self, storage_filename, hex_digest):
+        stat = os.stat(f'{base.LOCAL_PATH}/{storage_filename}')
+        with open(self._get_digest_path(storage_filename), 'w') as digest_file:
+            json.dump({'sha1': hex_digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}, digest_file)
+
+    def get_file_hash(self, filename):
+        """
+        Return the SHA-1 of an artifact's contents from the digest recorded when
+        it was written, only hashing the file itself when that record is missing
+        or the file has changed since. Only written artifacts get a digest file,
+        others are hashed once per process.
+        """
+        storage_filename = self._get_storage_name(filename)
+        full_local_file_path = f'{base.LOCAL_PATH}/{storage_filename}'
+        stat = os.stat(full_local_file_path)
+
+        try:
+            with open(self._get_digest_path(storage_filename)) as digest_file:
+                record = json.load(digest_file)
+            if record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+                return record['sha1']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        key = (os.path.abspath(full_local_file_path), stat.st_size, stat.st_mtime_ns)
+        hex_digest = _hashed_files.get(key)
+        if hex_digest is None:
+            hex_digest = self.check_file_contents_hash(filename)
+            _hashed_files[key] = hex_digest
+        return hex_digest
+
+    def does_file_exist(self, filename):
+        return os.path.isfile(f'{base.LOCAL_PATH}/{self._get_storage_name(filename)}')
+
+    def _load_entry(self, entry, process_pool=None):
+        filename = entry['name']
+        file_read_type = entry['read_type']
+
+        logger.info(f'Reading {filename}')
+
+        if file_read_type is SupportedFileReadType.DATA:
+            return self._read_file(filename, process_pool)
         
-        elif extension == SupportedFileType.JSON.value:
-            df.to_json(full_local_file_path)
+        elif file_read_type is SupportedFileReadType.CONFIG:
+            return self._read_config(filename)
         
-        elif extension in [SupportedFileType.XLS.value, SupportedFileType.XLSX.value]:
-            df.to_excel(full_local_file_path)
+        else:
+            raise ValueError('Unsupported file read type')
 
-    def does_file_exist(self, filename):
-        return os.path.isfile(f'{base.LOCAL_PATH}/{filename}')
+    def _check_entry(self, entry):
+        """
+        Make sure an entry could be loaded without reading it, raising the
+        error that loading it would raise when it cannot
+        """
+        filename = entry['name']
+        file_read_type = entry['read_type']
+
+        if file_read_type is SupportedFileReadType.DATA:
+            storage_filename = self._get_storage_name(filename)
+            self._parse_extension(filename)
+            artifact_bus = get_artifact_bus()
+            if artifact_bus and artifact_bus.holds(filename):
+                return
+            if not self.does_file_exist(filename) and not get_s3_transfer_manager().exists(storage_filename):
+                raise FileNotFoundError(f'{storage_filename} exists neither in {base.LOCAL_PATH}/ nor in S3')
+
+        elif file_read_type is SupportedFileReadType.CONFIG:
+            if self._parse_extension(filename) != SupportedFileType.JSON.value:
+                raise ValueError('We currently do not support configurations files that are not .json')
+            if not os.path.isfile(self._get_config_path(filename)):
+                raise FileNotFoundError(f'{filename} does not exist in {self.config_dir or base.CONFIG_PATH}/')
+
+        else:
+            raise ValueError('Unsupported file read type')
 
     def load_data(self, data_files):
+        """
+        Load every entry in data_files, returning { filename: data }.
+        With settings.LOAD_WORKERS > 1 the entries are fetched and parsed
+        concurrently; the results and the first error raised still follow
+        the order of data_files, exactly like a serial load.
+
+        With settings.LAZY_LOAD enabled a LazyDataMap is returned instead:
+        every entry is only checked for existence here and is loaded the
+        first time the task looks it up.
+        """
+        if base.LAZY_LOAD:
+            for entry in data_files:
+                self._check_entry(entry)
+            return LazyDataMap(data_files, self._load_entry)
+
         data_dict = {}
+        self._prefetch_from_s3(data_files)
 
-        for entry in data_files:
-            filename = entry['name']
-            file_read_type = entry['read_type']
+        if base.LOAD_WORKERS <= 1 or len(data_files) <= 1:
+            for entry in data_files:
+                data_dict[entry['name']] = self._load_entry(entry)
+            return data_dict
 
-            logger.info(f'Reading {filename}')
+        process_pool = None
+        if base.LOAD_EXECUTOR == 'process':
+            # threads still wait on S3 and the cache, the parsing is done in processes
+            process_pool = ProcessPoolExecutor(max_workers=base.LOAD_WORKERS)
 
-            if file_read_type is SupportedFileReadType.DATA:
-                data_dict[filename] = self._read_file(filename)
-            
-            elif file_read_type is SupportedFileReadType.CONFIG:
-                data_dict[filename] = self._read_config(filename)
-            
-            else:
-                raise ValueError('Unsupported file read type')
+        try:
+            with ThreadPoolExecutor(max_workers=base.LOAD_WORKERS) as thread_pool:
+                futures = [thread_pool.submit(cpu_timed, self._load_entry, entry, process_pool) for entry in data_files]
+
+                try:
+                    for entry, future in zip(data_files, futures):
+                        data_dict[entry['name']], cpu = future.result()
+                        if self.account is not None:
+                            self.account.record_worker_cpu('load', cpu)
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            if process_pool:
+                process_pool.shutdown()
 
         return data_dict
 
     def delete_file(self, filename):
-        os.remove(f'{base.LOCAL_PATH}/{filename}')
+        storage_filename = self._get_storage_name(filename)
+        get_artifact_cache().invalidate(f'{base.LOCAL_PATH}/{storage_filename}')
+        os.remove(f'{base.LOCAL_PATH}/{storage_filename}')
 
     def get_data_frame_hash(self, df):
         if isinstance(df, pd.DataFrame):
-            return hashlib.sha1(df.to_csv().encode()).hexdigest()
+            return fingerprint_frame(df)
         raise TypeError('Artifact Data Manager expected a DataFrame during hashing and did not receive it')
 
     def check_file_contents_hash(self, filename):
         """
         Return the SHA-1 hash of the file contents
         """
+        return self._hash_local_file(f'{base.LOCAL_PATH}/{self._get_storage_name(filename)}')
+
+    def _hash_local_file(self, full_local_file_path):
         h = hashlib.sha1()
-        with open(f'{base.LOCAL_PATH}/{filename}', 'rb') as file:
+        with open(full_local_file_path, 'rb') as file:
             chunk = 0
             while chunk != b'':
-                chunk = file.read(1024)
+                chunk = file.read(1024 ** 2)
                 h.update(chunk)
         return h.hexdigest()
@@ -0,0 +1,121 @@
+import logging
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from settings import base
+from generics.memory import MemoryGovernor
+from generics.process_wide import ProcessWide
+from generics.fingerprint import fingerprint_frame
+
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+class ArtifactBus(object):
+    """
+    In-memory handoff of artifacts between the tasks of a run.
+    A task's outputs are published here as soon as it completes and are
+    served straight from memory to the tasks that read them, while their
+    files are written behind, one at a time and in the order they were
+    queued, by a single writer thread. Every hit hands back a copy, like
+    the ArtifactCache, so tasks may mutate what they receive.
+    The frames are kept within settings.MEMORY_BUDGET_BYTES by a
+    MemoryGovernor, which drops those queued to be written and spills the
+    others to disk when the run holds on to too many.
+    """
+    def __init__(self):
+        self.memory = MemoryGovernor(base.MEMORY_BUDGET_BYTES, is_on_disk=self._is_written_behind)
+        self._pending = {}
+        self._futures = []
+        self._lock = threading.Lock()
+        self._writer = None
+
+    def publish(self, filename, df):
+        self.memory.put(filename, df)
+
+    def get(self, filename):
+        """
+        Return a copy of the frame published under filename, None when there is none
+        """
+        df = self.memory.get(filename)
+        return df.copy(deep=True) if isinstance(df, pd.DataFrame) else None
+
+    def fingerprint(self, filename):
+        """
+        Return the fingerprint of the frame published under filename, see generics.fingerprint, None when there is none
+        """
+        df = self.memory.get(filename)
+        return fingerprint_frame(df) if isinstance(df, pd.DataFrame) else None
+
+    def _is_written_behind(self, filename):
+        with self._lock:
+            return filename in self._pending
+
+    def memory_only(self, filename):
+        """
+        True when filename was handed over in memory without being written
+        """
+        return filename in self.memory and not self._is_written_behind(filename)
+
+    def holds(self, filename):
+        """
+        True when filename was produced during this run, in memory or queued to be written
+        """
+        return filename in self.memory or self._is_written_behind(filename)
+
+    def write_behind(self, filename, function, *args):
+        """
+        Queue function(*args) on the writer thread; reads of filename from disk wait for it.
+        filename may be None for jobs that only have to run after the writes queued before them.
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lctk-writer')
+            future = self._writer.submit(function, *args)
+            self._futures.append(future)
+            if filename is not None:
+                self._pending[filename] = future
+        return future
+
+    def wait_for(self, filename):
+        """
+        Block until the queued write of filename, if any, is on disk
+        """
+        with self._lock:
+            future = self._pending.get(filename)
+        if future is not None:
+            future.result()
+
+    def flush(self):
+        """
+        Wait for every queued write, raising the first error one of them raised
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+
+        error = None
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.exception('Writing an artifact behind failed')
+                error = error or e
+
+        if error:
+            raise error
+
+    def clear(self):
+        self.flush()
+        self.memory.clear()
+        with self._lock:
+            self._pending.clear()
+
+
+_artifact_bus = ProcessWide(lambda: ArtifactBus())
+
+
+def get_artifact_bus():
+    """
+    Return the artifact bus, None unless settings.ARTIFACT_BUS is enabled
+    """
+    return _artifact_bus.get() if base.ARTIFACT_BUS else None
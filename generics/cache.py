@@ -0,0 +1,138 @@
+import os
+import copy
+import logging
+import threading
+import pandas as pd
+from collections import OrderedDict
+from settings import base
+from generics.process_wide import ProcessWide
+
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+class ArtifactCache(object):
+    """
+    Process-wide, byte-bounded LRU cache for parsed artifacts.
+    Entries are keyed on the absolute file path together with its mtime and
+    size, so a file that changes on disk is never served stale. Every hit
+    hands back a copy of the cached object, which lets tasks mutate what they
+    receive without corrupting the cached entry. Most files are read once, so
+    the first read of a file hands the caller the loaded object itself and
+    only remembers the file was read; the file is kept from its second read on.
+    """
+    # files read once that are remembered, so their second read is cached
+    max_seen = 4096
+
+    def __init__(self, max_bytes):
+        """
+        max_bytes <int>: memory budget for all cached entries combined
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._seen = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _make_key(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    def _estimate_size(self, value, key):
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            memory_usage = value.memory_usage(index=True, deep=True)
+            return int(memory_usage.sum()) if isinstance(value, pd.DataFrame) else int(memory_usage)
+        # configs are small, the size on disk is a good enough approximation
+        return key[2]
+
+    def _copy(self, value):
+        # a full copy, a hit costs one pass over the frame's memory but no parsing.
+        # pandas has no copy on write, a shallow copy would let a task's in place
+        # edits reach the cached frame
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return value.copy(deep=True)
+        return copy.deepcopy(value)
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            key, (value, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            logger.debug(f'Evicted {key[0]} from the artifact cache')
+
+    def get_or_load(self, path, loader):
+        """
+        Return a copy of the cached artifact at path, calling loader() to
+        parse it when it is missing or out of date. The loaded object is
+        returned as it is the first time, cached from the second. Hits still
+        copy the whole object, so the cache saves parse time, not memory.
+        """
+        key = self._make_key(path)
+
+        if key is None:
+            # nothing we can key on, let the loader surface the error
+            return loader()
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(self._entries[key][0])
+            self.misses += 1
+            seen = self._seen.pop(key, None) is not None
+
+        value = loader()
+
+        if not seen:
+            # the cache does not keep this object, the caller may have it as it is
+            with self._lock:
+                self._seen[key] = True
+                while len(self._seen) > self.max_seen:
+                    self._seen.popitem(last=False)
+            return value
+
+        size = self._estimate_size(value, key)
+
+        if size <= self.max_bytes:
+            with self._lock:
+                self.invalidate(path)
+                self._entries[key] = (value, size)
+                self.current_bytes += size
+                self._evict()
+            return self._copy(value)
+
+        logger.info(f'{path} is larger than the artifact cache budget, skipping the cache')
+        return value
+
+    def invalidate(self, path):
+        """
+        Drop every cached version of the file at path
+        """
+        full_path = os.path.abspath(path)
+
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == full_path]:
+                value, size = self._entries.pop(key)
+                self.current_bytes -= size
+            for key in [key for key in self._seen if key[0] == full_path]:
+                del self._seen[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._seen.clear()
+            self.current_bytes = 0
+
+
+_artifact_cache = ProcessWide(lambda: ArtifactCache(base.CACHE_MAX_BYTES))
+
+
+def get_artifact_cache():
+    """
+    Return the artifact cache shared by every task
+    """
+    return _artifact_cache.get()
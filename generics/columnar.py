@@ -0,0 +1,159 @@
+"""
+Typed binary storage for DataFrames, parquet and feather need pyarrow, npz only numpy
+"""
+import json
+import numpy as np
+import pandas as pd
+
+
+NPZ_META_KEY = '__meta__'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise ImportError('Reading or writing .parquet and .feather artifacts requires pyarrow to be installed')
+
+
+def write_parquet(df, path):
+    _require_pyarrow()
+    df.to_parquet(path, engine='pyarrow')
+
+
+def read_parquet(path):
+    _require_pyarrow()
+    return pd.read_parquet(path, engine='pyarrow')
+
+
+def write_feather(df, path):
+    pyarrow = _require_pyarrow()
+    from pyarrow import feather
+    # going through a Table keeps the pandas metadata, so unlike
+    # DataFrame.to_feather we can store frames with a non-default index
+    feather.write_feather(pyarrow.Table.from_pandas(df), path)
+
+
+def read_feather(path):
+    _require_pyarrow()
+    from pyarrow import feather
+    return feather.read_table(path).to_pandas()
+
+
+def _encode_array(key, values, arrays):
+    """
+    Store a single column or index level under key and return its description
+    """
+    if isinstance(values.dtype, pd.api.types.CategoricalDtype):
+        categories = _encode_array(f'{key}_categories', pd.Series(values.cat.categories), arrays)
+        arrays[f'{key}_codes'] = np.asarray(values.cat.codes)
+        return {'kind': 'category', 'categories': categories, 'ordered': bool(values.cat.ordered)}
+
+    if isinstance(values.dtype, pd.api.types.DatetimeTZDtype):
+        arrays[key] = np.asarray(values.dt.tz_convert('UTC').dt.tz_localize(None), dtype='datetime64[ns]')
+        return {'kind': 'datetimetz', 'tz': str(values.dt.tz)}
+
+    if values.dtype == object:
+        nulls = np.asarray(values.isnull())
+        present = values[~nulls]
+
+        if not all(isinstance(item, str) for item in present):
+            raise TypeError(f'Column {key} holds objects other than strings, which cannot be stored as .npz')
+
+        arrays[key] = np.asarray(values.fillna('').astype(str), dtype=str)
+        arrays[f'{key}_nulls'] = nulls
+        return {'kind': 'string'}
+
+    arrays[key] = np.asarray(values)
+
+    if arrays[key].dtype == object:
+        raise TypeError(f'Column {key} has dtype {values.dtype}, which cannot be stored as .npz')
+
+    return {'kind': 'array'}
+
+
+def _json_name(name):
+    # numpy scalars sneak into column names and json cannot encode them
+    return name.item() if isinstance(name, np.generic) else name
+
+
+def _decode_array(key, description, arrays):
+    kind = description['kind']
+
+    if kind == 'category':
+        categories = _decode_array(f'{key}_categories', description['categories'], arrays)
+        return pd.Categorical.from_codes(arrays[f'{key}_codes'], categories=categories, ordered=description['ordered'])
+
+    if kind == 'datetimetz':
+        return pd.DatetimeIndex(arrays[key]).tz_localize('UTC').tz_convert(description['tz'])
+
+    if kind == 'string':
+        values = arrays[key].astype(object)
+        values[arrays[f'{key}_nulls']] = np.nan
+        return values
+
+    return arrays[key]
+
+
+def write_npz(df, path, compressed=True):
+    if isinstance(df.columns, pd.MultiIndex):
+        raise TypeError('DataFrames with MultiIndex columns cannot be stored as .npz')
+
+    arrays = {}
+    meta = {'columns': [], 'index': []}
+
+    for position, column in enumerate(df.columns):
+        description = _encode_array(f'c{position}', df.iloc[:, position], arrays)
+        description['name'] = _json_name(column)
+        meta['columns'].append(description)
+
+    if type(df.index) is pd.RangeIndex:
+        # no need to materialize the default index
+        step = int(df.index[1] - df.index[0]) if len(df.index) > 1 else 1
+        meta['range_index'] = {
+            'start': int(df.index[0]) if len(df.index) else 0,
+            'stop': int(df.index[-1]) + step if len(df.index) else 0,
+            'step': step,
+            'name': _json_name(df.index.name)
+        }
+    else:
+        for level, name in enumerate(df.index.names):
+            description = _encode_array(f'i{level}', pd.Series(df.index.get_level_values(level)), arrays)
+            description['name'] = _json_name(name)
+            meta['index'].append(description)
+
+    arrays[NPZ_META_KEY] = np.array(json.dumps(meta))
+    # uncompressed is several times faster to write and read, at the cost of disk space
+    savez = np.savez_compressed if compressed else np.savez
+
+    if hasattr(path, 'write'):
+        savez(path, **arrays)
+        return
+
+    with open(path, 'wb') as npz_file:
+        savez(npz_file, **arrays)
+
+
+def read_npz(path):
+    with np.load(path, allow_pickle=False) as arrays:
+        meta = json.loads(str(arrays[NPZ_META_KEY]))
+
+        data = {}
+        for position, description in enumerate(meta['columns']):
+            data[position] = _decode_array(f'c{position}', description, arrays)
+
+        if 'range_index' in meta:
+            range_index = meta['range_index']
+            index = pd.RangeIndex(range_index['start'], range_index['stop'], range_index['step'], name=range_index['name'])
+        else:
+            levels = [_decode_array(f'i{level}', description, arrays) for level, description in enumerate(meta['index'])]
+            names = [description['name'] for description in meta['index']]
+            if len(levels) == 1:
+                index = pd.Index(levels[0], name=names[0])
+            else:
+                index = pd.MultiIndex.from_arrays(levels, names=names)
+
+    df = pd.DataFrame(data, index=index)
+    df.columns = [description['name'] for description in meta['columns']]
+    return df
@@ -8,6 +8,9 @@ class SupportedFileType(Enum):
     XLS = '.xls'
     XLSX = '.xlsx'
     JSON = '.json'
+    PARQUET = '.parquet'
+    FEATHER = '.feather'
+    NPZ = '.npz'
 
 class SupportedFileReadType(Enum):
     """
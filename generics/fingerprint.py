@@ -0,0 +1,90 @@
+"""
+Content fingerprints for DataFrames handed between tasks only in memory
+"""
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+# bump whenever the encoding below changes, so old fingerprints stop matching
+FINGERPRINT_VERSION = 1
+
+
+def _frame_schema(df):
+    return {
+        'version': FINGERPRINT_VERSION,
+        'index': [[str(name), str(df.index.get_level_values(level).dtype)] for level, name in enumerate(df.index.names)],
+        'columns': [[str(name), str(dtype)] for name, dtype in df.dtypes.items()]
+    }
+
+
+def _encode_values(values):
+    """
+    Return a byte string for an array-like such that encoding two partitions
+    one after the other gives the same bytes as encoding them concatenated
+    """
+    dtype = values.dtype
+
+    if isinstance(dtype, pd.api.types.CategoricalDtype):
+        return _encode_values(np.asarray(values.astype(object)))
+
+    if isinstance(dtype, pd.api.types.DatetimeTZDtype):
+        # the UTC instants, the zone itself is part of the schema
+        return pd.DatetimeIndex(values).asi8.astype('<i8').tobytes()
+
+    values = np.asarray(values)
+
+    if values.dtype.kind in 'mM':
+        return values.view('i8').astype('<i8').tobytes()
+
+    if values.dtype.kind in 'biuf':
+        return np.ascontiguousarray(values.astype(values.dtype.newbyteorder('<'))).tobytes()
+
+    return pd.util.hash_array(values.astype(object), categorize=False).astype('<u8').tobytes()
+
+
+class FrameFingerprint(object):
+    """
+    Incremental fingerprint of a DataFrame.
+    Partitions appended with update() give the same digest as the whole
+    frame fingerprinted in one go, provided they share the same schema.
+    """
+    def __init__(self):
+        self.schema = None
+        self.rows = 0
+        self._hashers = []
+
+    def update(self, df):
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError('FrameFingerprint expected a DataFrame and did not receive it')
+
+        schema = _frame_schema(df)
+
+        if self.schema is None:
+            self.schema = schema
+            self._hashers = [hashlib.sha1() for _ in range(df.index.nlevels + df.shape[1])]
+        elif schema != self.schema:
+            raise ValueError('Cannot append a partition whose schema differs from the fingerprinted frame')
+
+        arrays = [df.index.get_level_values(level) for level in range(df.index.nlevels)]
+        arrays += [df.iloc[:, position] for position in range(df.shape[1])]
+
+        for hasher, values in zip(self._hashers, arrays):
+            hasher.update(_encode_values(values))
+
+        self.rows += len(df)
+        return self
+
+    def hexdigest(self):
+        h = hashlib.sha1(json.dumps(self.schema, sort_keys=True).encode())
+        for hasher in self._hashers:
+            h.update(hasher.digest())
+        return h.hexdigest()
+
+
+def fingerprint_frame(df):
+    """
+    Return the hex fingerprint of a DataFrame's schema, index and values
+    """
+    return FrameFingerprint().update(df).hexdigest()
@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+
+class LazyDataMap(Mapping):
+    """
+    Read-only { filename: data } map handed out by load_data when
+    settings.LAZY_LOAD is enabled. An entry is loaded the first time it is
+    looked up and kept for later lookups, so inputs a task never reads are
+    never downloaded or parsed. touched() and untouched() report which
+    declared inputs a task actually used.
+    """
+    def __init__(self, data_files, loader):
+        """
+        data_files <list>: the { 'name', 'read_type' } entries given to load_data
+        loader <callable>: loads a single entry, e.g. ArtifactDataManager._load_entry
+        """
+        self._entries = OrderedDict((entry['name'], entry) for entry in data_files)
+        self._loader = loader
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        entry = self._entries[name]
+
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = self._loader(entry)
+            return self._values[name]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f'LazyDataMap({list(self._entries)}, loaded={self.touched()})'
+
+    def touched(self):
+        return [name for name in self._entries if name in self._values]
+
+    def untouched(self):
+        return [name for name in self._entries if name not in self._values]
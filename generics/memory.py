@@ -0,0 +1,188 @@
+import os
+import uuid
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from settings import base
+from generics import columnar
+from generics.lazy_data import LazyDataMap
+
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+def get_frame_size(df):
+    """
+    Return the bytes a frame takes up in memory, strings included
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def holds_data(value):
+    """
+    True for frames, arrays and data maps, or containers of them, the things a task should let go of
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray, LazyDataMap)):
+        return True
+    if isinstance(value, dict):
+        return any(holds_data(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(holds_data(item) for item in value)
+    return False
+
+
+class MemoryGovernor(object):
+    """
+    Byte-bounded store for the frames a run keeps in memory.
+    Every frame is tracked with its size and the number of reads the rest
+    of the run still has to do of it. Past the budget the least recently
+    needed frames go first, those nothing reads anymore before the least
+    recently used: a frame already written to disk is simply dropped, the
+    others are spilled to SPILL_DIR under LOCAL_PATH as uncompressed .npz
+    and read back the next time they are asked for. Written frames are also
+    dropped as soon as their last expected read is done.
+    """
+    def __init__(self, max_bytes, is_on_disk=None):
+        """
+        max_bytes <int>: memory budget for all frames combined
+        is_on_disk <callable>: is_on_disk(name) is True when the frame can be read back from its own file
+        """
+        self.max_bytes = max_bytes
+        self.is_on_disk = is_on_disk or (lambda name: False)
+        self.current_bytes = 0
+        self.peak_bytes = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.reloaded = 0
+        self._frames = OrderedDict()
+        self._spill_paths = {}
+        self._unspillable = set()
+        self._readers = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._frames or name in self._spill_paths
+
+    def put(self, name, df):
+        with self._lock:
+            self.forget(name)
+            size = get_frame_size(df)
+            self._frames[name] = (df, size)
+            self.current_bytes += size
+            self.peak_bytes = max(self.peak_bytes, self.current_bytes)
+            self._enforce()
+
+    def get(self, name):
+        """
+        Return the frame stored under name, reading it back when it was spilled, None when there is none
+        """
+        with self._lock:
+            if name in self._frames:
+                self._frames.move_to_end(name)
+                return self._frames[name][0]
+
+            path = self._spill_paths.get(name)
+            if path is None:
+                return None
+
+            df = columnar.read_npz(path)
+            size = get_frame_size(df)
+            self._frames[name] = (df, size)
+            self.current_bytes += size
+            self.peak_bytes = max(self.peak_bytes, self.current_bytes)
+            self.reloaded += 1
+            logger.debug(f'Read {name} back from {path}')
+            self._enforce()
+            return df
+
+    def expect_reads(self, reads):
+        """
+        Add { name: count } to the reads the rest of the run will do of each frame
+        """
+        with self._lock:
+            for name, count in reads.items():
+                self._readers[name] = self._readers.get(name, 0) + count
+
+    def done_reading(self, names):
+        """
+        Count one read of each of names as done; a frame the rest of the run
+        no longer reads is dropped right away when its own file has it
+        """
+        with self._lock:
+            for name in names:
+                if self._readers.get(name, 0) > 0:
+                    self._readers[name] -= 1
+                    if self._readers[name] == 0 and name in self and self.is_on_disk(name):
+                        self.forget(name)
+                        self.dropped += 1
+                        logger.debug(f'Dropped {name} from memory, nothing reads it anymore')
+
+    def _get_victims(self):
+        # frames nobody reads anymore first, each group least recently used first
+        names = [name for name in self._frames if name not in self._unspillable]
+        return sorted(names, key=lambda name: self._readers.get(name, 0) > 0)
+
+    def _enforce(self):
+        for name in self._get_victims():
+            if self.current_bytes <= self.max_bytes:
+                return
+            self._release(name)
+
+        if self.current_bytes > self.max_bytes:
+            logger.warning(f'{self.current_bytes} bytes of frames in memory, over the budget of {self.max_bytes}')
+
+    def _release(self, name):
+        df, size = self._frames[name]
+
+        if self.is_on_disk(name):
+            self.dropped += 1
+            logger.debug(f'Dropped {name} from memory, it is read back from its file')
+        elif name not in self._spill_paths:
+            spill_dir = os.path.join(base.LOCAL_PATH, base.SPILL_DIR)
+            path = os.path.join(spill_dir, f'{uuid.uuid4().hex}.npz')
+            os.makedirs(spill_dir, exist_ok=True)
+            try:
+                columnar.write_npz(df, path, compressed=False)
+            except TypeError as e:
+                if os.path.exists(path):
+                    os.remove(path)
+                logger.warning(f'Keeping {name} in memory, it cannot be spilled: {e}')
+                self._unspillable.add(name)
+                return
+            self._spill_paths[name] = path
+            self.spilled += 1
+            logger.debug(f'Spilled {name} to {path}')
+
+        del self._frames[name]
+        self.current_bytes -= size
+
+    def forget(self, name):
+        with self._lock:
+            if name in self._frames:
+                df, size = self._frames.pop(name)
+                self.current_bytes -= size
+            path = self._spill_paths.pop(name, None)
+            if path and os.path.exists(path):
+                os.remove(path)
+            self._unspillable.discard(name)
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._frames) + list(self._spill_paths):
+                self.forget(name)
+            self._readers.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'max_bytes': self.max_bytes,
+                'current_bytes': self.current_bytes,
+                'peak_bytes': self.peak_bytes,
+                'frames': len(self._frames),
+                'dropped': self.dropped,
+                'spilled': self.spilled,
+                'reloaded': self.reloaded
+            }
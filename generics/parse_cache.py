@@ -0,0 +1,203 @@
+import os
+import uuid
+import hashlib
+import logging
+import threading
+import pandas as pd
+from collections import OrderedDict
+from settings import base
+from generics import columnar
+from generics.process_wide import ProcessWide
+
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+# bump whenever the way sources are parsed changes, so stale entries stop matching
+PARSE_CACHE_VERSION = 1
+
+
+class ParseCache(object):
+    """
+    On-disk cache of parsed source files.
+    Raw inputs (csv, excel) are parsed once and the typed frame is stored
+    as uncompressed .npz, keyed on the source's path, size, mtime and inode,
+    so any change to the source is a cache miss. Entries are evicted least
+    recently used first once the cache grows past max_bytes.
+    """
+    def __init__(self, cache_dir, max_bytes):
+        """
+        cache_dir <string>: folder the parsed frames are stored in
+        max_bytes <int>: disk budget for all entries combined
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        # { entry path: size }, least recently used first, read from disk on first use
+        self._entries = None
+        self._lock = threading.RLock()
+
+    def _entry_path(self, path, variant=''):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        key = f'{PARSE_CACHE_VERSION}|{pd.__version__}|{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{stat.st_ino}|{variant}'
+        return os.path.join(self.cache_dir, f'{hashlib.sha1(key.encode()).hexdigest()}.npz')
+
+    def _read_entry(self, entry_path):
+        try:
+            df = columnar.read_npz(entry_path)
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(entry_path)
+            return None
+        except Exception as e:
+            # a corrupt entry is only a miss
+            logger.warning(f'Discarding unreadable parse cache entry {entry_path}: {e}')
+            self._remove(entry_path)
+            with self._lock:
+                self._forget(entry_path)
+            return None
+
+        # touching the entry keeps the eviction least recently used across runs
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        with self._lock:
+            entries = self._get_entries()
+            if entry_path in entries:
+                entries.move_to_end(entry_path)
+            else:
+                # written by another process since the index was read
+                self._track(entry_path)
+        return df
+
+    def _write_entry(self, entry_path, df):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f'{entry_path}.{uuid.uuid4().hex}.part'
+
+        try:
+            columnar.write_npz(df, temp_path, compressed=False)
+            os.replace(temp_path, entry_path)
+        except TypeError as e:
+            logger.info(f'Not caching a parsed frame: {e}')
+            return
+        finally:
+            self._remove(temp_path)
+
+        with self._lock:
+            self._get_entries()
+            self._forget(entry_path)
+            self._track(entry_path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _get_entries(self):
+        """
+        Return the index of the entries, listing the cache folder only the first time
+        """
+        if self._entries is None:
+            entries = []
+            try:
+                names = os.listdir(self.cache_dir)
+            except FileNotFoundError:
+                names = []
+
+            for name in names:
+                if not name.endswith('.npz'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, path, stat.st_size))
+
+            self._entries = OrderedDict((path, size) for mtime, path, size in sorted(entries))
+            self.current_bytes = sum(self._entries.values())
+        return self._entries
+
+    def _track(self, entry_path):
+        try:
+            size = os.path.getsize(entry_path)
+        except OSError:
+            return
+        self._entries[entry_path] = size
+        self.current_bytes += size
+
+    def _forget(self, entry_path):
+        if self._entries is not None and entry_path in self._entries:
+            self.current_bytes -= self._entries.pop(entry_path)
+
+    def size(self):
+        with self._lock:
+            self._get_entries()
+            return self.current_bytes
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits max_bytes
+        """
+        with self._lock:
+            entries = self._get_entries()
+            while self.current_bytes > self.max_bytes and entries:
+                path, size = entries.popitem(last=False)
+                self.current_bytes -= size
+                self._remove(path)
+                logger.debug(f'Evicted {path} from the parse cache')
+
+    def get_or_parse(self, path, parser, variant=''):
+        """
+        Return the parsed frame for the source at path, calling parser() and
+        storing its result when there is no entry for the current file.
+        variant tells apart the frames of one file parsed with different options.
+        """
+        entry_path = self._entry_path(path, variant)
+
+        if entry_path is None:
+            # nothing we can key on, let the parser surface the error
+            return parser()
+
+        df = self._read_entry(entry_path)
+        if df is not None:
+            return df
+
+        df = parser()
+
+        if isinstance(df, pd.DataFrame):
+            self._write_entry(entry_path, df)
+            self.evict()
+
+        return df
+
+    def purge(self):
+        """
+        Remove every entry from the cache
+        """
+        with self._lock:
+            # list the folder again, entries other processes wrote go too
+            self._entries = None
+            for path in self._get_entries():
+                self._remove(path)
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+_parse_cache = ProcessWide(lambda: ParseCache(os.path.join(base.LOCAL_PATH, base.PARSE_CACHE_DIR), base.PARSE_CACHE_MAX_BYTES))
+
+
+def get_parse_cache():
+    """
+    Return the parse cache for the current settings.LOCAL_PATH
+    """
+    parse_cache = _parse_cache.get(key=os.path.join(base.LOCAL_PATH, base.PARSE_CACHE_DIR))
+    parse_cache.max_bytes = base.PARSE_CACHE_MAX_BYTES
+    return parse_cache
@@ -1,6 +1,14 @@
 import uuid
 import logging
+from time import perf_counter
+from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from settings import base
 from generics import task as t
+from generics.cache import get_artifact_cache
+from generics.artifact_bus import get_artifact_bus
+from generics.run_manifest import get_run_manifest
+from generics.accounting import write_run_report
 
 
 logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
@@ -10,9 +18,10 @@ class Pipeline(object):
     """
     LCTK pipeline implementation.
     Takes in a given number of Task objects and executes their function
-    in the given order. The pipeline is in charge of managing the overall
-    atomicity of the pipeline execution and the success/failure rollback 
-    protocol, to include global setup and cleanup.
+    in the given order, or tasks that share no artifacts concurrently when
+    settings.PIPELINE_WORKERS is above 1. The pipeline is in charge of managing
+    the overall atomicity of the pipeline execution and the success/failure
+    rollback protocol, to include global setup and cleanup.
     """
     def __init__(self, name=None):
         """
@@ -25,7 +34,19 @@ class Pipeline(object):
         else:
             self.name = name 
         self.tasks = []
+        # artifacts only handed between tasks, see settings.INTERMEDIATE_FILE_TYPE
+        self.intermediate_artifacts = set()
         self.result_map = {}
+        # inputs each task read and the ones it never touched, see settings.LAZY_LOAD
+        self.input_usage_map = {}
+        # tasks that failed or were skipped because a task they depend on failed
+        self.failed_tasks = []
+        # completed tasks of the current and of the previous run, see settings.RESUME
+        self.run_manifest = None
+        self.previous_manifest = None
+        self.resumed_tasks = []
+        self.run_wall_time = 0
+        self._run_started = None
         self.total_pipeline_run_time = 0
 
     def add_task(self, entry):
@@ -33,27 +54,122 @@ class Pipeline(object):
         Add a task to the pipeline
         """
         if isinstance(entry, t.Task):
+            entry.intermediate_artifacts = self.intermediate_artifacts
             self.tasks.append(entry)
         else:
             raise TypeError('LoadInsight does not support pipeline execution of tasks that are not an instance of <Task>')
     
-    def run(self, **kwargs):
+    def run(self, targets=None, **kwargs):
         """
-        Run the tasks in a pipeline
+        Run the tasks in a pipeline, independent tasks concurrently with settings.PIPELINE_WORKERS above 1.
+        Given target artifacts, e.g. ['rbsa/components.csv'], only the tasks needed to produce them are run.
         """
-        for pipeline_task in self.tasks:
-            pipeline_task.run()
-            result = pipeline_task.run_result
-            task_run_time = pipeline_task.get_task_run_time()
+        run_pipelines([self], targets=targets)
 
-            logger.info(f'Result of task {pipeline_task.name} is {result} and its execution time is {task_run_time}')
-            logger.info(f'Task finished, is it valid? {str(pipeline_task.did_task_pass_validation)}')
+    def _start_run(self):
+        self._run_started = perf_counter()
+        self.failed_tasks = []
+        self.resumed_tasks = []
+        self.run_manifest = get_run_manifest(self.name)
+        self.previous_manifest = self.run_manifest.load_previous() if base.RESUME else None
 
-            if not pipeline_task.did_task_pass_validation:
-                raise ValueError(f'Validation Failed for task {pipeline_task.name}')
-            
-            self.result_map[pipeline_task.name] = pipeline_task.task_results
-            self.total_pipeline_run_time += task_run_time
+    def _finish_run(self, failed):
+        self.run_wall_time = perf_counter() - self._run_started
+
+        if failed:
+            self.run_manifest.finish('failed')
+            logger.info(f'Completed tasks of {self.name} are checkpointed in {self.run_manifest.path}, '
+                        f'run with settings.RESUME (init.py -r) to restart from the first incomplete one')
+        else:
+            self.run_manifest.finish('complete')
+
+        report_path = write_run_report(self.get_run_report())
+        logger.info(f'Resource report of the {self.name} run written to {report_path}')
+
+    def _get_task_status(self, pipeline_task):
+        if pipeline_task.name in self.failed_tasks:
+            return 'failed'
+        if pipeline_task.name in self.resumed_tasks:
+            return 'resumed'
+        if pipeline_task.account is None:
+            return 'not run'
+        return 'skipped' if pipeline_task.skipped else 'complete'
+
+    def get_run_report(self):
+        """
+        Return the resources every task of the last run used, see generics.accounting
+        """
+        return {
+            'pipeline': self.name,
+            'run_id': self.run_manifest.record['run_id'],
+            'status': self.run_manifest.record['status'],
+            'started': self.run_manifest.record['started'],
+            'finished': self.run_manifest.record['finished'],
+            'wall': self.run_wall_time,
+            'tasks': [
+                dict({'name': pipeline_task.name, 'status': self._get_task_status(pipeline_task)},
+                     **(pipeline_task.account.to_dict() if pipeline_task.account else {}))
+                for pipeline_task in self.tasks
+            ]
+        }
+
+    def _resume_task(self, pipeline_task):
+        """
+        Reuse the outcome of a task the previous run completed, provided it would run
+        with the same parameters, code and inputs and the artifacts it produced are
+        still on disk unchanged, see Task.matches_run_state. Returns True when the
+        task was reused.
+        """
+        if not self.previous_manifest:
+            return False
+
+        key = pipeline_task._get_state_key()
+        task_record = self.previous_manifest['tasks'].get(key)
+
+        if not pipeline_task.matches_run_state(task_record, pipeline_task.get_parameters()):
+            return False
+
+        logger.info(f'Resuming past task {pipeline_task.name}, it completed in run {self.previous_manifest["run_id"]}')
+        self.resumed_tasks.append(pipeline_task.name)
+        pipeline_task.run_state = task_record
+        pipeline_task.task_results = task_record['task_results']
+        self.result_map[pipeline_task.name] = pipeline_task.task_results
+        self.run_manifest.carry_over(key, task_record)
+        return True
+
+    def _checkpoint_task(self, pipeline_task):
+        key = pipeline_task._get_state_key()
+        artifact_bus = get_artifact_bus()
+
+        if artifact_bus:
+            # the outputs are only on disk once the writes queued before this are done
+            artifact_bus.write_behind(None, self.run_manifest.checkpoint, key, pipeline_task)
+        else:
+            self.run_manifest.checkpoint(key, pipeline_task)
+
+    def _on_task_complete(self, pipeline_task):
+        """
+        Record the outcome of a task that ran as part of this pipeline
+        """
+        result = pipeline_task.run_result
+        task_run_time = pipeline_task.get_task_run_time()
+
+        logger.info(f'Result of task {pipeline_task.name} is {result} and its execution time is {task_run_time}')
+        logger.info(f'Task finished, is it valid? {str(pipeline_task.did_task_pass_validation)}')
+
+        if not pipeline_task.did_task_pass_validation:
+            raise ValueError(f'Validation Failed for task {pipeline_task.name}')
+
+        self.result_map[pipeline_task.name] = pipeline_task.task_results
+
+        input_usage = pipeline_task.get_input_usage()
+        if input_usage['touched'] or input_usage['untouched']:
+            self.input_usage_map[pipeline_task.name] = input_usage
+            logger.info(f'Task {pipeline_task.name} read {len(input_usage["touched"])} of its '
+                        f'{len(input_usage["touched"]) + len(input_usage["untouched"])} lazily loaded inputs, '
+                        f'never read: {input_usage["untouched"]}')
+        self.total_pipeline_run_time += task_run_time
+        self._checkpoint_task(pipeline_task)
 
     def save(self):
         """
@@ -65,4 +181,175 @@ class Pipeline(object):
         """
         Cleanup after a pipeline run
         """
-        pass
+        if delete_local:
+            # release the parsed copies of this run's artifacts
+            get_artifact_cache().clear()
+            artifact_bus = get_artifact_bus()
+            if artifact_bus:
+                artifact_bus.clear()
+
+
+def build_task_graph(tasks):
+    """
+    Return { position: set(positions it depends on) } for tasks given in their serial order.
+    A task depends on every earlier task that writes an artifact it reads, reads an
+    artifact it writes or writes the same artifact, so running the graph gives the
+    same artifacts as running the tasks one after the other.
+    """
+    declarations = [(set(task.get_input_artifacts()), set(task.get_output_artifacts())) for task in tasks]
+    graph = {}
+
+    for position, (inputs, outputs) in enumerate(declarations):
+        graph[position] = set()
+        for earlier, (earlier_inputs, earlier_outputs) in enumerate(declarations[:position]):
+            if (earlier_outputs & inputs) or (earlier_inputs & outputs) or (earlier_outputs & outputs):
+                graph[position].add(earlier)
+
+    return graph
+
+
+def select_tasks(tasks, targets):
+    """
+    Return the positions of the tasks, given in their serial order, needed to produce the target
+    artifacts: the last task writing each target and, recursively, the last task before it writing
+    each artifact it reads. Artifacts no task writes are read as they are, from disk or S3.
+    Raises a ValueError naming the targets no task writes.
+    """
+    writers = {}
+    for position, task in enumerate(tasks):
+        for output in task.get_output_artifacts():
+            writers.setdefault(output, []).append(position)
+
+    unknown = [target for target in targets if target not in writers]
+    if unknown:
+        raise ValueError(f'No task writes the target artifacts {unknown}, known artifacts are {sorted(writers)}')
+
+    selected = set()
+    wanted = [(target, len(tasks)) for target in targets]
+
+    while wanted:
+        name, before = wanted.pop()
+        earlier_writers = [position for position in writers.get(name, []) if position < before]
+        if not earlier_writers or earlier_writers[-1] in selected:
+            continue
+
+        position = earlier_writers[-1]
+        selected.add(position)
+        wanted += [(input_name, position) for input_name in tasks[position].get_input_artifacts()]
+
+    return sorted(selected)
+
+
+def run_task_graph(entries, max_workers=None):
+    """
+    Run [(pipeline, task)] entries, each task as soon as the tasks it depends on have
+    finished, on at most max_workers threads (settings.PIPELINE_WORKERS).
+    Tasks depending on a failed task are skipped and a ValueError naming them is raised at the end.
+    """
+    max_workers = base.PIPELINE_WORKERS if max_workers is None else max_workers
+    graph = build_task_graph([task for pipeline, task in entries])
+    pipelines = list(OrderedDict.fromkeys(pipeline for pipeline, task in entries))
+    artifact_bus = get_artifact_bus()
+
+    for pipeline in pipelines:
+        pipeline._start_run()
+
+    # a task checkpointed by the previous run is reused when everything it depends on is as well
+    finished = set()
+    for position in sorted(graph):
+        pipeline, task = entries[position]
+        if graph[position] <= finished and pipeline._resume_task(task):
+            finished.add(position)
+
+    pending = set(graph) - finished
+    failed = set()
+    running = {}
+
+    if artifact_bus:
+        artifact_bus.memory.expect_reads(Counter(name for position in pending for name in entries[position][1].get_input_artifacts()))
+
+    def fail(position, reason):
+        pipeline, task = entries[position]
+        logger.error(f'Task {task.name} of pipeline {pipeline.name} did not complete: {reason}')
+        pipeline.failed_tasks.append(task.name)
+        failed.add(position)
+
+    def release(position):
+        pipeline, task = entries[position]
+        if artifact_bus:
+            artifact_bus.memory.done_reading(task.get_input_artifacts())
+        if base.RELEASE_TASK_DATA:
+            task.release_data()
+
+    write_error = None
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='lctk-task') as executor:
+            while pending or running:
+                for position in sorted(pending):
+                    if graph[position] & failed:
+                        pending.discard(position)
+                        fail(position, 'a task it depends on failed')
+                        release(position)
+                    elif graph[position] <= finished and len(running) < max(1, max_workers):
+                        pending.discard(position)
+                        running[executor.submit(entries[position][1].run)] = position
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=running.get):
+                    position = running.pop(future)
+                    pipeline, task = entries[position]
+                    try:
+                        future.result()
+                        pipeline._on_task_complete(task)
+                    except Exception as e:
+                        logger.exception(f'Task {task.name} of pipeline {pipeline.name} failed')
+                        fail(position, e)
+                    else:
+                        finished.add(position)
+                    release(position)
+    finally:
+        if artifact_bus:
+            try:
+                artifact_bus.flush()
+            except Exception as e:
+                write_error = e
+
+            stats = artifact_bus.memory.get_stats()
+            logger.info(f'Frames handed over in memory peaked at {stats["peak_bytes"]} bytes of a {stats["max_bytes"]} budget, '
+                        f'{stats["dropped"]} were dropped and {stats["spilled"]} spilled to disk')
+            # the frames, spill files and expected reads are this run's, the next one starts empty
+            artifact_bus.clear()
+
+    for pipeline in pipelines:
+        pipeline._finish_run(failed=bool(pipeline.failed_tasks or write_error))
+
+    if write_error:
+        raise ValueError(f'Writing the artifacts of the run failed: {write_error}')
+
+    if failed:
+        raise ValueError(f'Tasks failed or were skipped: {[entries[position][1].name for position in sorted(failed)]}')
+
+
+def run_pipelines(pipelines, max_workers=None, targets=None):
+    """
+    Run the tasks of several pipelines as one graph, so tasks of one pipeline
+    overlap with those of another unless they share artifacts.
+    Given target artifacts only the tasks needed to produce them are run, see
+    select_tasks, and with settings.SKIP_UNCHANGED those up to date are skipped.
+    Pipelines none of whose tasks are needed are not run at all.
+    Every pipeline is cleaned up once the run is over, see settings.CLEAN_LOCAL.
+    """
+    entries = [(pipeline, pipeline_task) for pipeline in pipelines for pipeline_task in pipeline.tasks]
+
+    if targets:
+        entries = [entries[position] for position in select_tasks([task for pipeline, task in entries], targets)]
+        logger.info(f'Running {[task.name for pipeline, task in entries]} to produce {targets}')
+
+    try:
+        run_task_graph(entries, max_workers)
+    finally:
+        for pipeline in pipelines:
+            pipeline.cleanup(base.CLEAN_LOCAL)
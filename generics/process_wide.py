@@ -0,0 +1,24 @@
+import threading
+
+
+class ProcessWide(object):
+    """
+    One object shared by every thread of the process, made by factory() the
+    first time it is asked for. Given a key, the object is made again whenever
+    the key changes, e.g. when settings.LOCAL_PATH points somewhere else.
+    """
+    def __init__(self, factory):
+        """
+        factory <callable>: makes the shared object
+        """
+        self.factory = factory
+        self.instance = None
+        self.key = None
+        self._lock = threading.Lock()
+
+    def get(self, key=None):
+        with self._lock:
+            if self.instance is None or key != self.key:
+                self.instance = self.factory()
+                self.key = key
+            return self.instance
@@ -0,0 +1,89 @@
+import os
+import json
+import uuid
+import logging
+import threading
+from time import time
+from collections import OrderedDict
+from settings import base
+
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+class RunManifest(object):
+    """
+    Record of a pipeline run: its status and, for every task that completed,
+    its run state: the parameters, code and inputs it ran on, the digests of
+    the artifacts it produced and its results. Rewritten after
+    every completed task, so a failed run leaves a checkpoint that the next
+    run can resume from, see settings.RESUME.
+    """
+    def __init__(self, path, pipeline_name):
+        """
+        path <string>: file the manifest is stored in
+        pipeline_name <string>: name of the pipeline being run
+        """
+        self.path = path
+        self.record = {
+            'pipeline': pipeline_name,
+            'run_id': str(uuid.uuid4()),
+            'started': time(),
+            'finished': None,
+            'status': 'running',
+            'tasks': OrderedDict()
+        }
+        self._lock = threading.Lock()
+
+    def load_previous(self):
+        """
+        Return the manifest the previous run left at path, None when there is none
+        """
+        try:
+            with open(self.path) as manifest_file:
+                return json.load(manifest_file, object_pairs_hook=OrderedDict)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Ignoring unreadable run manifest {self.path}: {e}')
+            return None
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f'{self.path}.{uuid.uuid4().hex}.part'
+
+        try:
+            with open(temp_path, 'w') as manifest_file:
+                json.dump(self.record, manifest_file, indent=2)
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def checkpoint(self, key, task):
+        """
+        Record a completed task with the parameters, code and inputs it ran on,
+        unless the artifacts it produced are not all on disk
+        """
+        if task.run_state is None:
+            return
+
+        self.carry_over(key, dict(task.run_state, completed=time()))
+
+    def carry_over(self, key, task_record):
+        with self._lock:
+            self.record['tasks'][key] = task_record
+            self._save()
+
+    def finish(self, status):
+        with self._lock:
+            self.record['status'] = status
+            self.record['finished'] = time()
+            self._save()
+
+
+def get_run_manifest(pipeline_name):
+    """
+    Return a new manifest for a run of the named pipeline, stored under settings.LOCAL_PATH
+    """
+    return RunManifest(os.path.join(base.LOCAL_PATH, base.RUN_MANIFEST_DIR, f'{pipeline_name}.json'), pipeline_name)
@@ -0,0 +1,122 @@
+import os
+import uuid
+import boto3
+import logging
+import botocore
+from settings import base
+from generics.process_wide import ProcessWide
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+class S3TransferManager(object):
+    """
+    Downloads artifacts from the remote S3 bucket into the local data folder.
+    A single client with a pooled connection is shared by every download, large
+    objects are fetched with concurrent ranged GETs, and every file is written
+    to a temporary name next to its destination and renamed into place once
+    complete, so a reader never sees a partial file.
+    """
+    def __init__(self, bucket, local_path=None, client=None, max_workers=16,
+                 multipart_threshold=64 * 1024 ** 2, multipart_chunksize=16 * 1024 ** 2):
+        """
+        bucket <string>: the remote bucket to read from
+        local_path <string>: the local folder downloaded keys land in, settings.LOCAL_PATH at the time of each download by default
+        client: optional pre-built S3 client, e.g. a local stand-in for tests
+        max_workers <int>: number of keys (and connections) downloaded at once
+        """
+        self.bucket = bucket
+        self.local_path = local_path
+        self.max_workers = max_workers
+        self.client = client if client else self._create_client()
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_workers
+        )
+
+    def _create_client(self):
+        # leave room for the ranged GETs of several keys in flight at once
+        config = botocore.config.Config(max_pool_connections=self.max_workers * 2)
+        return boto3.session.Session().client('s3', config=config)
+
+    def get_local_path(self):
+        # LOCAL_PATH changes between runs, e.g. for benchmarks and tests, and is read on every download
+        return self.local_path if self.local_path is not None else base.LOCAL_PATH
+
+    def _download(self, key):
+        destination = f'{self.get_local_path()}/{key}'
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        temp_destination = f'{destination}.{uuid.uuid4()}.part'
+
+        try:
+            self.client.download_file(self.bucket, key, temp_destination, Config=self.transfer_config)
+            os.replace(temp_destination, destination)
+        finally:
+            if os.path.exists(temp_destination):
+                os.remove(temp_destination)
+
+    def download(self, key):
+        """
+        Download a single key, raising the client error when it cannot be fetched
+        """
+        try:
+            self._download(key)
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] == "404":
+                logger.exception(f'File {key} does not exist in S3 under {self.bucket}')
+            else:
+                logger.exception(e)
+            raise e
+        except botocore.exceptions.BotoCoreError as e:
+            logger.exception(f'Could not download {key} from S3 under {self.bucket}')
+            raise e
+
+    def exists(self, key):
+        """
+        Return whether key exists in the bucket, without downloading it
+        """
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ['404', 'NoSuchKey']:
+                return False
+            raise e
+
+    def download_many(self, keys):
+        """
+        Download the given keys concurrently.
+        Returns a { key: exception } map of the downloads that failed, be it
+        an error response or a connection or credentials error of the client.
+        """
+        errors = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._download, key) for key in keys]
+
+            for key, future in zip(keys, futures):
+                try:
+                    future.result()
+                except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
+                    errors[key] = e
+
+        return errors
+
+
+_s3_transfer_manager = ProcessWide(lambda: S3TransferManager(
+    base.REMOTE_PATH,
+    max_workers=base.S3_MAX_CONCURRENCY,
+    multipart_threshold=base.S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=base.S3_MULTIPART_CHUNKSIZE
+))
+
+
+def get_s3_transfer_manager():
+    """
+    Return the transfer manager shared by every task
+    """
+    return _s3_transfer_manager.get()
@@ -0,0 +1,199 @@
+"""
+Scenario sweeps, the same pipelines run under several sets of config overrides
+"""
+import os
+import re
+import copy
+import json
+import shutil
+import logging
+import itertools
+from collections import OrderedDict
+from settings import base
+from generics import pipeline as p
+from generics.schema import artifact_schemas
+
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+def parse_overrides(overrides):
+    """
+    Return { config: { dotted key: value } } of { '<config>:<dotted key>': value }
+    """
+    config_keys = OrderedDict()
+    for override, value in overrides.items():
+        config, separator, key = override.partition(':')
+        if not separator or not key:
+            raise ValueError(f'Override {override} is not of the form <config>:<dotted key>')
+        config_keys.setdefault(config, OrderedDict())[key] = value
+    return config_keys
+
+
+def apply_overrides(config, keys):
+    """
+    Return a copy of a parsed config with { dotted key: value } set, raising a KeyError for keys it does not have
+    """
+    config = copy.deepcopy(config)
+    for key, value in keys.items():
+        section = config
+        path = key.split('.')
+        for name in path[:-1]:
+            section = section[name]
+        if path[-1] not in section:
+            raise KeyError(f'{key} is not a key of the config')
+        section[path[-1]] = value
+    return config
+
+
+def get_scenario_name(overrides):
+    name = '__'.join(f'{override.partition(":")[2]}={value}' for override, value in overrides.items())
+    return re.sub(r'[^\w.=-]+', '-', name) or 'base'
+
+
+def expand_grid(grid):
+    """
+    Return an OrderedDict { name: overrides } of every combination of the values in { override: [values] }
+    """
+    scenarios = OrderedDict()
+    for values in itertools.product(*grid.values()):
+        overrides = OrderedDict(zip(grid, values))
+        name = get_scenario_name(overrides)
+        if name in scenarios:
+            name = f'{name}__{len(scenarios)}'
+        scenarios[name] = overrides
+    return scenarios
+
+
+def find_divergent_tasks(tasks, config_keys):
+    """
+    Return the positions of the tasks, in their serial order, a scenario overriding
+    { config: { dotted key: value } } has to run itself: those reading an overridden
+    key and those reading an artifact a divergent task writes
+    """
+    divergent = []
+    changed_artifacts = set()
+
+    for position, task in enumerate(tasks):
+        if task.reads_config_keys(config_keys) or changed_artifacts & set(task.get_input_artifacts()):
+            divergent.append(position)
+            changed_artifacts.update(task.get_output_artifacts())
+
+    return divergent
+
+
+class Scenario(object):
+    """
+    A set of config overrides and the tasks of the sweep that diverge under them
+    """
+    def __init__(self, name, overrides):
+        """
+        name <string>: names the folder the scenario's configs and outputs go to
+        overrides <dict>: { '<config>:<dotted key>': value }
+        """
+        self.name = name
+        self.overrides = overrides
+        self.config_keys = parse_overrides(overrides)
+        self.root_dir = f'{base.SCENARIO_DIR}/{name}'
+        self.config_dir = f'{base.LOCAL_PATH}/{self.root_dir}/config'
+        self.pipelines = []
+        # pipelines of the base run, whose tasks the scenario shares
+        self.shared_pipelines = []
+        # { artifact of the base run: where the scenario's version of it is }
+        self.artifacts = OrderedDict()
+
+    def get_artifact_name(self, name):
+        return f'{self.root_dir}/{name}'
+
+    def write_configs(self):
+        """
+        Write every config, with the overrides applied, to the scenario's config folder
+        """
+        os.makedirs(self.config_dir, exist_ok=True)
+
+        for filename in sorted(os.listdir(base.CONFIG_PATH)):
+            if not filename.lower().endswith('.json'):
+                continue
+            if filename not in self.config_keys:
+                shutil.copyfile(f'{base.CONFIG_PATH}/{filename}', f'{self.config_dir}/{filename}')
+                continue
+
+            with open(f'{base.CONFIG_PATH}/{filename}') as config_file:
+                config = apply_overrides(json.load(config_file), self.config_keys[filename])
+            with open(f'{self.config_dir}/{filename}', 'w') as config_file:
+                json.dump(config, config_file, indent=4)
+
+        missing = [filename for filename in self.config_keys if not os.path.isfile(f'{self.config_dir}/{filename}')]
+        if missing:
+            raise ValueError(f'Scenario {self.name} overrides configs that do not exist: {missing}')
+
+    def diverge(self, pipelines):
+        """
+        Keep, in pipelines freshly built for this scenario, only the tasks that diverge from
+        the base run, reading the scenario's configs and its versions of the artifacts
+        """
+        tasks = [pipeline_task for pipeline in pipelines for pipeline_task in pipeline.tasks]
+        divergent = [tasks[position] for position in find_divergent_tasks(tasks, self.config_keys)]
+        names = OrderedDict((output, self.get_artifact_name(output)) for pipeline_task in divergent for output in pipeline_task.get_output_artifacts())
+        self.artifacts = OrderedDict((name, names.get(name, name)) for pipeline_task in tasks for name in pipeline_task.get_output_artifacts())
+
+        for name, scenario_name in names.items():
+            schema = artifact_schemas.lookup(name)
+            if schema:
+                artifact_schemas.register(os.path.splitext(scenario_name)[0], schema)
+            os.makedirs(os.path.dirname(f'{base.LOCAL_PATH}/{scenario_name}'), exist_ok=True)
+
+        for pipeline in pipelines:
+            pipeline.name = f'{pipeline.name}__{self.name}'
+            pipeline.intermediate_artifacts.update([names[name] for name in pipeline.intermediate_artifacts if name in names])
+            pipeline.tasks = [pipeline_task for pipeline_task in pipeline.tasks if pipeline_task in divergent]
+
+            for pipeline_task in pipeline.tasks:
+                pipeline_task.rename_artifacts(names)
+                pipeline_task.config_dir = self.config_dir
+
+        self.pipelines = [pipeline for pipeline in pipelines if pipeline.tasks]
+
+    def get_record(self):
+        failed = any(pipeline.failed_tasks for pipeline in self.pipelines + self.shared_pipelines)
+        return {
+            'scenario': self.name,
+            'overrides': self.overrides,
+            'pipelines': [pipeline.name for pipeline in self.pipelines],
+            'tasks': [pipeline_task.name for pipeline in self.pipelines for pipeline_task in pipeline.tasks],
+            'status': 'failed' if failed else 'complete',
+            'artifacts': self.artifacts
+        }
+
+    def write_record(self):
+        path = f'{base.LOCAL_PATH}/{self.root_dir}/scenario.json'
+        with open(path, 'w') as record_file:
+            json.dump(self.get_record(), record_file, indent=2)
+        return path
+
+
+def run_sweep(build_pipelines, scenarios, max_workers=None):
+    """
+    Run the base pipelines and every scenario in { name: overrides } as one task graph, returning the Scenario objects
+    """
+    base_pipelines = build_pipelines()
+    entries = [(pipeline, pipeline_task) for pipeline in base_pipelines for pipeline_task in pipeline.tasks]
+    sweep = []
+
+    for name, overrides in scenarios.items():
+        scenario = Scenario(name, overrides)
+        scenario.shared_pipelines = base_pipelines
+        scenario.write_configs()
+        scenario.diverge(build_pipelines())
+        logger.info(f'Scenario {name} runs {[pipeline_task.name for pipeline in scenario.pipelines for pipeline_task in pipeline.tasks]} '
+                    f'of its own, it shares the other tasks of the base run')
+        entries += [(pipeline, pipeline_task) for pipeline in scenario.pipelines for pipeline_task in pipeline.tasks]
+        sweep.append(scenario)
+
+    try:
+        p.run_task_graph(entries, max_workers)
+    finally:
+        for scenario in sweep:
+            scenario.write_record()
+
+    return sweep
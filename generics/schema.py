@@ -0,0 +1,128 @@
+import os
+import fnmatch
+import hashlib
+import logging
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+from generics import timeseries
+
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+class ArtifactSchema(object):
+    """
+    The declared layout of a tabular artifact: column dtypes, categorical
+    columns, datetime columns and the columns stored first.
+    Applied by the ArtifactDataManager when an intermediate artifact is
+    written, so the file holds exactly the declared columns and no anonymous
+    index, and when any artifact is read, so tasks receive typed frames.
+    """
+    def __init__(self, dtypes=None, categories=None, datetimes=None, leading=None):
+        """
+        dtypes <dict>: { column: dtype } for columns whose type must not be inferred
+        categories <list>: columns stored as categoricals, e.g. repeated keys
+        datetimes <dict|list>: datetime columns, as { column: format } or a list of columns
+        leading <list>: columns intermediates are stored with first, e.g. the levels a frame was indexed on
+        """
+        self.dtypes = dtypes or {}
+        self.categories = categories or []
+        self.datetimes = datetimes if isinstance(datetimes, dict) else {column: None for column in datetimes or []}
+        self.leading = leading or []
+
+    def read_options(self):
+        """
+        Keyword arguments handed to pandas.read_csv, so declared columns are parsed typed in a single pass
+        """
+        dtypes = dict(self.dtypes)
+        dtypes.update({column: 'category' for column in self.categories})
+        return {'dtype': dtypes} if dtypes else {}
+
+    def get_fingerprint(self):
+        """
+        Return a sha1 of the declared layout, it changes whenever the declaration does
+        """
+        declaration = (
+            sorted((column, str(dtype)) for column, dtype in self.dtypes.items()),
+            self.categories,
+            sorted(self.datetimes.items(), key=lambda item: item[0]),
+            self.leading
+        )
+        return hashlib.sha1(repr(declaration).encode()).hexdigest()
+
+    def _drop_anonymous_index(self, df):
+        # files written before the schema was declared carry their index as 'Unnamed: 0'
+        unnamed = [column for column in df.columns if str(column).startswith('Unnamed: ')]
+        return df.drop(unnamed, axis=1) if unnamed else df
+
+    def _coerce(self, df):
+        for column, dtype in self.dtypes.items():
+            if column in df.columns and df[column].dtype != dtype:
+                df[column] = df[column].astype(dtype)
+
+        for column in self.categories:
+            if column in df.columns and not isinstance(df[column].dtype, pd.api.types.CategoricalDtype):
+                df[column] = df[column].astype('category')
+
+        for column, datetime_format in self.datetimes.items():
+            if column in df.columns and not is_datetime64_any_dtype(df[column]):
+                df[column] = timeseries.parse_timestamps(df[column], format=datetime_format)
+
+        return df
+
+    def on_read(self, df):
+        """
+        Return df with the declared types
+        """
+        return self._coerce(self._drop_anonymous_index(df))
+
+    def flatten(self, df):
+        """
+        Return df with its named index levels as columns and without an anonymous index,
+        the frame a csv written with its index reads back as
+        """
+        named_levels = [name for name in df.index.names if name is not None]
+        df = df.reset_index(level=named_levels) if named_levels else df
+        return self._drop_anonymous_index(df.reset_index(drop=True))
+
+    def on_write(self, df):
+        """
+        Return df in its declared storage layout: flattened, the leading columns first and typed
+        """
+        df = self.flatten(df)
+
+        missing = [column for column in self.leading if column not in df.columns]
+        if missing:
+            raise ValueError(f'DataFrame is missing the leading columns {missing} its artifact schema declares')
+
+        df = df[self.leading + [column for column in df.columns if column not in self.leading]]
+        return self._coerce(df.copy())
+
+
+class SchemaRegistry(object):
+    """
+    Maps artifact names to their ArtifactSchema.
+    Artifacts are matched on their name without the extension, so a schema
+    holds whatever format the artifact is stored in, and patterns may use
+    shell wildcards, e.g. '*/noaa/*'.
+    """
+    def __init__(self):
+        self._schemas = []
+
+    def register(self, pattern, schema):
+        self._schemas = [(registered, entry) for registered, entry in self._schemas if registered != pattern]
+        self._schemas.append((pattern, schema))
+
+    def lookup(self, filename):
+        """
+        Return the schema registered for filename, None when it has none
+        """
+        name = os.path.splitext(filename)[0]
+        for pattern, schema in self._schemas:
+            if fnmatch.fnmatchcase(name, pattern):
+                return schema
+        return None
+
+
+# the registry used by every ArtifactDataManager, pipelines register their artifacts in it
+artifact_schemas = SchemaRegistry()
@@ -1,13 +1,46 @@
 import os
+import inspect
+import hashlib
 import logging
 from time import time
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from settings import base
 from generics import artifact
+from generics.lazy_data import LazyDataMap
+from generics.memory import holds_data
+from generics.process_wide import ProcessWide
+from generics.accounting import TaskAccount, accounted_phase, cpu_timed
+from generics.task_state import get_task_state_store
+from generics.artifact_bus import get_artifact_bus
+from generics.file_type_enum import SupportedFileReadType
 
 
 logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
 
 
+def _hash_generics_sources():
+    generics_dir = os.path.dirname(os.path.abspath(__file__))
+    sha1 = hashlib.sha1()
+    for filename in sorted(os.listdir(generics_dir)):
+        if filename.endswith('.py'):
+            with open(os.path.join(generics_dir, filename), 'rb') as source:
+                sha1.update(filename.encode())
+                sha1.update(source.read())
+    return sha1.hexdigest()
+
+
+_generics_fingerprint = ProcessWide(_hash_generics_sources)
+
+
+def get_generics_fingerprint():
+    """
+    Return a sha1 of the sources of the generics package, computed once per process
+    """
+    return _generics_fingerprint.get()
+
+
 class Task(artifact.ArtifactDataManager):
     """
     Generic task manager that implements a function and executes it on
@@ -16,6 +49,15 @@ class Task(artifact.ArtifactDataManager):
     Inputs may be data files
     Outputs may also be data files
     """
+    # bookkeeping attributes that are not parameters of the task, see get_parameters
+    untracked_attributes = frozenset(['name', 'run_result', 'task_start_time', 'task_end_time', 'did_task_pass_validation', 'skipped'])
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # every task validates its own way, the time spent doing so is accounted for all of them
+        if 'validate' in cls.__dict__:
+            cls.validate = accounted_phase('validate')(cls.__dict__['validate'])
+
     def __init__(self, name, *args, **kwargs):
         self.name = name
         self.run_result = None
@@ -24,6 +66,16 @@ class Task(artifact.ArtifactDataManager):
         self.task_start_time = None
         self.did_task_pass_validation = True
         self.task_results = None
+        self.lazy_data_maps = []
+        # every entry handed to load_data, including inputs only known once the task runs
+        self.loaded_entries = []
+        self.skipped = False
+        # what the last run depended on and produced, see get_run_state
+        self.run_state = None
+        # resources used by the last run, see generics.accounting
+        self.account = None
+        # { config: [top level keys] } for configs the task only reads some sections of, e.g. 'residential'
+        self.config_sections = {}
 
     def _get_time(self):
         return time()
@@ -35,19 +87,332 @@ class Task(artifact.ArtifactDataManager):
             logger.warning('Could not deduce task run time, returning zero')
             return 0
 
+    def get_input_entries(self):
+        """
+        Return the { 'name', 'read_type' } entries of every input this task declares,
+        from its data file lists and input_artifact_* attributes
+        """
+        entries = OrderedDict()
+
+        for attribute in ['pre_data_files', 'my_data_files', 'data_files']:
+            for entry in getattr(self, attribute, None) or []:
+                entries.setdefault(entry['name'], entry)
+
+        for attribute, value in sorted(vars(self).items()):
+            if attribute.startswith('input_artifact_') and isinstance(value, str) and value not in entries:
+                read_type = SupportedFileReadType.CONFIG if value.lower().endswith('.json') else SupportedFileReadType.DATA
+                entries[value] = { 'name': value, 'read_type': read_type }
+
+        return list(entries.values())
+
+    def get_input_artifacts(self):
+        """
+        Return the data artifacts this task reads
+        """
+        return [entry['name'] for entry in self.get_input_entries() if entry['read_type'] is SupportedFileReadType.DATA]
+
+    def get_output_artifacts(self):
+        """
+        Return the artifacts this task writes, from its output_artifact_* attributes
+        """
+        return [value for attribute, value in sorted(vars(self).items()) if attribute.startswith('output_artifact_') and isinstance(value, str)]
+
+    def reads_config_keys(self, config_keys):
+        """
+        True when the task reads any of { config: [dotted keys] }, telling sections apart
+        for the configs listed in config_sections
+        """
+        for entry in self.get_input_entries():
+            name = entry['name']
+            if entry['read_type'] is not SupportedFileReadType.CONFIG or name not in config_keys:
+                continue
+            sections = self.config_sections.get(name)
+            if sections is None or any(key.split('.')[0] in sections for key in config_keys[name]):
+                return True
+        return False
+
+    def rename_artifacts(self, names):
+        """
+        Read and write the artifacts in { name: new name } under their new names
+        """
+        for attribute, value in list(vars(self).items()):
+            if attribute.startswith(('input_artifact_', 'output_artifact_')) and isinstance(value, str) and value in names:
+                setattr(self, attribute, names[value])
+
+        for attribute in ['pre_data_files', 'my_data_files', 'data_files']:
+            entries = getattr(self, attribute, None)
+            if entries:
+                setattr(self, attribute, [dict(entry, name=names.get(entry['name'], entry['name'])) for entry in entries])
+
+    def get_parameters(self):
+        """
+        Return the scalar attributes a task is configured with, e.g. theat and tcool
+        """
+        return {
+            attribute: value for attribute, value in sorted(vars(self).items())
+            if isinstance(value, (bool, int, float, str)) and attribute not in self.untracked_attributes
+            and not attribute.startswith(('input_artifact_', 'output_artifact_'))
+        }
+
+    def _get_state_key(self):
+        # task names repeat across pipelines, the artifacts they write do not
+        outputs = '|'.join(sorted(self.get_output_artifacts()))
+        return f'{self.name}__{hashlib.sha1(outputs.encode()).hexdigest()[:12]}'
+
+    def _get_code_fingerprint(self):
+        """
+        Return a sha1 of the code that decides what this task writes: the
+        modules of its class and the classes it derives from, the generics
+        package they all run on and the schemas its artifacts are read and
+        written with, None when the source of the task cannot be read
+        """
+        sha1 = hashlib.sha1(get_generics_fingerprint().encode())
+        try:
+            source_files = OrderedDict.fromkeys(inspect.getsourcefile(cls) for cls in type(self).__mro__ if cls is not object)
+            for source_file in source_files:
+                with open(source_file, 'rb') as source:
+                    sha1.update(source.read())
+        except (OSError, TypeError):
+            return None
+
+        for name in sorted(set(self.get_input_artifacts()) | set(self.get_output_artifacts())):
+            schema = artifact.artifact_schemas.lookup(name)
+            sha1.update(f'{name}:{schema.get_fingerprint() if schema else None}'.encode())
+        return sha1.hexdigest()
+
+    def _get_data_fingerprint(self, name):
+        """
+        Return the fingerprint of a data artifact: that of its frame, see generics.fingerprint,
+        when it was only handed over in memory, the sha1 of its file otherwise, None when it is neither
+        """
+        artifact_bus = get_artifact_bus()
+        if artifact_bus:
+            if artifact_bus.memory_only(name):
+                return artifact_bus.fingerprint(name)
+            artifact_bus.wait_for(name)
+        return self.get_file_hash(name) if self.does_file_exist(name) else None
+
+    def _get_input_fingerprints(self, entries):
+        """
+        Return { name: fingerprint } for the given input entries, None when one of them is not available locally
+        """
+        fingerprints = {}
+
+        for entry in entries:
+            name = entry['name']
+            if entry['read_type'] is SupportedFileReadType.CONFIG:
+                try:
+                    with open(self._get_config_path(name), 'rb') as config_file:
+                        fingerprints[name] = hashlib.sha1(config_file.read()).hexdigest()
+                except OSError:
+                    return None
+            else:
+                fingerprints[name] = self._get_data_fingerprint(name)
+                if fingerprints[name] is None:
+                    return None
+
+        return fingerprints
+
+    def get_output_fingerprints(self):
+        """
+        Return { name: fingerprint } of the artifacts this task writes, None unless all of them
+        are on disk or, for those only handed over in memory, on the artifact bus
+        """
+        outputs = self.get_output_artifacts()
+        if not outputs:
+            return None
+
+        fingerprints = {output: self._get_data_fingerprint(output) for output in outputs}
+        return None if None in fingerprints.values() else fingerprints
+
+    def is_up_to_date(self, parameters):
+        """
+        True when the last successful run of this task had the same parameters, code and
+        inputs and the outputs it wrote are still in place, see settings.SKIP_UNCHANGED
+        """
+        if not base.SKIP_UNCHANGED or base.FORCE_RUN or self.name in base.FORCE_TASKS:
+            return False
+
+        record = get_task_state_store().load(self._get_state_key())
+        if not self.matches_run_state(record, parameters):
+            return False
+
+        self.run_state = record
+        self.task_results = record['task_results']
+        return True
+
+    def matches_run_state(self, record, parameters):
+        """
+        True when record, a run state of this task, see get_run_state, was left by a run
+        with the same parameters, code and inputs whose outputs are still in place
+        """
+        if not record or record.get('parameters') != parameters or record.get('code') != self._get_code_fingerprint():
+            return False
+
+        # inputs the last run discovered while running count as well as the declared ones
+        entries = OrderedDict((entry['name'], entry) for entry in self.get_input_entries())
+        for name, read_type in record.get('input_read_types', {}).items():
+            entries.setdefault(name, { 'name': name, 'read_type': SupportedFileReadType[read_type] })
+
+        if self._get_input_fingerprints(entries.values()) != record.get('inputs'):
+            return False
+
+        return self.get_output_fingerprints() == record.get('outputs')
+
+    def get_run_state(self, parameters):
+        """
+        Return what a run with parameters depended on and produced, None when its inputs
+        or outputs are not all on disk, so there is no telling when it is out of date
+        """
+        outputs = self.get_output_fingerprints()
+        entries = OrderedDict((entry['name'], entry) for entry in self.get_input_entries() + self.loaded_entries)
+        inputs = self._get_input_fingerprints(entries.values())
+
+        if outputs is None or inputs is None:
+            return None
+
+        return {
+            'task': self.name,
+            'parameters': parameters,
+            'code': self._get_code_fingerprint(),
+            'inputs': inputs,
+            'input_read_types': {name: entry['read_type'].name for name, entry in entries.items()},
+            'outputs': outputs,
+            'task_results': self.task_results
+        }
+
+    def _store_run_state(self, parameters):
+        # kept for the run manifest as well, see Pipeline._resume_task
+        self.run_state = self.get_run_state(parameters)
+
+        if base.SKIP_UNCHANGED and self.run_state is not None:
+            get_task_state_store().store(self._get_state_key(), self.run_state)
+
+    def invalidate(self):
+        """
+        Forget the last successful run of this task, so it runs next time
+        """
+        get_task_state_store().remove(self._get_state_key())
+
+    @accounted_phase('load')
+    def load_data(self, data_files):
+        self.loaded_entries += data_files
+        data_map = super().load_data(data_files)
+        if isinstance(data_map, LazyDataMap):
+            self.lazy_data_maps.append(data_map)
+        return data_map
+
+    def get_input_usage(self):
+        """
+        Return the inputs this task read and the ones it declared but never read,
+        only known for inputs loaded while settings.LAZY_LOAD is enabled
+        """
+        return {
+            'touched': [name for data_map in self.lazy_data_maps for name in data_map.touched()],
+            'untouched': [name for data_map in self.lazy_data_maps for name in data_map.untouched()]
+        }
+
+    def release_data(self):
+        """
+        Let go of the frames and data maps the task kept in its attributes while running,
+        e.g. self.df or self.data_map, returning the names of the attributes released.
+        Its results, parameters and declared inputs and outputs are kept.
+        """
+        released = [attribute for attribute, value in vars(self).items() if attribute != 'lazy_data_maps' and holds_data(value)]
+        for attribute in released:
+            setattr(self, attribute, None)
+        self.lazy_data_maps = []
+        return released
+
+    def _map(self, function, calls):
+        if base.MAP_WORKERS <= 1 or len(calls) <= 1:
+            return [function(*arguments) for arguments in calls]
+
+        executor_class = ProcessPoolExecutor if base.MAP_EXECUTOR == 'process' else ThreadPoolExecutor
+
+        phase = self.account.get_phase() if self.account else 'compute'
+
+        with executor_class(max_workers=min(base.MAP_WORKERS, len(calls))) as executor:
+            futures = [executor.submit(cpu_timed, function, *arguments) for arguments in calls]
+            results = []
+            try:
+                for future in futures:
+                    result, cpu = future.result()
+                    if self.account:
+                        self.account.record_worker_cpu(phase, cpu, in_process=executor_class is ProcessPoolExecutor)
+                    results.append(result)
+                return results
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def map_items(self, function, items, *args):
+        """
+        Return [function(item, *args) for item in items], computed on settings.MAP_WORKERS
+        threads or processes, see settings.MAP_EXECUTOR. The results and the first error
+        raised follow the order of items, exactly like the loop would.
+        With processes function and its arguments are pickled, so function should be a
+        staticmethod or module level function handed only the data it needs.
+        """
+        return self._map(function, [(item,) + args for item in items])
+
+    def map_groups(self, df, by, function, *args, group_data=None):
+        """
+        Partition df on the column(s) by and return [function(key, group, *args)] in the
+        order nested loops over the unique values of each column would visit the groups,
+        mapped like map_items. group_data(key), when given, is called in the task itself
+        and its result handed to function after the group, e.g. the weather of a zipcode,
+        so only the data a group needs travels to a worker process.
+        """
+        groups = list(df.groupby(by, sort=False))
+
+        if not isinstance(by, str) and len(by) > 1:
+            # groupby orders groups on their first row, nested loops on the first row of each outer key
+            first_seen = {}
+            for position, (key, group) in enumerate(groups):
+                for level in range(1, len(key) + 1):
+                    first_seen.setdefault(key[:level], position)
+            groups.sort(key=lambda item: [first_seen[item[0][:level]] for level in range(1, len(item[0]) + 1)])
+
+        if group_data is not None:
+            return self._map(function, [(key, group, group_data(key)) + args for key, group in groups])
+        return self._map(function, [(key, group) + args for key, group in groups])
+
     def run(self):
         # set the start time for this run
         self.task_start_time = self._get_time()
 
         logger.info(f'running task {self.name}')
-        if self.task_function:
-            self.run_result = self.task_function()
-        else:
+        if not self.task_function:
             raise TypeError(f'{self.name} does not implement a function that this <Task> can execute')
 
+        # parameters are taken before running, tasks add attributes of their own as they run
+        parameters = self.get_parameters()
+        self.run_state = None
+        self.account = TaskAccount()
+        self.account.start()
+
+        try:
+            if self.is_up_to_date(parameters):
+                logger.info(f'Skipping task {self.name}, its inputs, parameters and outputs are unchanged since its last run')
+                self.skipped = True
+            else:
+                self.run_result = self.task_function()
+                if self.did_task_pass_validation:
+                    artifact_bus = get_artifact_bus()
+                    if artifact_bus:
+                        # the outputs are only on disk once the writes queued before this are done
+                        artifact_bus.write_behind(None, self._store_run_state, parameters)
+                    else:
+                        self._store_run_state(parameters)
+        finally:
+            self.account.stop()
+
         # set the end time for this run
         self.task_end_time = self._get_time()
 
+    @accounted_phase('save')
     def on_complete(self, data_map):
         """
         Given a dictionary of filenames and dataframes, we'll generate hashes for these entities
@@ -60,58 +425,73 @@ class Task(artifact.ArtifactDataManager):
                 'output_data_hash': df,
             }]
         """
-        results = []
-
-        for output_filename, data_frame in data_map.items():
-            new_filename = None
-            versioned_name = None
-            new_file_contents_hex_digest = None
-            existing_file_contents_hex_digest = None
-            
-            # get the hash of the pandas data frame 
-            # this will be used as the name for the temp file if needed
-            df_hex_digest = self.get_data_frame_hash(data_frame)
-            
-            logger.info(f'Existing df hash {df_hex_digest}')
-            
-            # determine if the file we want to write already exists and if so, compare hashes with the
-            # file we're about to write. We can't assume data hashes will match for the same data frame
-            # when it gets loaded from a file...
-            if self.does_file_exist(output_filename):
-                logger.info(f'Checking hash of file that already exists {output_filename}')
-                existing_file_contents_hex_digest = self.check_file_contents_hash(output_filename)
-                
-                # ...therefore we'll temporarily write a file based on the data hash
-                # and determine its file content's hash
-                new_filename = f'__{df_hex_digest}__.csv'
-                self.save_data(new_filename, data_frame)
-                new_file_contents_hex_digest = self.check_file_contents_hash(new_filename)
-
-                if new_file_contents_hex_digest == existing_file_contents_hex_digest:
-                    # since they are the same, we don't do anything, just cleanup
-                    logger.info('The hashes matched, deleting file...')
-                    self.delete_file(new_filename)
-                    new_filename = None
-                    new_file_contents_hex_digest = None
-                else:
-                    logger.info('The hashes did not match. Preserving the old file and using the new one as the latest.')
-                    # the old existing file gets prepended with a timestamp
-                    versioned_name = '{0}__{2}{1}'.format(*os.path.splitext(output_filename) + (time(),))
-                    os.rename(f'{base.LOCAL_PATH}/{output_filename}', f'{base.LOCAL_PATH}/{versioned_name}')
-                    # the new file gets renamed to whatever the output needs to be
-                    os.rename(f'{base.LOCAL_PATH}/{new_filename}', f'{base.LOCAL_PATH}/{output_filename}')
-            else:
-                self.save_data(output_filename, data_frame)
+        artifact_bus = get_artifact_bus()
+
+        if not artifact_bus:
+            self.task_results = [self._complete_output(output_filename, data_frame) for output_filename, data_frame in data_map.items()]
+            return
+
+        # results are filled in as the writer thread gets to each output
+        self.task_results = [None] * len(data_map)
+
+        for position, (output_filename, data_frame) in enumerate(data_map.items()):
+            schema = artifact.artifact_schemas.lookup(output_filename)
+            published = bool(schema) and isinstance(data_frame, pd.DataFrame)
+
+            if published:
+                # the frame a task reading the file back would get
+                stored = schema.on_write(data_frame) if output_filename in self.intermediate_artifacts else schema.flatten(data_frame)
+                artifact_bus.publish(output_filename, schema.on_read(stored))
+
+            if base.SAVE_DATA or not published or output_filename not in self.intermediate_artifacts:
+                artifact_bus.write_behind(output_filename, self._write_behind_output, position, output_filename, data_frame)
 
-            results.append({
-                'output_df_hash': df_hex_digest,
-                'output_filename': output_filename,
-                'versioned_filename': versioned_name,
-                'new_file_hash': new_file_contents_hex_digest,
-                'old_file_hash': existing_file_contents_hex_digest
-            })
+    def _write_behind_output(self, position, output_filename, data_frame):
+        self.task_results[position] = self._complete_output(output_filename, data_frame)
+
+    def _complete_output(self, output_filename, data_frame):
+        """
+        Write a single output, keeping the existing file when its contents are unchanged
+        and versioning it otherwise, and return the result entry for it
+        """
+        versioned_name = None
+        new_file_contents_hex_digest = None
+        existing_file_contents_hex_digest = None
+        storage_filename = self._get_storage_name(output_filename)
+        
+        # serialize the data frame exactly once, hashing the bytes as they are written
+        new_filename, file_hex_digest = self._write_temp_file(output_filename, data_frame)
+        
+        logger.info(f'Written file sha1 {file_hex_digest}')
+        
+        # determine if the file we want to write already exists and if so, compare the hash of
+        # what we just wrote with the digest recorded for the existing file
+        if self.does_file_exist(output_filename):
+            logger.info(f'Checking hash of file that already exists {output_filename}')
+            existing_file_contents_hex_digest = self.get_file_hash(output_filename)
+
+            if file_hex_digest == existing_file_contents_hex_digest:
+                # since they are the same, we don't do anything, just cleanup
+                logger.info('The hashes matched, deleting file...')
+                os.remove(f'{base.LOCAL_PATH}/{new_filename}')
+            else:
+                logger.info('The hashes did not match. Preserving the old file and using the new one as the latest.')
+                new_file_contents_hex_digest = file_hex_digest
+                # the old existing file gets prepended with a timestamp
+                versioned_name = '{0}__{2}{1}'.format(*os.path.splitext(storage_filename) + (time(),))
+                os.rename(f'{base.LOCAL_PATH}/{storage_filename}', f'{base.LOCAL_PATH}/{versioned_name}')
+                # the new file gets renamed to whatever the output needs to be
+                self._commit_temp_file(new_filename, storage_filename, file_hex_digest)
+        else:
+            self._commit_temp_file(new_filename, storage_filename, file_hex_digest)
 
-        self.task_results = results
+        return {
+            'output_file_sha1': file_hex_digest,
+            'output_filename': output_filename,
+            'versioned_filename': versioned_name,
+            'new_file_hash': new_file_contents_hex_digest,
+            'old_file_hash': existing_file_contents_hex_digest
+        }
 
     def on_failure(self):
         logger.info('Cleanup at the task level')
@@ -0,0 +1,85 @@
+import os
+import json
+import uuid
+import logging
+from settings import base
+
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+# bump whenever the layout of a task state record changes, so old records stop matching
+TASK_STATE_VERSION = 1
+
+
+class TaskStateStore(object):
+    """
+    On-disk record of every task's last successful run: the digests of the
+    inputs it read, its parameters, its code and the digests of the outputs
+    it left behind. A task whose record still matches is skipped, see
+    settings.SKIP_UNCHANGED.
+    """
+    def __init__(self, state_dir):
+        """
+        state_dir <string>: folder the records are stored in, one json file per task
+        """
+        self.state_dir = state_dir
+
+    def _record_path(self, key):
+        return os.path.join(self.state_dir, f'{key}.json')
+
+    def load(self, key):
+        """
+        Return the record stored under key, None when there is none
+        """
+        try:
+            with open(self._record_path(key)) as record_file:
+                record = json.load(record_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Ignoring unreadable task state record {key}: {e}')
+            return None
+
+        if record.get('version') != TASK_STATE_VERSION:
+            return None
+        return record
+
+    def store(self, key, record):
+        os.makedirs(self.state_dir, exist_ok=True)
+        record = dict(record, version=TASK_STATE_VERSION)
+        temp_path = f'{self._record_path(key)}.{uuid.uuid4().hex}.part'
+
+        try:
+            with open(temp_path, 'w') as record_file:
+                json.dump(record, record_file, indent=2, sort_keys=True)
+            os.replace(temp_path, self._record_path(key))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def remove(self, key):
+        try:
+            os.remove(self._record_path(key))
+        except FileNotFoundError:
+            pass
+
+    def purge(self):
+        """
+        Remove every record, so every task runs again
+        """
+        try:
+            names = os.listdir(self.state_dir)
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            if name.endswith('.json'):
+                self.remove(os.path.splitext(name)[0])
+
+
+def get_task_state_store():
+    """
+    Return the task state store for the current settings.LOCAL_PATH
+    """
+    return TaskStateStore(os.path.join(base.LOCAL_PATH, base.TASK_STATE_DIR))
@@ -0,0 +1,127 @@
+"""
+Timestamp parsing and hourly resampling of site-indexed metering
+"""
+import threading
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+from settings import base
+from generics.process_wide import ProcessWide
+
+
+HOUR_NS = 3600 * 10 ** 9
+
+
+class TimestampParser(object):
+    """
+    Parses timestamp columns to datetimes, each distinct string once.
+    Metering repeats every timestamp for each site, so a column is factorized
+    and only its unique strings go through pd.to_datetime, whose per-row
+    strptime dominates for formats like '%d%b%y:%H:%M:%S'. Parsed strings are
+    remembered per format, up to max_entries, so files covering the same
+    hours, the parts of the metering or the weather of every station, only
+    parse the strings no file before them had.
+    """
+    def __init__(self, max_entries):
+        """
+        max_entries <int>: parsed strings remembered for each format, the oldest are forgotten first
+        """
+        self.max_entries = max_entries
+        self._parsed = {}
+        self._lock = threading.Lock()
+
+    def parse(self, values, format=None):
+        """
+        Return values as datetimes, the Series pd.to_datetime(values, format=format) returns
+        """
+        values = values if isinstance(values, pd.Series) else pd.Series(values)
+        if is_datetime64_any_dtype(values):
+            return values
+
+        codes, uniques = pd.factorize(values)
+        with self._lock:
+            known = self._parsed.get(format)
+
+        parsed = pd.Series(pd.NaT, index=uniques, dtype='datetime64[ns]') if known is None else known.reindex(uniques)
+        missing = parsed.isnull().to_numpy()
+        if missing.any():
+            new = pd.to_datetime(uniques[missing], format=format)
+            if new.tz is not None:
+                return pd.to_datetime(values, format=format)
+            parsed[missing] = new.to_numpy()
+            self._remember(format, parsed[missing])
+
+        # codes of missing values are -1, they pick the NaT appended last
+        datetimes = np.append(parsed.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT'))[codes]
+        return pd.Series(datetimes, index=values.index, name=values.name)
+
+    def _remember(self, format, parsed):
+        with self._lock:
+            known = self._parsed.get(format)
+            if known is not None:
+                parsed = pd.concat([known.loc[~known.index.isin(parsed.index)], parsed])
+            self._parsed[format] = parsed.iloc[-self.max_entries:] if self.max_entries > 0 else parsed.iloc[:0]
+
+    def clear(self):
+        with self._lock:
+            self._parsed.clear()
+
+
+_timestamp_parser = ProcessWide(lambda: TimestampParser(base.TIMESTAMP_CACHE_ENTRIES))
+
+
+def get_timestamp_parser():
+    """
+    Return the timestamp parser shared by every task
+    """
+    return _timestamp_parser.get()
+
+
+def parse_timestamps(values, format=None):
+    """
+    Return values parsed as datetimes through the process-wide TimestampParser
+    """
+    return get_timestamp_parser().parse(values, format)
+
+
+def resample_hourly(df, key='siteid', on='time'):
+    """
+    Return the numeric columns of df summed by key and hour, the frame
+    df.groupby(key).resample('60T', on=on).sum() returns: indexed by key and
+    hour, sorted, every key spanning each hour from its first reading to its
+    last with hours without readings summing to 0. Timestamps are turned into
+    integer hour buckets once and every column is reduced with one bincount
+    over the key-hour slots, so the cost is linear in the rows, nothing is sorted.
+    Rows without a key or a time are left out, like pandas does.
+    """
+    columns = [column for column in df.columns if column not in [key, on] and pd.api.types.is_numeric_dtype(df[column])]
+    keys = np.asarray(df[key])
+    hours = pd.DatetimeIndex(df[on]).asi8 // HOUR_NS
+
+    valid = pd.notnull(keys) & pd.notnull(df[on]).to_numpy()
+    codes, uniques = pd.factorize(keys[valid], sort=True)
+    hours = hours[valid]
+
+    # every key gets a contiguous run of slots, one per hour from its first to its last
+    by_code = pd.Series(hours).groupby(codes)
+    first, last = by_code.min().to_numpy(), by_code.max().to_numpy()
+    lengths = last - first + 1
+    starts = np.cumsum(lengths) - lengths
+    slots = starts[codes] + hours - first[codes]
+    total = int(lengths.sum())
+
+    slot_codes = np.repeat(np.arange(len(uniques)), lengths)
+    slot_hours = np.arange(total) - starts[slot_codes] + first[slot_codes]
+    index = pd.MultiIndex.from_arrays([
+        np.asarray(uniques)[slot_codes],
+        pd.DatetimeIndex((slot_hours * HOUR_NS).astype('datetime64[ns]'))
+    ], names=[key, on])
+
+    sums = {}
+    for column in columns:
+        values = np.asarray(df[column], dtype=float)[valid]
+        values = np.bincount(slots, weights=np.where(np.isnan(values), 0, values), minlength=total)
+        dtype = df[column].dtype
+        sums[column] = values.astype(np.int64 if dtype.kind == 'b' else dtype)
+
+    return pd.DataFrame(sums, index=index, columns=columns)
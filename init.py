@@ -26,6 +26,13 @@ FILE_USAGE_EXPLANATAION = """
     python init.py -d          # run in debug - prints to console as well as to the lctk.log file
     python init.py -s <string> # specify a settings file other than the base - it is assumed that you
                                  are importing base into your custom settings file. It won't work otherwise
+    python init.py -u          # skip the tasks whose inputs, parameters, code and outputs are unchanged since their last run,
+                                 every task runs otherwise
+    python init.py -f          # with -u, still run every task, even those that are unchanged
+    python init.py --force-task <string> # with -u, run the named task even if it is unchanged, may be repeated
+    python init.py -r          # resume the last run from its first incomplete task
+    python init.py -t <string> # only run the tasks needed to produce the named artifact, e.g. rbsa/components.csv,
+                                 may be repeated
 """
 
 def init_error_reporting():
@@ -66,7 +73,7 @@ def parse_cmd_line_opts(argv):
     using_custom_settings = False
     global LOCAL_DEBUG
     try:
-        opts, args = getopt.getopt(argv, 'hds:')
+        opts, args = getopt.getopt(argv, 'hdfurs:t:', ['force', 'force-task=', 'skip-unchanged', 'resume', 'target='])
         for opt, arg in opts:
             if opt == '-h':
                 print(FILE_USAGE_EXPLANATAION)
@@ -81,6 +88,26 @@ def parse_cmd_line_opts(argv):
                 print(f'Running LCTK with the {arg} settings file')
                 LOCAL_DEBUG = custom_settings.DEBUG
 
+            elif opt in ('-u', '--skip-unchanged'):
+                print('Skipping the LCTK tasks that are unchanged since their last run')
+                importlib.import_module('settings.base').SKIP_UNCHANGED = True
+
+            elif opt in ('-f', '--force'):
+                print('Running every LCTK task, unchanged or not')
+                importlib.import_module('settings.base').FORCE_RUN = True
+
+            elif opt == '--force-task':
+                print(f'Running task {arg} unchanged or not')
+                importlib.import_module('settings.base').FORCE_TASKS.append(arg)
+
+            elif opt in ('-r', '--resume'):
+                print('Resuming the last LCTK run from its first incomplete task')
+                importlib.import_module('settings.base').RESUME = True
+
+            elif opt in ('-t', '--target'):
+                print(f'Running the LCTK tasks needed to produce {arg}')
+                importlib.import_module('settings.base').TARGET_ARTIFACTS.append(arg)
+
     except getopt.GetoptError:
         logger.exc('Unrecognized option terminating LCTK execution')
 
@@ -96,20 +123,34 @@ def execute_lctk(argv):
     logger.info('Starting the LCTK main program')
 
     ### PRIMARILY USING FOR DEBUG PURPOSES - WILL MOVE THIS TO AN ORCHESTRATION FILE
+    from generics import pipeline as p
     from pipelines.rbsa import rbsa
-    rbsa_pipeline = rbsa.RbsaPipeline()
-    rbsa_pipeline.execute()
-    rbsa_pipeline.generate_result_plots()
-
     from pipelines.ceus import ceus
-    ceus_pipeline = ceus.CeusPipeline()
-    ceus_pipeline.execute()
-    ceus_pipeline.generate_result_plots()
-
     from pipelines.mix import mix
-    mix_pipeline = mix.MixedFeederPipeline()
-    mix_pipeline.execute()
-    mix_pipeline.generate_result_plots()
+    from settings import base
+
+    lctk_pipelines = [rbsa.RbsaPipeline(), ceus.CeusPipeline(), mix.MixedFeederPipeline()]
+
+    # run every task as one graph, RBSA and CEUS tasks overlap with PIPELINE_WORKERS above 1, mix waits on both
+    try:
+        p.run_pipelines([lctk_pipeline.pipeline for lctk_pipeline in lctk_pipelines], targets=base.TARGET_ARTIFACTS)
+    except ValueError:
+        logger.exception('LCTK pipeline execution failed')
+
+    for lctk_pipeline in lctk_pipelines:
+        if lctk_pipeline.pipeline.run_manifest is None:
+            logger.info(f'{lctk_pipeline.name} has no task needed for {base.TARGET_ARTIFACTS}, it was not run')
+            continue
+
+        logger.info(f'Total Pipeline Run Time of {lctk_pipeline.name}: {lctk_pipeline.pipeline.total_pipeline_run_time}')
+        if lctk_pipeline.pipeline.failed_tasks:
+            logger.error(f'{lctk_pipeline.name} failed its pipeline execution. Cleaning up')
+            lctk_pipeline.on_failure()
+        elif base.TARGET_ARTIFACTS:
+            # the plots read artifacts a partial run may not have produced
+            logger.info(f'Skipping the result plots of {lctk_pipeline.name}, only {base.TARGET_ARTIFACTS} were produced')
+        else:
+            lctk_pipeline.generate_result_plots()
 
     from utilities import image_stitcher
     from settings import base
@@ -3,6 +3,7 @@ import logging
 from time import time
 from settings import base
 from generics import pipeline as p, task as t
+from generics.schema import ArtifactSchema, artifact_schemas
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -66,6 +67,12 @@ class CeusPipeline():
             self._create_results_storage(f'{base.LOCAL_PATH}/{self.artifact_root_dir}/{self.artifact_target_weather_dir}')
 
     def create_tasks(self):
+        self.pipeline.intermediate_artifacts.update([
+            f'{self.artifact_root_dir}/ceus_total_loads.csv',
+            f'{self.artifact_root_dir}/ceus_normal_loads.csv'
+        ])
+        self.register_schemas()
+
         undiscount_gas_task = undiscount_gas.UndiscountGas('undiscount_gas_task', self.artifact_root_dir)
         self.pipeline.add_task(undiscount_gas_task)
 
@@ -90,6 +97,24 @@ class CeusPipeline():
         apply_roa_task = apply_roa.ApplyRoa('apply_roa_task', self.artifact_root_dir)
         self.pipeline.add_task(apply_roa_task)
 
+    def register_schemas(self):
+        """
+        Declare the layout of the tabular artifacts this pipeline reads and writes
+        """
+        root = self.artifact_root_dir
+        fcz_loads = ArtifactSchema(datetimes=['time'])
+        city_loadshapes = ArtifactSchema(dtypes={'target': str, 'daytype': str})
+
+        artifact_schemas.register(f'{root}/{self.artifact_noaa_dir}/*', ArtifactSchema(datetimes=['DATE']))
+
+        for name in ['ceus_cleandata', 'ceus_total_loads', 'ceus_normal_loads']:
+            artifact_schemas.register(f'{root}/{name}', fcz_loads)
+
+        artifact_schemas.register(f'{root}/ceus_loadshapes', ArtifactSchema())
+
+        for name in ['ceus_total_loadshapes', 'ceus_enduse_loadshapes', 'ceus_normal_loadshapes', 'ceus_components']:
+            artifact_schemas.register(f'{root}/{name}', city_loadshapes)
+
     def _create_results_storage(self, storage_name=None):
         try:
             if storage_name:
@@ -215,12 +240,12 @@ class CeusPipeline():
                     fig.savefig(f'{directory}/{title}.png')
                     plt.close(fig)
 
-    def execute(self):
+    def execute(self, targets=None):
         """
-        Run all the tasks in this pipeline
+        Run all the tasks in this pipeline, or only those needed to produce the target artifacts
         """
         try:
-            self.pipeline.run()
+            self.pipeline.run(targets=targets)
             logger.info(f'Total Pipeline Run Time: {self.pipeline.total_pipeline_run_time}')
         except ValueError as ve:
             logger.exception(f'{self.name} failed its pipeline execution. Cleaning up and exiting')
@@ -42,28 +42,28 @@ class ApplyRoa(t.Task):
                 logger.exception(f'{self.name} failed its pipeline execution. ROA enduse names dont match residential')
                 self.on_failure()
 
-        locations = self.df.target.unique()
-        buildingtypes = self.df.buildingtype.unique()
-        daytypes = self.df.daytype.unique()
-
         components_df = pd.DataFrame(columns=['target','buildingtype','daytype','time'] + list(self.roa.index))
-
-        for location in locations:
-        	for buildingtype in buildingtypes:
-	            for daytype in daytypes:
-	                day_df = self.df.loc[(self.df.target == location) & (self.df.buildingtype == buildingtype) & (self.df.daytype == daytype)]
-	                day_matrix = day_df[ROA_columns].values.astype(float)
-	                component_matrix = np.matmul(day_matrix, roa_matrix.T)
-	                components_day_df = pd.DataFrame(component_matrix, columns=self.roa.index)
-	                components_day_df.insert(loc=0, column='target', value=location)
-	                components_day_df.insert(loc=1, column='buildingtype', value=buildingtype)
-	                components_day_df.insert(loc=2, column='daytype', value=daytype)
-	                components_day_df.insert(loc=3, column='time', value=range(24))
-	                components_df = components_df.append(components_day_df)
+        components_day_dfs = self.map_groups(self.df, ['target', 'buildingtype', 'daytype'], self.apply_roa_day, ROA_columns, roa_matrix, self.roa.index)
+        components_df = pd.concat([components_df] + components_day_dfs)
 
         self.validate(components_df)
         self.on_complete({self.output_artifact_components: components_df})           
 
+    @staticmethod
+    def apply_roa_day(key, day_df, ROA_columns, roa_matrix, components):
+        """
+        Split the enduse loadshapes of a single location, building type and daytype into load components
+        """
+        location, buildingtype, daytype = key
+        day_matrix = day_df[ROA_columns].values.astype(float)
+        component_matrix = np.matmul(day_matrix, roa_matrix.T)
+        components_day_df = pd.DataFrame(component_matrix, columns=components)
+        components_day_df.insert(loc=0, column='target', value=location)
+        components_day_df.insert(loc=1, column='buildingtype', value=buildingtype)
+        components_day_df.insert(loc=2, column='daytype', value=daytype)
+        components_day_df.insert(loc=3, column='time', value=range(24))
+        return components_day_df
+
     def validate(self, df):
         """
         Validation
@@ -36,27 +36,24 @@ class DiscountGas(t.Task):
         self.gas_fraction = data_map[self.input_artifact_gas_fraction]
         self.projection_locations = data_map[self.input_artifact_projection_locations]
 
+        enduse_loadshapes = pd.concat(self.map_groups(self.df, 'target', self.discount_city, self.projection_locations, self.gas_fraction))
 
-        if self.df.columns[0] == 'Unnamed: 0':
-            self.df = self.df.drop('Unnamed: 0', axis=1)
-
-        enduse_loadshapes = pd.DataFrame()
-        city_list = self.df.target.unique()
+        self.validate(enduse_loadshapes)
+        self.on_complete({self.output_artifact_enduse_loadshapes: enduse_loadshapes})
 
-        for city in city_list:
-            # force DF to be a copy so we don't have a warning on the assignment below
-            city_df = self.df.loc[self.df.target == city].copy()
-            zone = self.projection_locations['cities'][city]
-            electric_percentage = self.gas_fraction['electrification'][zone]   
+    @staticmethod
+    def discount_city(city, city_df, projection_locations, gas_fraction):
+        """
+        Take the gas fraction out of the enduse loadshapes of a single target city
+        """
+        zone = projection_locations['cities'][city]
+        electric_percentage = gas_fraction['electrification'][zone]
 
-            # add gas fraction
-            for enduse in electric_percentage.keys():
-                city_df[enduse] = city_df[enduse] * electric_percentage[enduse]
-                
-            enduse_loadshapes = enduse_loadshapes.append(city_df)
+        # add gas fraction
+        for enduse in electric_percentage.keys():
+            city_df[enduse] = city_df[enduse] * electric_percentage[enduse]
 
-        self.validate(enduse_loadshapes)
-        self.on_complete({self.output_artifact_enduse_loadshapes: enduse_loadshapes})
+        return city_df
 
     def validate(self, df):
         """
@@ -16,6 +16,7 @@ class FczCorrelation(t.Task):
         self.input_artifact_normal_loads = f'{pipeline_artifact_dir}/ceus_normal_loads.csv'
         self.input_artifact_projection_locations = 'PROJECTION_LOCATIONS.json'
         self.input_artifact_excluded_locations = 'EXCLUDED_LOCATIONS.json'
+        self.config_sections = { self.input_artifact_excluded_locations: ['Commercial'] }
 
         # these will be used to generate list of input files
         self.pre_data_files = [ 
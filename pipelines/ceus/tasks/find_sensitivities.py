@@ -19,6 +19,7 @@ class FindSensitivities(t.Task):
         self.pipeline_artifact_dir = pipeline_artifact_dir
         self.input_artifact_normal_loads = f'{pipeline_artifact_dir}/ceus_normal_loads.csv'
         self.input_artifact_sensitivity_temperatures = 'SENSITIVITY_TEMPERATURES.json'
+        self.config_sections = { self.input_artifact_sensitivity_temperatures: ['commercial'] }
         self.output_artifact_loadshapes = f'{pipeline_artifact_dir}/ceus_loadshapes.csv'
         self.my_data_files = [
             { 'name': self.input_artifact_normal_loads, 'read_type': SupportedFileReadType.DATA },
@@ -50,95 +51,96 @@ class FindSensitivities(t.Task):
 
         self.df = data_map[self.input_artifact_normal_loads]
         self.df = self.df.set_index(['time'])
-        self.df.index = pd.to_datetime(self.df.index)
-
-        if self.df.columns[0] == 'Unnamed: 0':
-            self.df = self.df.drop('Unnamed: 0', axis=1)
 
         loadshapes = pd.DataFrame(columns=self.df.columns)
 
-        climate_zones = self.df.fcz.unique()
-
         loadshapes = pd.DataFrame(columns=list(self.df.columns))
 
-        for fcz in climate_zones:
-            logger.info(f'calculating {fcz}')
-            weather_file = f'{self.pipeline_artifact_dir}/ceus_noaa/{str(fcz)}.csv'
-            weather = data_map[weather_file]
-            weather = weather.set_index(['DATE'])
-            weather.index = pd.to_datetime(weather.index)
+        self.enduse_cols = list(self.df.columns)
+        self.enduse_cols.remove('fcz')
+        self.enduse_cols.remove('buildingtype')
 
-            fcz_df = self.df.loc[self.df.fcz == fcz]
+        fcz_loadshapes = self.map_groups(self.df, 'fcz', self.find_fcz_loadshapes, self.enduse_cols, self.theat, self.tcool, self.name,
+                                         group_data=lambda fcz: data_map[f'{self.pipeline_artifact_dir}/ceus_noaa/{str(fcz)}.csv'])
+        loadshapes = pd.concat([loadshapes] + fcz_loadshapes)
 
-            self.enduse_cols = list(fcz_df.columns)
-            self.enduse_cols.remove('fcz')
-            self.enduse_cols.remove('buildingtype')
+        self.validate(loadshapes)
+        self.on_complete({self.output_artifact_loadshapes: loadshapes})
 
-            buildingtypes = fcz_df.buildingtype.unique()
+    @staticmethod
+    def find_fcz_loadshapes(fcz, fcz_df, weather, enduse_cols, theat, tcool, task_name):
+        """
+        Fit the baseload and weather sensitivities of every enduse of every building type of a single climate zone
+        """
+        logger.info(f'calculating {fcz}')
+        weather = weather.set_index(['DATE'])
+        loadshapes = []
+
+        buildingtypes = fcz_df.buildingtype.unique()
 
-            for buildingtype in buildingtypes:
+        for buildingtype in buildingtypes:
 
-                buildingtype_df = fcz_df.loc[fcz_df.buildingtype == buildingtype]
+            buildingtype_df = fcz_df.loc[fcz_df.buildingtype == buildingtype]
 
-                if weather.shape[0] > buildingtype_df.shape[0]:
-                    weather = weather.loc[weather.index.isin(buildingtype_df.index)]
+            if weather.shape[0] > buildingtype_df.shape[0]:
+                weather = weather.loc[weather.index.isin(buildingtype_df.index)]
 
-                A = self.get_A(weather)
+            A = FindSensitivities.get_A(weather, theat, tcool)
 
-                fcz_buildingtype_loadshapes = pd.DataFrame(columns=self.enduse_cols)
+            fcz_buildingtype_loadshapes = pd.DataFrame(columns=enduse_cols)
 
-                for enduse in self.enduse_cols:
-                    enduse_df = buildingtype_df[enduse]
+            for enduse in enduse_cols:
+                enduse_df = buildingtype_df[enduse]
 
-                    if enduse == 'Heating':
-                        A_heat = A[:, :-1]
-                        x = self.get_baseload(enduse_df, A_heat) / 3
-                        x = np.append(x, [0])
+                if enduse == 'Heating':
+                    A_heat = A[:, :-1]
+                    x = FindSensitivities.get_baseload(enduse_df, A_heat) / 3
+                    x = np.append(x, [0])
 
-                    elif enduse == 'Cooling':
-                        A_cool = np.delete(A, -2, 1)
-                        x = self.get_baseload(enduse_df, A_cool) / 3
-                        cooling_sensitivity = x[-1]
-                        x = np.append(x[:-1], [0])
-                        x = np.append(x, [cooling_sensitivity])
+                elif enduse == 'Cooling':
+                    A_cool = np.delete(A, -2, 1)
+                    x = FindSensitivities.get_baseload(enduse_df, A_cool) / 3
+                    cooling_sensitivity = x[-1]
+                    x = np.append(x[:-1], [0])
+                    x = np.append(x, [cooling_sensitivity])
 
+                else:
+                    A_base = A[:, :-2]
+                    if enduse == 'Ventilation':
+                         x = FindSensitivities.get_baseload(enduse_df, A_base) / 3
                     else:
-                        A_base = A[:, :-2]
-                        if enduse == 'Ventilation':
-                             x = self.get_baseload(enduse_df, A_base) / 3
-                        else:
-                             x = self.get_baseload(enduse_df, A_base)
-                        x = np.append(x, [0])
-                        x = np.append(x, [0])
+                         x = FindSensitivities.get_baseload(enduse_df, A_base)
+                    x = np.append(x, [0])
+                    x = np.append(x, [0])
 
-                    heat_sens = x[-2]
-                    cool_sens = x[-1]
+                heat_sens = x[-2]
+                cool_sens = x[-1]
 
-                    if heat_sens > 0:
-                        heat_sens = 0
+                if heat_sens > 0:
+                    heat_sens = 0
 
-                    if cool_sens < 0:
-                        cool_sens = 0
+                if cool_sens < 0:
+                    cool_sens = 0
 
-                    # adjust x by first value
-                    x = np.append(x[0], x[1:48] + x[0])
+                # adjust x by first value
+                x = np.append(x[0], x[1:48] + x[0])
 
-                    if x[:48].min() < 0:
-                        logger.warning(f'In CEUS task {self.name}, {fcz}_{buildingtype}_{enduse} baseload negative values have been cleaned.')
-                        x[:48] -= x[:48].min()
+                if x[:48].min() < 0:
+                    logger.warning(f'In CEUS task {task_name}, {fcz}_{buildingtype}_{enduse} baseload negative values have been cleaned.')
+                    x[:48] -= x[:48].min()
 
-                    x = np.append(x, [heat_sens, cool_sens])
+                x = np.append(x, [heat_sens, cool_sens])
 
-                    fcz_buildingtype_loadshapes[enduse] = x 
+                fcz_buildingtype_loadshapes[enduse] = x 
 
-                fcz_buildingtype_loadshapes.insert(loc=0, column='fcz', value=fcz)
-                fcz_buildingtype_loadshapes.insert(loc=1, column='buildingtype', value=buildingtype)
-                loadshapes = loadshapes.append(fcz_buildingtype_loadshapes)
+            fcz_buildingtype_loadshapes.insert(loc=0, column='fcz', value=fcz)
+            fcz_buildingtype_loadshapes.insert(loc=1, column='buildingtype', value=buildingtype)
+            loadshapes.append(fcz_buildingtype_loadshapes)
 
-        self.validate(loadshapes)
-        self.on_complete({self.output_artifact_loadshapes: loadshapes})
+        return pd.concat(loadshapes)
 
-    def get_baseload(self, df, A):
+    @staticmethod
+    def get_baseload(df, A):
         """ This function gets baseload for non weather sensitive enduses
         """
         At = A.transpose()
@@ -170,7 +172,8 @@ class FindSensitivities(t.Task):
 
         return A
 
-    def get_A(self, weather):
+    @staticmethod
+    def get_A(weather, theat, tcool):
         """
         Constructs A matrix for non weather sensitive loads
         """
@@ -188,10 +191,10 @@ class FindSensitivities(t.Task):
             else:
                 A[h][hh + 24] = 1.0
 
-            if weather['Temperature'][h] < self.theat:
-                A[h][(24 * 2)] = weather['Temperature'][h] - self.theat
-            elif weather['Temperature'][h] > self.tcool:
-                A[h][(24 * 2) + 1] = weather['Temperature'][h] - self.tcool
+            if weather['Temperature'][h] < theat:
+                A[h][(24 * 2)] = weather['Temperature'][h] - theat
+            elif weather['Temperature'][h] > tcool:
+                A[h][(24 * 2) + 1] = weather['Temperature'][h] - tcool
 
             ts += dt
         return A
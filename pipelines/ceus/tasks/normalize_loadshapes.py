@@ -27,47 +27,44 @@ class NormalizeLoadshapes(t.Task):
         
         self.df = data_map[self.input_artifact_enduse_loadshapes]
 
-        if self.df.columns[0] == 'Unnamed: 0':  
-             self.df = self.df.drop('Unnamed: 0', axis=1)
+        self.enduse_cols = list(self.df.columns)
+        self.enduse_cols.remove('time')
+        self.enduse_cols.remove('target')
+        self.enduse_cols.remove('buildingtype')
+        self.enduse_cols.remove('daytype')
 
-        city_list = self.df.target.unique()
-        normal_loadshapes = pd.DataFrame()
+        normal_loadshapes = pd.concat(self.map_groups(self.df, ['target', 'buildingtype'], self.normalize_buildingtype, self.enduse_cols))
 
-        for city in city_list:
-            city_df = self.df.loc[self.df.target == city]
-            city_df = city_df.set_index('time')
-
-            self.enduse_cols = list(city_df.columns)
-            self.enduse_cols.remove('target')
-            self.enduse_cols.remove('buildingtype')
-            self.enduse_cols.remove('daytype')
+        self.validate(normal_loadshapes)
+        self.on_complete({self.output_artifact_normal_loadshapes: normal_loadshapes})
 
-            buildingtypes = city_df.buildingtype.unique()
+    @staticmethod
+    def normalize_buildingtype(key, buildingtype_df, enduse_cols):
+        """
+        Normalize the enduse loadshapes of a single target city and building type by their summer peak total
+        """
+        buildingtype_df = buildingtype_df.set_index('time')
 
-            for buildingtype in buildingtypes:
-                buildingtype_df = city_df.loc[city_df.buildingtype == buildingtype]
-                min_val = buildingtype_df[self.enduse_cols].min().min()
-                buildingtype_df[self.enduse_cols] = buildingtype_df[self.enduse_cols] - min_val
+        min_val = buildingtype_df[enduse_cols].min().min()
+        buildingtype_df[enduse_cols] = buildingtype_df[enduse_cols] - min_val
 
-                # get enduse columns
-                normalization_val = self.get_normalization_val(buildingtype_df, summer=True)
+        # get enduse columns
+        normalization_val = NormalizeLoadshapes.get_normalization_val(buildingtype_df, enduse_cols, summer=True)
 
-                # Normalize by peak total
-                buildingtype_df[self.enduse_cols] = buildingtype_df[self.enduse_cols] / normalization_val
-                
-                normal_loadshapes = normal_loadshapes.append(buildingtype_df)
+        # Normalize by peak total
+        buildingtype_df[enduse_cols] = buildingtype_df[enduse_cols] / normalization_val
 
-        self.validate(normal_loadshapes)
-        self.on_complete({self.output_artifact_normal_loadshapes: normal_loadshapes})
+        return buildingtype_df
 
-    def get_normalization_val(self, buildingtype_df, summer):
+    @staticmethod
+    def get_normalization_val(buildingtype_df, enduse_cols, summer):
         """
         returns peak total, if summer is True returns peak summer 
         """        
         if summer:
             buildingtype_df = buildingtype_df.loc[buildingtype_df['daytype'] == 'summer_peak']
 
-        totals = buildingtype_df[self.enduse_cols].sum(axis=1)
+        totals = buildingtype_df[enduse_cols].sum(axis=1)
         normalization_val = totals.max() 
 
         return normalization_val
@@ -27,45 +27,38 @@ class NormalizeTotals(t.Task):
         
         self.df = data_map[self.input_artifact_total_loads]
         
-        normal_loads = pd.DataFrame()
-        climate_zones = self.df.fcz.unique()
+        self.enduse_cols = list(self.df.columns)
+        self.enduse_cols.remove('time')
+        self.enduse_cols.remove('fcz')
+        self.enduse_cols.remove('buildingtype')
 
-        for fcz in climate_zones:
+        normal_loads = pd.concat(self.map_groups(self.df, ['fcz', 'buildingtype'], self.normalize_buildingtype, self.enduse_cols))
 
-            fcz_df = self.df.loc[self.df.fcz == fcz].copy()
-
-            if fcz_df.columns[0] == 'Unnamed: 0':
-                fcz_df = fcz_df.drop('Unnamed: 0', axis=1)
-
-            self.enduse_cols = list(fcz_df.columns)
-            self.enduse_cols.remove('time')
-            self.enduse_cols.remove('fcz')
-            self.enduse_cols.remove('buildingtype')
-
-            buildingtypes = fcz_df.buildingtype.unique()
-
-            for buildingtype in buildingtypes:
-                buildingtype_df = fcz_df.loc[fcz_df.buildingtype == buildingtype].copy()
+        self.validate(normal_loads)
+        self.on_complete({self.output_artifact_normal_loads: normal_loads})
 
-                min_val = buildingtype_df[self.enduse_cols].min().min()
-                buildingtype_df[self.enduse_cols] = buildingtype_df[self.enduse_cols] - min_val
-            
-                # get enduse columns
-                normalization_val = self.get_normalization_val(buildingtype_df)
+    @staticmethod
+    def normalize_buildingtype(key, buildingtype_df, enduse_cols):
+        """
+        Normalize the enduse loads of a single climate zone and building type by their peak total
+        """
+        min_val = buildingtype_df[enduse_cols].min().min()
+        buildingtype_df[enduse_cols] = buildingtype_df[enduse_cols] - min_val
 
-                # Normalize by peak total
-                buildingtype_df[self.enduse_cols] = buildingtype_df[self.enduse_cols]/normalization_val
+        # get enduse columns
+        normalization_val = NormalizeTotals.get_normalization_val(buildingtype_df, enduse_cols)
 
-                normal_loads = normal_loads.append(buildingtype_df)
+        # Normalize by peak total
+        buildingtype_df[enduse_cols] = buildingtype_df[enduse_cols]/normalization_val
 
-        self.validate(normal_loads)
-        self.on_complete({self.output_artifact_normal_loads: normal_loads})
+        return buildingtype_df
 
-    def get_normalization_val(self, buildingtype_df):
+    @staticmethod
+    def get_normalization_val(buildingtype_df, enduse_cols):
         """
         returns peak total
         """
-        totals = buildingtype_df[self.enduse_cols].sum(axis=1)
+        totals = buildingtype_df[enduse_cols].sum(axis=1)
         totals.index = buildingtype_df['time']
         normalization_val = totals.max() # can be adjusted if normalizing for summer peak
         # can check here for totals.idxmax() month to confirm summer/winter
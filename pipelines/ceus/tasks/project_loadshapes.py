@@ -19,6 +19,7 @@ class ProjectLoadshapes(t.Task):
         self.input_artifact_loadshapes = f'{pipeline_artifact_dir}/ceus_loadshapes.csv'
         self.input_artifact_correlation_matrix = f'{pipeline_artifact_dir}/ceus_correlation_matrix.csv'
         self.input_artifact_sensitivity_temperatures = 'SENSITIVITY_TEMPERATURES.json'
+        self.config_sections = { self.input_artifact_sensitivity_temperatures: ['commercial'] }
 
         self.my_data_files = [
             { 'name': self.input_artifact_loadshapes, 'read_type': SupportedFileReadType.DATA },
@@ -44,8 +45,6 @@ class ProjectLoadshapes(t.Task):
         self.correlation_matrix = data_map[self.input_artifact_correlation_matrix]
 
         # organize df's
-        if self.loadshapes.columns[0] == 'Unnamed: 0':
-            self.loadshapes = self.loadshapes.drop('Unnamed: 0', axis=1)
         self.correlation_matrix = self.correlation_matrix.set_index(self.correlation_matrix.columns[0])
         
         self.enduse_cols = list(self.loadshapes.columns)
@@ -60,6 +59,8 @@ class ProjectLoadshapes(t.Task):
 
         use_adjusted = False # can be made True to use adjusted weather
 
+        targets = []
+
         for target in target_locations:
             base = self.correlation_matrix.loc[target,:].idxmax()
 
@@ -70,81 +71,97 @@ class ProjectLoadshapes(t.Task):
                 logger.warning(f'In task {self.name}, weather data for {target} not found')
                 continue
 
-            winter = weather['winter'] if not use_adjusted else weather['winter_adjusted']
-            spring = weather['spring'] if not use_adjusted else weather['spring_adjusted']
-            summer = weather['summer'] if not use_adjusted else weather['summer_adjusted']
+            targets.append((target, base, weather))
 
-            multiplier_winter = self.get_multiplier(winter)
-            multiplier_spring = self.get_multiplier(spring)
-            multiplier_summer = self.get_multiplier(summer)
+        projected = self.map_items(self.project_target, targets, self.loadshapes, self.enduse_cols, buildingtypes, self.theat, self.tcool, use_adjusted)
+        total_loadshapes = pd.concat([total_loadshapes] + projected)
 
-            for buildingtype in buildingtypes:
-                base_loadshapes = self.loadshapes.loc[(self.loadshapes['fcz'] == base) & (self.loadshapes['buildingtype'] == buildingtype)].copy()
+        self.validate(total_loadshapes)
+        self.on_complete({self.output_artifact_total_loadshapes: total_loadshapes})
 
-                base_loadshapes["Ventilation"][:48] = base_loadshapes["Heating"][:48] + base_loadshapes["Cooling"][:48] + base_loadshapes["Ventilation"][:48]
+    @staticmethod
+    def project_target(item, loadshapes, enduse_cols, buildingtypes, theat, tcool, use_adjusted):
+        """
+        Project the loadshapes of every building type of the base climate zone most correlated with a target onto the weather of the target
+        """
+        target, base, weather = item
+        loadshapes_list = []
 
-                base_loadshapes["Heating"][:48] = 0
-                base_loadshapes["Cooling"][:48] = 0
+        winter = weather['winter'] if not use_adjusted else weather['winter_adjusted']
+        spring = weather['spring'] if not use_adjusted else weather['spring_adjusted']
+        summer = weather['summer'] if not use_adjusted else weather['summer_adjusted']
 
-                target_loadshapes = pd.DataFrame(columns=self.enduse_cols)
+        multiplier_winter = ProjectLoadshapes.get_multiplier(winter, theat, tcool)
+        multiplier_spring = ProjectLoadshapes.get_multiplier(spring, theat, tcool)
+        multiplier_summer = ProjectLoadshapes.get_multiplier(summer, theat, tcool)
 
-                for enduse in self.enduse_cols:
-                    x = np.array(base_loadshapes[enduse])
+        for buildingtype in buildingtypes:
+            base_loadshapes = loadshapes.loc[(loadshapes['fcz'] == base) & (loadshapes['buildingtype'] == buildingtype)].copy()
 
-                    y_winter = []
-                    y_spring = []
-                    y_summer = []
+            base_loadshapes["Ventilation"][:48] = base_loadshapes["Heating"][:48] + base_loadshapes["Cooling"][:48] + base_loadshapes["Ventilation"][:48]
 
-                    for idx, val in enumerate(multiplier_winter):
-                        if val < 0:
-                            y_winter.append(x[idx] + (x[48] * val))
-                        elif val > 0:
-                            y_winter.append(x[idx] + (x[49] * val))
-                        else:
-                            y_winter.append(x[idx]) 
+            base_loadshapes["Heating"][:48] = 0
+            base_loadshapes["Cooling"][:48] = 0
 
-                    for idx, val in enumerate(multiplier_spring):
-                        if val < 0:
-                            y_spring.append(x[idx] + (x[48] * val))
-                        elif val > 0:
-                            y_spring.append(x[idx] + (x[49] * val))
-                        else:
-                            y_spring.append(x[idx])
-             
-                    for idx, val in enumerate(multiplier_summer):
-                        if val < 0:
-                            y_summer.append(x[idx] + (x[48] * val))
-                        elif val > 0:
-                            y_summer.append(x[idx] + (x[49] * val))
-                        else:
-                            y_summer.append(x[idx])
+            target_loadshapes = pd.DataFrame(columns=enduse_cols)
 
-                    y = np.concatenate((y_winter, y_spring, y_summer), axis=0)
+            for enduse in enduse_cols:
+                x = np.array(base_loadshapes[enduse])
 
-                    target_loadshapes[enduse] = y
+                y_winter = []
+                y_spring = []
+                y_summer = []
 
-                target_loadshapes.insert(loc=0, column='target', value=target)
-                target_loadshapes.insert(loc=1, column='buildingtype', value=buildingtype)
-                target_loadshapes.insert(loc=2, column='time', value=list(range(24)) * 3)
-                target_loadshapes.insert(loc=3, column='daytype', value=(['winter_peak'] * 24) + (['spring_light'] * 24) + (['summer_peak'] * 24))
+                for idx, val in enumerate(multiplier_winter):
+                    if val < 0:
+                        y_winter.append(x[idx] + (x[48] * val))
+                    elif val > 0:
+                        y_winter.append(x[idx] + (x[49] * val))
+                    else:
+                        y_winter.append(x[idx]) 
 
-                total_loadshapes = total_loadshapes.append(target_loadshapes)
+                for idx, val in enumerate(multiplier_spring):
+                    if val < 0:
+                        y_spring.append(x[idx] + (x[48] * val))
+                    elif val > 0:
+                        y_spring.append(x[idx] + (x[49] * val))
+                    else:
+                        y_spring.append(x[idx])
+         
+                for idx, val in enumerate(multiplier_summer):
+                    if val < 0:
+                        y_summer.append(x[idx] + (x[48] * val))
+                    elif val > 0:
+                        y_summer.append(x[idx] + (x[49] * val))
+                    else:
+                        y_summer.append(x[idx])
 
-        self.validate(total_loadshapes)
-        self.on_complete({self.output_artifact_total_loadshapes: total_loadshapes})
+                y = np.concatenate((y_winter, y_spring, y_summer), axis=0)
+
+                target_loadshapes[enduse] = y
+
+            target_loadshapes.insert(loc=0, column='target', value=target)
+            target_loadshapes.insert(loc=1, column='buildingtype', value=buildingtype)
+            target_loadshapes.insert(loc=2, column='time', value=list(range(24)) * 3)
+            target_loadshapes.insert(loc=3, column='daytype', value=(['winter_peak'] * 24) + (['spring_light'] * 24) + (['summer_peak'] * 24))
+
+            loadshapes_list.append(target_loadshapes)
+
+        return pd.concat(loadshapes_list)
 
-    def get_multiplier(self, weather):
+    @staticmethod
+    def get_multiplier(weather, theat, tcool):
         """multiplier array to get weather sensitive loadshapes 
         """
         multiplier_array = []
 
         for time_temp in weather:
-            if self.theat <= time_temp <= self.tcool:
+            if theat <= time_temp <= tcool:
                 multiplier_array.append(0)
-            elif self.tcool < time_temp:
-                multiplier_array.append(time_temp - self.tcool)
+            elif tcool < time_temp:
+                multiplier_array.append(time_temp - tcool)
             else:
-                multiplier_array.append(time_temp - self.theat)
+                multiplier_array.append(time_temp - theat)
 
         return multiplier_array
 
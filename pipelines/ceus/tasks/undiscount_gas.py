@@ -38,23 +38,25 @@ class UndiscountGas(t.Task):
 
         self.df = self.df.fillna(0)
 
-        total_loads = pd.DataFrame()
-        climate_zones = self.df.fcz.unique()
-
-        for fcz in climate_zones:
-            fcz_df = self.df.loc[self.df.fcz == fcz].copy()
-            zone = self.zip_zone_map['mapping'][str(fcz)]
-            electric_percentage = self.gas_fraction['electrification'][zone]   
-
-            # add gas fraction
-            for enduse in electric_percentage.keys():
-                fcz_df[enduse] = fcz_df[enduse] / electric_percentage[enduse]
-            
-            total_loads = total_loads.append(fcz_df)
+        total_loads = pd.concat(self.map_groups(self.df, 'fcz', self.undiscount_fcz, self.zip_zone_map, self.gas_fraction))
 
         self.validate(total_loads)
         self.on_complete({self.output_artifact_total_loads: total_loads})
 
+    @staticmethod
+    def undiscount_fcz(fcz, fcz_df, zip_zone_map, gas_fraction):
+        """
+        Add the gas fraction back to the enduse loads of a single climate zone
+        """
+        zone = zip_zone_map['mapping'][str(fcz)]
+        electric_percentage = gas_fraction['electrification'][zone]
+
+        # add gas fraction
+        for enduse in electric_percentage.keys():
+            fcz_df[enduse] = fcz_df[enduse] / electric_percentage[enduse]
+
+        return fcz_df
+
     def validate(self, df):
         """
         Validation
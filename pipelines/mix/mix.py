@@ -51,12 +51,12 @@ class MixedFeederPipeline():
         except FileExistsError:
             logger.exception(f'Directory we attempted to create for {self.name} already exists')
 
-    def execute(self):
+    def execute(self, targets=None):
         """
-        Run all the tasks in this pipeline
+        Run all the tasks in this pipeline, or only those needed to produce the target artifacts
         """
         try:
-            self.pipeline.run()
+            self.pipeline.run(targets=targets)
             logger.info(f'Total Pipeline Run Time: {self.pipeline.total_pipeline_run_time}')
         except ValueError as ve:
             logger.exception(f'{self.name} failed its pipeline execution. Cleaning up and exiting')
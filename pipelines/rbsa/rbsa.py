@@ -3,6 +3,7 @@ import logging
 from time import time
 from settings import base
 from generics import pipeline as p, task as t
+from generics.schema import ArtifactSchema, artifact_schemas
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -73,6 +74,14 @@ class RbsaPipeline():
             self._create_results_storage(f'{base.LOCAL_PATH}/{self.artifact_root_dir}/{self.artifact_target_weather_dir}')
 
     def create_tasks(self):
+        self.pipeline.intermediate_artifacts.update([
+            f'{self.artifact_root_dir}/rbsa_cleandata.csv',
+            f'{self.artifact_root_dir}/area_loads.csv',
+            f'{self.artifact_root_dir}/enduse_loads.csv',
+            f'{self.artifact_root_dir}/total_loads.csv',
+            f'{self.artifact_root_dir}/normal_loads.csv'
+        ])
+        self.register_schemas()
 
         apply_devicemap_task = apply_devicemap.ApplyDevicemap('apply_devicemap_task', self.artifact_root_dir)
         self.pipeline.add_task(apply_devicemap_task)
@@ -107,6 +116,26 @@ class RbsaPipeline():
         apply_roa_task = apply_roa.ApplyRoa('apply_roa_task', self.artifact_root_dir)
         self.pipeline.add_task(apply_roa_task)
 
+    def register_schemas(self):
+        """
+        Declare the layout of the tabular artifacts this pipeline reads and writes
+        """
+        root = self.artifact_root_dir
+        zip_loads = ArtifactSchema(dtypes={'zipcode': 'int64'}, datetimes=['time'], leading=['time'])
+        city_loadshapes = ArtifactSchema(dtypes={'target': str, 'daytype': str})
+
+        artifact_schemas.register(f'{root}/rbsa_zipmap', ArtifactSchema(dtypes={'siteid': str, 'postcode': str}))
+        artifact_schemas.register(f'{root}/rbsa_cleandata', ArtifactSchema(dtypes={'siteid': str}, datetimes=['time'], leading=['siteid', 'time']))
+        artifact_schemas.register(f'{root}/{self.artifact_noaa_dir}/*', ArtifactSchema(datetimes=['DATE']))
+
+        for name in ['area_loads', 'enduse_loads', 'total_loads', 'normal_loads']:
+            artifact_schemas.register(f'{root}/{name}', zip_loads)
+
+        artifact_schemas.register(f'{root}/loadshapes', ArtifactSchema(dtypes={'zipcode': 'int64'}))
+
+        for name in ['total_loadshapes', 'enduse_loadshapes', 'normal_loadshapes', 'components']:
+            artifact_schemas.register(f'{root}/{name}', city_loadshapes)
+
     def _create_results_storage(self, storage_name=None):
         try:
             if storage_name:
@@ -230,12 +259,12 @@ class RbsaPipeline():
                 fig.savefig(f'{directory}/{title}.png')
                 plt.close(fig)
 
-    def execute(self):
+    def execute(self, targets=None):
         """
-        Run all the tasks in this pipeline
+        Run all the tasks in this pipeline, or only those needed to produce the target artifacts
         """
         try:
-            self.pipeline.run()
+            self.pipeline.run(targets=targets)
             logger.info(f'Total Pipeline Run Time: {self.pipeline.total_pipeline_run_time}')
         except ValueError as ve:
             logger.exception(f'{self.name} failed its pipeline execution. Cleaning up and exiting')
@@ -1,12 +1,70 @@
 import logging
 import pandas as pd
-from generics import task as t
+from settings import base
+from generics import task as t, timeseries
 from generics.file_type_enum import SupportedFileReadType
 import numpy as np
 
 logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
 
 
+class DeviceProjection(object):
+    """
+    Projection of raw metering columns onto the kWh enduses of the device map.
+    The device map is compiled once into a 0/1 matrix, devices by enduses, so the
+    device columns of a file sum into enduse totals with a single matrix multiply.
+    Y1 columns carry a description after the device code, 'HP Heat Pump', Y2
+    columns are the bare code, 'HP'; both resolve to the same device.
+    """
+    def __init__(self, device_map):
+        """
+        device_map <DataFrame>: enduse_code, eu and units of every metered device
+        """
+        # a code listed again in the map overrides its earlier rows
+        devices = device_map.drop_duplicates('enduse_code', keep='last')
+        devices = devices.loc[(devices['units'] == 'kWh') & devices['eu'].notnull() & ~devices['eu'].isin(['', 'ignore'])]
+        self.enduses = list(pd.unique(devices['eu']))
+        enduse_index = {enduse: index for index, enduse in enumerate(self.enduses)}
+        self.device_enduses = {code: enduse_index[enduse] for code, enduse in zip(devices['enduse_code'], devices['eu'])}
+        self._matrices = {}
+
+    def get_enduse(self, column):
+        """
+        Return the position in enduses of the enduse a raw metering column sums into, None for any other column
+        """
+        tokens = column.split() if isinstance(column, str) else []
+        if not tokens or (tokens[0] == 'Hours') or (column[:10] == 'Fahrenheit'):
+            return None
+        return self.device_enduses.get(column, self.device_enduses.get(tokens[0]))
+
+    def get_matrix(self, columns):
+        """
+        Return the positions of the device columns among columns and their 0/1 matrix, devices by enduses
+        """
+        columns = tuple(columns)
+        if columns not in self._matrices:
+            positions, enduse_positions = [], []
+            for position, column in enumerate(columns):
+                enduse = self.get_enduse(column)
+                if enduse is not None:
+                    positions.append(position)
+                    enduse_positions.append(enduse)
+
+            matrix = np.zeros((len(positions), len(self.enduses)))
+            matrix[np.arange(len(positions)), enduse_positions] = 1
+            self._matrices[columns] = (positions, matrix)
+
+        return self._matrices[columns]
+
+    def project(self, df):
+        """
+        Return the enduse totals of every row of a raw metering frame, missing readings counted as 0
+        """
+        positions, matrix = self.get_matrix(df.columns)
+        values = np.nan_to_num(df.iloc[:, positions].to_numpy(dtype=float))
+        return pd.DataFrame(values @ matrix, columns=self.enduses)
+
+
 class ApplyDevicemap(t.Task):
     """ 
     This class is used to group sites into 3 digit zip codes
@@ -16,6 +74,7 @@ class ApplyDevicemap(t.Task):
         self.name = name
         self.input_artifact_device_map = f'{pipeline_artifact_dir}/device_map.csv'
         self.input_artifact_excluded_locations = 'EXCLUDED_LOCATIONS.json'
+        self.config_sections = { self.input_artifact_excluded_locations: ['Residential'] }
 
         self.input_artifact_y1_1 = f'{pipeline_artifact_dir}/raw/RBSAM_Y1_PART 1 OF 4.csv'
         self.input_artifact_y1_2 = f'{pipeline_artifact_dir}/raw/RBSAM_Y1_PART 2 OF 4.csv'
@@ -55,92 +114,84 @@ class ApplyDevicemap(t.Task):
         self.unneded_columns = ['Total', 'Service', 'Panel']
 
     def _get_data(self):
+        if base.STREAM_INGEST:
+            # the raw metering files are streamed by _stream_files instead
+            raw_files = self.Y1_files + self.Y2_files
+            return self.load_data([entry for entry in self.my_data_files if entry['name'] not in raw_files])
         return self.load_data(self.my_data_files)
-        
+
+    def _stream_files(self, filenames, projection):
+        """
+        Stream the raw metering files in chunks of settings.STREAM_CHUNK_ROWS rows, only parsing
+        the columns of devices mapped to kWh enduses, and return the enduse totals of every
+        chunk summed into hours. Rows of the last site in a chunk are held back for the next
+        one, so a site is resampled in one piece unless it alone spans more than a chunk.
+        """
+        usecols = lambda column: (column in ['siteid', 'time']) or (projection.get_enduse(column) is not None)
+        hourly_chunks = []
+
+        def resample(chunk):
+            hourly_chunks.append(timeseries.resample_hourly(self._project(chunk, projection)).reset_index())
+
+        for filename in filenames:
+            logger.info(f'Streaming {filename}')
+            carry = None
+
+            for chunk in self.read_csv_chunks(filename, base.STREAM_CHUNK_ROWS, usecols=usecols):
+                if carry is not None:
+                    chunk = pd.concat([carry, chunk])
+
+                last_site = chunk['siteid'] == chunk['siteid'].iloc[-1]
+                if last_site.all():
+                    resample(chunk)
+                    carry = None
+                else:
+                    resample(chunk.loc[~last_site])
+                    carry = chunk.loc[last_site]
+
+            if carry is not None:
+                resample(carry)
+
+        # hours split across chunks are added up again when the task resamples the combined years
+        return pd.concat(hourly_chunks, ignore_index=True)
+
+    def _project(self, df, projection):
+        """
+        Return the enduse totals of a raw metering frame, by siteid and parsed time
+        """
+        projected = projection.project(df)
+        projected.insert(0, 'siteid', df['siteid'].astype(str).to_numpy())
+        projected.insert(1, 'time', timeseries.parse_timestamps(df['time'], format='%d%b%y:%H:%M:%S').to_numpy())
+        return projected
+
+    def _clean_files(self, data_map, projection):
+        """
+        Return the enduse totals of the raw metering files loaded whole into data_map
+        """
+        projected = []
+
+        for filename in self.Y1_files + self.Y2_files:
+            logger.info(f'Cleaning {filename}')
+            # summing into enduses first leaves a handful of columns to resample
+            projected.append(self._project(data_map[filename], projection))
+
+        return pd.concat(projected, ignore_index=True)
+
     def _task(self):
         data_map = self._get_data()
         
         self.device_map = data_map[self.input_artifact_device_map]
         self.excluded_locations = data_map[self.input_artifact_excluded_locations]['Residential']
    
-        rbsa_dict = {} # device name to enduse
-        enduses = set()
-
-        for index, row in self.device_map.iterrows():
-            key = row["enduse_code"]
-            enduse = row["eu"]
-            units = row["units"]
-            rbsa_dict[key] = {"enduse": enduse, "unit": units}
-            if rbsa_dict[key]['unit'] == 'kWh':
-                enduses.add(rbsa_dict[key]['enduse'])
+        projection = DeviceProjection(self.device_map)
 
-        master_y1 = pd.DataFrame()
+        if base.STREAM_INGEST:
+            enduse_totals = self._stream_files(self.Y1_files + self.Y2_files, projection)
+        else:
+            enduse_totals = self._clean_files(data_map, projection)
 
-        for filename in self.Y1_files:
-            logger.info(f'Cleaning {filename}')
-            # clean and resample
-            df = data_map[filename]
-            df['time'] = pd.to_datetime(df['time'], format='%d%b%y:%H:%M:%S')
-            df = df.fillna(0)
-            df['siteid'] = df['siteid'].astype(str)  
-            df = df.groupby('siteid').resample('60T', on='time').sum()
-            
-            # generate mapping
-            column_map = {k: [] for k in enduses}
-
-            for column in list(df): 
-                col_name = column.split()[0]
-
-                if (col_name == 'Hours') or (column[:10] == 'Fahrenheit'):
-                    continue  
-                if rbsa_dict[col_name]['unit'] == 'kWh':    
-                    column_map[rbsa_dict[col_name]['enduse']].append(column)
-            
-            # remove unused
-            column_map.pop('', None)
-            column_map.pop('ignore', None)
-            
-            for enduse in column_map.keys():
-                df[enduse] = df[column_map[enduse]].sum(axis=1)
-                
-            df = df[list(column_map.keys())]
-            master_y1 = pd.concat([master_y1, df])
-
-        master_y2 = pd.DataFrame()
-
-        for filename in self.Y2_files:
-            logger.info(f'Cleaning {filename}')
-            # clean and resample
-            df = data_map[filename]
-            df['time'] = pd.to_datetime(df['time'], format='%d%b%y:%H:%M:%S')
-            df = df.fillna(0)
-            df['siteid'] = df['siteid'].astype(str)  
-            df = df.groupby('siteid').resample('60T', on='time').sum()
-
-            # generate mapping
-            column_map = {k: [] for k in enduses}
-
-            for column in df.columns:
-                try:
-                    if rbsa_dict[column]['unit'] == 'kWh':    
-                        column_map[rbsa_dict[column]['enduse']].append(column)
-                except KeyError:
-                    continue # unused columns
-                
-            # remove unused
-            column_map.pop('', None)
-            column_map.pop('ignore', None)
-
-            for enduse in column_map.keys():
-                df[enduse] = df[column_map[enduse]].sum(axis=1)
-                
-            df = df[list(column_map.keys())]
-            master_y2 = pd.concat([master_y2, df])
-
-        master_df = pd.concat([master_y1, master_y2])
-        master_df = master_df.sort_values(by='siteid')
-        master_df = master_df.reset_index(level=[0,1])
-        master_df = master_df.groupby('siteid').resample('60T', on='time').sum()
+        # both years of a site resample into one run of hours, sorted by siteid and time
+        master_df = timeseries.resample_hourly(enduse_totals)
 
         for enduse in self.enduses_needed:
             if enduse not in master_df.columns:
@@ -19,6 +19,7 @@ class FindSensitivities(t.Task):
         self.pipeline_artifact_dir = pipeline_artifact_dir
         self.input_artifact_normal_loads = f'{pipeline_artifact_dir}/normal_loads.csv'
         self.input_artifact_sensitivity_temperatures = 'SENSITIVITY_TEMPERATURES.json'
+        self.config_sections = { self.input_artifact_sensitivity_temperatures: ['residential'] }
         self.output_artifact_loadshapes = f'{pipeline_artifact_dir}/loadshapes.csv'
         self.my_data_files = [
             { 'name': self.input_artifact_normal_loads, 'read_type': SupportedFileReadType.DATA },
@@ -65,86 +66,84 @@ class FindSensitivities(t.Task):
 
         self.df = data_map[self.input_artifact_normal_loads]
         self.df = self.df.set_index(['time'])
-        self.df.index = pd.to_datetime(self.df.index)
-
-        if self.df.columns[0] == 'Unnamed: 0':
-            self.df = self.df.drop('Unnamed: 0', axis=1)
 
         loadshapes = pd.DataFrame(columns=self.df.columns)
 
-        zipcodes = self.df.zipcode.unique()
-
         loadshapes = pd.DataFrame(columns=list(self.df.columns))
 
-        for zipcode in zipcodes:
-            weather_file = f'{self.pipeline_artifact_dir}/noaa/{str(zipcode)}.csv'
-            weather = data_map[weather_file]
-            weather = weather.set_index(['DATE'])
-            weather.index = pd.to_datetime(weather.index)
+        self.enduse_cols = list(self.df.columns)
+        self.enduse_cols.remove('zipcode')
 
-            zipcode_df = self.df.loc[self.df.zipcode == zipcode]
+        zipcode_loadshapes = self.map_groups(self.df, 'zipcode', self.find_zipcode_loadshapes, self.enduse_cols, self.theat, self.tcool, self.name,
+                                             group_data=lambda zipcode: data_map[f'{self.pipeline_artifact_dir}/noaa/{str(zipcode)}.csv'])
+        loadshapes = pd.concat([loadshapes] + zipcode_loadshapes)
 
-            if weather.shape[0] > zipcode_df.shape[0]:
-                weather = weather.loc[weather.index.isin(zipcode_df.index)]
+        self.validate(loadshapes)
+        self.on_complete({self.output_artifact_loadshapes: loadshapes})
 
-            self.enduse_cols = list(zipcode_df.columns)
-            self.enduse_cols.remove('zipcode')
+    @staticmethod
+    def find_zipcode_loadshapes(zipcode, zipcode_df, weather, enduse_cols, theat, tcool, task_name):
+        """
+        Fit the baseload and weather sensitivities of every enduse of a single zipcode
+        """
+        weather = weather.set_index(['DATE'])
 
-            A = self.get_A(weather)
+        if weather.shape[0] > zipcode_df.shape[0]:
+            weather = weather.loc[weather.index.isin(zipcode_df.index)]
 
-            zipcode_loadshapes = pd.DataFrame(columns=self.enduse_cols)
+        A = FindSensitivities.get_A(weather, theat, tcool)
 
-            for enduse in self.enduse_cols:
-                enduse_df = zipcode_df[enduse]
+        zipcode_loadshapes = pd.DataFrame(columns=enduse_cols)
 
-                if enduse == 'Heating':
-                    A_heat = A[:, :-1]
-                    x = self.get_baseload(enduse_df, A_heat)
-                    x = np.append(x, [0])
+        for enduse in enduse_cols:
+            enduse_df = zipcode_df[enduse]
 
-                elif enduse == 'Cooling':
-                    A_cool = np.delete(A, -2, 1)
-                    x = self.get_baseload(enduse_df, A_cool)
-                    cooling_sensitivity = x[-1]
-                    x = np.append(x[:-1], [0])
-                    x = np.append(x, [cooling_sensitivity])
+            if enduse == 'Heating':
+                A_heat = A[:, :-1]
+                x = FindSensitivities.get_baseload(enduse_df, A_heat)
+                x = np.append(x, [0])
 
-                else:
-                    A_base = A[:, :-2]
-                    if enduse == 'Ventilation':
-                         x = self.get_baseload(enduse_df, A_base)
-                    else:
-                         x = self.get_baseload(enduse_df, A_base)
-                    x = np.append(x, [0])
-                    x = np.append(x, [0])
+            elif enduse == 'Cooling':
+                A_cool = np.delete(A, -2, 1)
+                x = FindSensitivities.get_baseload(enduse_df, A_cool)
+                cooling_sensitivity = x[-1]
+                x = np.append(x[:-1], [0])
+                x = np.append(x, [cooling_sensitivity])
 
-                heat_sens = x[-2]
-                cool_sens = x[-1]
+            else:
+                A_base = A[:, :-2]
+                if enduse == 'Ventilation':
+                     x = FindSensitivities.get_baseload(enduse_df, A_base)
+                else:
+                     x = FindSensitivities.get_baseload(enduse_df, A_base)
+                x = np.append(x, [0])
+                x = np.append(x, [0])
 
-                if heat_sens > 0:
-                    heat_sens = 0
+            heat_sens = x[-2]
+            cool_sens = x[-1]
 
-                if cool_sens < 0:
-                    cool_sens = 0
+            if heat_sens > 0:
+                heat_sens = 0
 
-                # adjust x by first value
-                x = np.append(x[0], x[1:48] + x[0])
+            if cool_sens < 0:
+                cool_sens = 0
 
-                if x[:48].min() < 0:
-                    logger.warning(f'In RBSA task {self.name}, {zipcode}-{enduse} baseload negative values have been cleaned.')
-                    x[:48] -= x[:48].min()
+            # adjust x by first value
+            x = np.append(x[0], x[1:48] + x[0])
 
-                x = np.append(x, [heat_sens, cool_sens])
+            if x[:48].min() < 0:
+                logger.warning(f'In RBSA task {task_name}, {zipcode}-{enduse} baseload negative values have been cleaned.')
+                x[:48] -= x[:48].min()
 
-                zipcode_loadshapes[enduse] = x 
+            x = np.append(x, [heat_sens, cool_sens])
 
-            zipcode_loadshapes.insert(loc=0, column='zipcode', value=zipcode)
-            loadshapes = loadshapes.append(zipcode_loadshapes)
+            zipcode_loadshapes[enduse] = x 
 
-        self.validate(loadshapes)
-        self.on_complete({self.output_artifact_loadshapes: loadshapes})
+        zipcode_loadshapes.insert(loc=0, column='zipcode', value=zipcode)
+        return zipcode_loadshapes
 
-    def get_baseload(self, df, A):
+    @staticmethod
+    def get_baseload(df, A):
         """ This function gets baseload for non weather sensitive enduses
         """
         At = A.transpose()
@@ -175,7 +174,8 @@ class FindSensitivities(t.Task):
             ts += dt
         return A
 
-    def get_A(self, weather):
+    @staticmethod
+    def get_A(weather, theat, tcool):
         """
         Constructs A matrix for non weather sensitive loads
         """
@@ -193,10 +193,10 @@ class FindSensitivities(t.Task):
             else:
                 A[h][hh + 24] = 1.0
 
-            if weather['Temperature'][h] < self.theat:
-                A[h][(24 * 2)] = weather['Temperature'][h] - self.theat
-            elif weather['Temperature'][h] > self.tcool:
-                A[h][(24 * 2) + 1] = weather['Temperature'][h] - self.tcool
+            if weather['Temperature'][h] < theat:
+                A[h][(24 * 2)] = weather['Temperature'][h] - theat
+            elif weather['Temperature'][h] > tcool:
+                A[h][(24 * 2) + 1] = weather['Temperature'][h] - tcool
 
             ts += dt
         return A
@@ -1,4 +1,5 @@
 import logging
+import numpy as np
 import pandas as pd
 from generics import task as t
 from generics.file_type_enum import SupportedFileReadType
@@ -33,57 +34,94 @@ class SitesGrouper(t.Task):
         self.df = data_map[self.input_artifact_clean_data]
         self.zip_map = data_map[self.input_artifact_zip_map]
 
-        # guarantee dataframe correct types
-        self.zip_map.siteid = self.zip_map.siteid.astype(str)
-        self.zip_map.postcode = self.zip_map.postcode.astype(str)
-        self.df.siteid = self.df.siteid.astype(str)
-
         all_sites = list(self.df['siteid'].unique())
+        load_columns = [column for column in self.df.columns if column not in ['siteid', 'time']]
 
         # keys are sites, values are zipcodes
         site_zip_map = dict(zip(self.zip_map['siteid'], self.zip_map['postcode']))
+        unmapped = [site for site in all_sites if site not in site_zip_map]
+        if unmapped:
+            raise KeyError(f'Sites {unmapped} are not in {self.input_artifact_zip_map}')
+
+        # sites with a negative reading are left out
+        site_min = self.df[load_columns].min(axis=1).groupby(self.df['siteid']).min()
+        sites = [site for site in all_sites if not site_min[site] < 0]
+
+        # sites of each 3 digit zip, in the order they appear in the data
+        zip_sites, site_zips = {}, {}
+        for site in sites:
+            site_zips[site] = site_zip_map[site][:3]
+            zip_sites.setdefault(site_zips[site], []).append(site)
+
+        bounds = self.df.groupby('siteid')['time'].agg(['min', 'max'])
+        zip_owners, windows = {}, {}
+        for zip3, sites_in_zip in zip_sites.items():
+            zip_owners[zip3], zip_windows = self.get_site_windows(sites_in_zip, bounds)
+            windows.update(zip_windows)
+
+        # each zip spans the hours of the site that set them, hours no site reached are 0
+        site_rows = self.df.groupby('siteid').indices
+        times = self.df['time'].to_numpy()
+        owner_times = [times[site_rows[zip_owners[zip3]]] for zip3 in zip_sites]
+        index = pd.MultiIndex.from_arrays([
+            np.repeat(list(zip_sites), [len(owner) for owner in owner_times]),
+            np.concatenate(owner_times) if owner_times else []
+        ], names=['zipcode', 'time'])
+
+        # the hours of every site that make it into its zip's total, in the order the sites are added
+        site_positions = {site: position for position, site in enumerate(sites)}
+        df = self.df.loc[self.df['siteid'].isin(windows)]
+        df = df.iloc[np.argsort(df['siteid'].map(site_positions).to_numpy(), kind='stable')]
+        first = df['siteid'].map({site: window[0] for site, window in windows.items()})
+        last = df['siteid'].map({site: window[1] for site, window in windows.items()})
+        df = df.loc[(df['time'] >= first) & (df['time'] <= last)]
+
+        # summed into their zip and hour slots in one pass, site after site like adding them up one at a time
+        slots = index.get_indexer(pd.MultiIndex.from_arrays([df['siteid'].map(site_zips), df['time']]))
+        area_loads = pd.DataFrame({
+            column: np.bincount(slots, weights=df[column].to_numpy(dtype=float), minlength=len(index)) for column in load_columns
+        }, index=index, columns=load_columns)
+
+        # summed as floats and cast back once: integer columns stay integers unless hours of a zip
+        # were filled in, where its sites' hours differ, as filling them makes the columns floats
+        site_bounds = bounds.loc[sites]
+        filled = bool((site_bounds.groupby(site_bounds.index.map(site_zips)).nunique() > 1).values.any())
+        if not filled:
+            area_loads = area_loads.astype({column: self.df[column].dtype for column in load_columns if self.df[column].dtype.kind in 'iub'})
+
+        area_loads = area_loads.reset_index(level='zipcode')
+        area_loads['Appliances'] = 0
 
-        # make dictionary of dataframes for each 3 digit zip
-        zipdf_dict = {}
-        full_zipcodes = set()
-
-        for site in all_sites:
-            zipcode = site_zip_map[site]
-            zipcode_3digit = zipcode[:3]
-
-            site_df = self.df.loc[self.df['siteid'] == site]
-            site_df = site_df.set_index('time')
-            site_df = site_df.drop(['siteid'], axis=1)
-
-            if site_df.min().min() < 0:
-                continue
-
-            full_zipcodes.add(zipcode)
-
-            # removing one-off negatives
-            if site_df.min().min() < 0:
-                site_df[site_df < 0] = 0
-
-            if zipcode_3digit in zipdf_dict.keys(): 
-                zipdf_dict[zipcode_3digit] = self.add_df(zipdf_dict[zipcode_3digit], site_df)
-            else:
-                zipdf_dict[zipcode_3digit] = site_df
-
-        full_zipcodes = pd.DataFrame(full_zipcodes, columns=['zipcodes'])
+        full_zipcodes = pd.DataFrame({site_zip_map[site] for site in sites}, columns=['zipcodes'])
         full_zipcodes = full_zipcodes.sort_values('zipcodes')
         full_zipcodes = full_zipcodes.reset_index(drop=True)
-        area_loads = pd.DataFrame()
-
-        for zip3 in zipdf_dict.keys():
-            zip_df = zipdf_dict[zip3]
-            zip_df.insert(loc=0, column='zipcode', value=zip3)
-            area_loads = area_loads.append(zip_df)
-
-        area_loads['Appliances'] = 0
 
         self.validate(area_loads)
         self.on_complete({self.output_artifact_area_load: area_loads, self.output_artifact_full_zipcodes: full_zipcodes})  
     
+    def get_site_windows(self, sites, bounds):
+        """
+        Return the site whose hours a 3 digit zip's total spans and, for each of its sites,
+        the (first, last) hours of the site that are part of the total.
+        Sites are added to the total in order: a site within the hours of the total so far
+        is added on them, any other site's hours replace them, dropping the total's hours outside
+        """
+        owners = []
+        owner = sites[0]
+        for site in sites:
+            if not (bounds.at[owner, 'min'] <= bounds.at[site, 'min'] and bounds.at[site, 'max'] <= bounds.at[owner, 'max']):
+                owner = site
+            owners.append(owner)
+
+        # a site's hours survive within the hours of every total after it
+        windows = {}
+        first, last = bounds.at[owners[-1], 'min'], bounds.at[owners[-1], 'max']
+        for site, owner in reversed(list(zip(sites, owners))):
+            first, last = max(first, bounds.at[owner, 'min']), min(last, bounds.at[owner, 'max'])
+            windows[site] = (first, last)
+
+        return owners[-1], windows
+
     def get_zipsitemapping(self, all_sites, site_zip_map):
         """
         Creates new dict that maps 3 digit zipcodes to sites in zipcode
@@ -102,30 +140,6 @@ class SitesGrouper(t.Task):
 
         return zip_sitemap
 
-    def add_df(self, df1, df2):
-        """
-        This function will add cell values of two dataframes.
-        """
-        if (df1.index.min() < df2.index.min()) & (df1.index.max() >= df2.index.max()):
-            df2 = df2.reindex_like(df1).fillna(0)
-        
-        elif (df1.index.min() <= df2.index.min()) & (df1.index.max() > df2.index.max()):
-            df2 = df2.reindex_like(df1).fillna(0)
-
-        elif (df1.index.min() > df2.index.min()) & (df1.index.max() <= df2.index.max()):
-            df1 = df1.reindex_like(df2).fillna(0)
-        
-        elif (df1.index.min() >= df2.index.min()) & (df1.index.max() < df2.index.max()):
-            df1 = df1.reindex_like(df2).fillna(0)
-
-        elif (df1.index.min() != df2.index.min()) & (df1.index.max() != df2.index.max()):
-            df1 = df1.reindex_like(df2).fillna(0)
-            df2 = df2.reindex_like(df1).fillna(0)
-
-        df_add = df1.fillna(0) + df2.fillna(0)
-
-        return df_add
-
     def validate(self, df):
         """
         Validation
@@ -1,4 +1,5 @@
 import logging
+import numpy as np
 import pandas as pd
 from generics import task as t
 from generics.file_type_enum import SupportedFileReadType
@@ -12,8 +13,9 @@ class HeatcoolIndexer(t.Task):
         super().__init__(self)
         self.name = name
         self.pipeline_artifact_dir = pipeline_artifact_dir
+        self.input_artifact_area_loads = f'{pipeline_artifact_dir}/area_loads.csv'
         self.data_files = [
-            { 'name': f'{pipeline_artifact_dir}/area_loads.csv', 'read_type': SupportedFileReadType.DATA },
+            { 'name': self.input_artifact_area_loads, 'read_type': SupportedFileReadType.DATA },
             { 'name': f'{pipeline_artifact_dir}/noaa/594.csv', 'read_type': SupportedFileReadType.DATA },
             { 'name': f'{pipeline_artifact_dir}/noaa/596.csv', 'read_type': SupportedFileReadType.DATA },
             { 'name': f'{pipeline_artifact_dir}/noaa/597.csv', 'read_type': SupportedFileReadType.DATA },
@@ -56,99 +58,62 @@ class HeatcoolIndexer(t.Task):
 
     def _get_data(self):
         self.data_map = self.load_data(self.data_files) 
-        self.df = self.data_map[f'{self.pipeline_artifact_dir}/area_loads.csv']        
+        self.df = self.data_map[self.input_artifact_area_loads]        
 
     def _task(self):
         self._get_data()
 
-        zipcodes = self.df.zipcode.unique()
-        enduse_loads = pd.DataFrame()
+        zipcodes = list(self.df['zipcode'].unique())
+        weather = pd.concat([
+            self.data_map[f'{self.pipeline_artifact_dir}/noaa/{str(zipcode)}.csv'][['DATE', 'Temperature']].assign(zipcode=zipcode)
+            for zipcode in zipcodes
+        ], ignore_index=True)
+
+        # validation for date ranges of zip codes load data date range to noaa data for that zipcode
+        # both are parsed as datetimes, see the artifact schemas registered by the pipeline
+        load_ranges = self.df.groupby('zipcode')['time'].agg(['min', 'max'])
+        weather_ranges = weather.groupby('zipcode')['DATE'].agg(['min', 'max'])
 
         for zipcode in zipcodes:
-            zipcode_df = self.df.loc[self.df.zipcode == zipcode]
-            zipcode_df = zipcode_df.reset_index()
-            
-            filename = f'{self.pipeline_artifact_dir}/noaa/{str(zipcode)}.csv'
-            zipcode_weather = self.data_map[filename]
-                
-            # validation for date ranges of zip codes load data date range to noaa data for that zipcode
-            if (zipcode_df.time.max() > zipcode_weather.DATE.max()) | (zipcode_df.time.min() < zipcode_weather.DATE.min()):
+            if (load_ranges.at[zipcode, 'max'] > weather_ranges.at[zipcode, 'max']) | (load_ranges.at[zipcode, 'min'] < weather_ranges.at[zipcode, 'min']):
                 logger.exception(f'Task {self.name} did not pass validation. Error found in matching noaa weather file date range to {zipcode} zip code.')
                 self.did_task_pass_validation = False
                 self.on_failure()
 
-            # make start and end dates of weather data match load
-            start = zipcode_df.time.min()
-            end = zipcode_df.time.max()
-
-            zipcode_weather = zipcode_weather.loc[(zipcode_weather.DATE >= start) & (zipcode_weather.DATE <= end)]
-
-            load_df = pd.DataFrame(columns=['HeatCool', 'Temperature', 'Indexer','Heating', 'Cooling', 'Ventilation', 'HeatCoolVent'])
-
-            # apply indexing
-            load_df['HeatCool'] = zipcode_df['HeatCool']
-            load_df['Temperature'] = zipcode_weather['Temperature']
-            load_df['Indexer'] = zipcode_weather.apply(self.temp_dir, axis=1)
-            load_df['Heating'] = load_df.apply(self.heat_method, axis=1)
-            load_df['Cooling'] = load_df.apply(self.cool_method, axis=1)
-            load_df['HeatCoolVent'] = load_df.apply(self.vent_method, axis=1)
-
-            load_df['Heating'] = load_df['Heating'] + (load_df['HeatCoolVent'] / 3)
-            load_df['Cooling'] = load_df['Cooling'] + (load_df['HeatCoolVent'] / 3)
-            load_df['Ventilation'] = load_df['HeatCoolVent'] / 3
-
-            load_df = load_df.fillna(0)
-
-            enduses_updated = ['Heating', 'Cooling', 'Ventilation']
-
-            # zipcode_df['Ventilation'] = 0 # no ventilation coming in
-
-            # apply changes
-            for enduse in enduses_updated:
-                zipcode_df[enduse] = zipcode_df[enduse] + load_df[enduse]
-
-            enduse_loads = enduse_loads.append(zipcode_df)
-
+        enduse_loads = self.index_heatcool(self.df, weather, self.theat, self.tcool)
         enduse_loads = enduse_loads.drop('HeatCool', axis=1)
         enduse_loads = enduse_loads.set_index('time')
-        enduse_loads = enduse_loads.drop('index', axis=1)
 
         self.validate(enduse_loads)
         self.on_complete({self.output_artifact_enduse_loads: enduse_loads})
 
-    def temp_dir(self, row):
+    @staticmethod
+    def index_heatcool(loads, weather, theat, tcool):
         """
-        Function used for seperating heatcool
+        Split the HeatCool load of every zip code into heating, cooling and ventilation by the
+        temperature of its weather at the same hour: below theat it heats, above tcool it cools,
+        otherwise it ventilates and a third goes to each of the three. Hours the weather does not
+        have, or has no temperature for, ventilate. Returns the loads grouped by zip code.
         """
-        if row['Temperature'] < self.theat:
-            return "Heating"
-        if row['Temperature'] > self.tcool:
-            return "Cooling"
-        return "Ventilation"
+        # zip codes in the order they first appear, their hours in the order of the loads
+        loads = loads.iloc[np.argsort(pd.factorize(loads['zipcode'])[0], kind='stable')].reset_index(drop=True)
 
-    def heat_method(self, row):
-        """
-        Function used for seperating heat from heatcool
-        """
-        if row['Indexer'] == "Heating":
-            return row['HeatCool']
-        return 0
+        weather = weather.drop_duplicates(['zipcode', 'DATE']).rename(columns={'DATE': 'time'})
+        hourly_weather = loads[['zipcode', 'time']].merge(weather, how='left', on=['zipcode', 'time'])
 
-    def cool_method(self, row):
-        """
-        Function used for seperating cool from heatcool
-        """
-        if row['Indexer'] == "Cooling":
-            return row['HeatCool']
-        return 0
+        temperature = hourly_weather['Temperature'].to_numpy(dtype=float)
+        heating = temperature < theat
+        cooling = temperature > tcool
+        # a missing temperature, or a missing hour, ventilates
+        ventilation = ~heating & ~cooling
 
-    def vent_method(self, row):
-        """
-        Function used for seperating vent from heatcool
-        """
-        if row['Indexer'] == "Ventilation":
-            return row['HeatCool']
-        return 0
+        heatcool = loads['HeatCool'].fillna(0).to_numpy()
+        vent = np.where(ventilation, heatcool, 0) / 3
+
+        loads['Heating'] = loads['Heating'] + (np.where(heating, heatcool, 0) + vent)
+        loads['Cooling'] = loads['Cooling'] + (np.where(cooling, heatcool, 0) + vent)
+        loads['Ventilation'] = loads['Ventilation'] + vent
+        return loads
 
     def validate(self, df):
         """
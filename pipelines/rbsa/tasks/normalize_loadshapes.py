@@ -27,42 +27,43 @@ class NormalizeLoadshapes(t.Task):
         
         self.df = data_map[self.input_artifact_enduse_loadshapes]
 
-        if self.df.columns[0] == 'Unnamed: 0':  
-             self.df = self.df.drop('Unnamed: 0', axis=1)
+        self.enduse_cols = list(self.df.columns)
+        self.enduse_cols.remove('time')
+        self.enduse_cols.remove('target')
+        self.enduse_cols.remove('daytype')
 
-        city_list = self.df.target.unique()
-        normal_loadshapes = pd.DataFrame()
+        normal_loadshapes = pd.concat(self.map_groups(self.df, 'target', self.normalize_city, self.enduse_cols))
 
-        for city in city_list:
-            city_df = self.df.loc[self.df.target == city]
-            city_df = city_df.set_index('time')
+        self.validate(normal_loadshapes)
+        self.on_complete({self.output_artifact_normal_loadshapes: normal_loadshapes})
 
-            self.enduse_cols = list(city_df.columns)
-            self.enduse_cols.remove('target')
-            self.enduse_cols.remove('daytype')
+    @staticmethod
+    def normalize_city(city, city_df, enduse_cols):
+        """
+        Normalize the enduse loadshapes of a single target city by their summer peak total
+        """
+        city_df = city_df.set_index('time')
 
-            min_val = city_df[self.enduse_cols].min().min()
-            city_df[self.enduse_cols] = city_df[self.enduse_cols] - min_val
+        min_val = city_df[enduse_cols].min().min()
+        city_df[enduse_cols] = city_df[enduse_cols] - min_val
 
-            # get enduse columns
-            normalization_val = self.get_normalization_val(city_df, summer=True)
+        # get enduse columns
+        normalization_val = NormalizeLoadshapes.get_normalization_val(city_df, enduse_cols, summer=True)
 
-            # Normalize by peak total
-            city_df[self.enduse_cols] = city_df[self.enduse_cols] / normalization_val
-            
-            normal_loadshapes = normal_loadshapes.append(city_df)
+        # Normalize by peak total
+        city_df[enduse_cols] = city_df[enduse_cols] / normalization_val
 
-        self.validate(normal_loadshapes)
-        self.on_complete({self.output_artifact_normal_loadshapes: normal_loadshapes})
+        return city_df
 
-    def get_normalization_val(self, city_df, summer):
+    @staticmethod
+    def get_normalization_val(city_df, enduse_cols, summer):
         """
         returns peak total, if summer is True returns peak summer 
         """        
         if summer:
             city_df = city_df.loc[city_df['daytype'] == 'summer_peak']
 
-        totals = city_df[self.enduse_cols].sum(axis=1)
+        totals = city_df[enduse_cols].sum(axis=1)
         normalization_val = totals.max() 
 
         return normalization_val
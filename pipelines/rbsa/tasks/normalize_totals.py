@@ -27,39 +27,37 @@ class NormalizeTotals(t.Task):
         
         self.df = data_map[self.input_artifact_total_loads]
         
-        normal_loads = pd.DataFrame()
-        zipcodes = self.df.zipcode.unique()
+        self.enduse_cols = list(self.df.columns)
+        self.enduse_cols.remove('time')
+        self.enduse_cols.remove('zipcode')
 
-        for zipcode in zipcodes:
+        normal_loads = pd.concat(self.map_groups(self.df, 'zipcode', self.normalize_zipcode, self.enduse_cols))
 
-            zipcode_df = self.df.loc[self.df.zipcode == zipcode]
-
-            if zipcode_df.columns[0] == 'Unnamed: 0':
-                zipcode_df = zipcode_df.drop('Unnamed: 0', axis=1)
-
-            self.enduse_cols = list(zipcode_df.columns)
-            self.enduse_cols.remove('time')
-            self.enduse_cols.remove('zipcode')
+        self.validate(normal_loads)
+        self.on_complete({self.output_artifact_normal_loads: normal_loads})
 
-            min_val = zipcode_df[self.enduse_cols].min().min()
-            zipcode_df[self.enduse_cols] = zipcode_df[self.enduse_cols] - min_val
-            
-            # get enduse columns
-            normalization_val = self.get_normalization_val(zipcode_df)
+    @staticmethod
+    def normalize_zipcode(zipcode, zipcode_df, enduse_cols):
+        """
+        Normalize the enduse loads of a single zipcode by their peak total
+        """
+        min_val = zipcode_df[enduse_cols].min().min()
+        zipcode_df[enduse_cols] = zipcode_df[enduse_cols] - min_val
 
-            # Normalize by peak total
-            zipcode_df[self.enduse_cols] = zipcode_df[self.enduse_cols]/normalization_val
+        # get enduse columns
+        normalization_val = NormalizeTotals.get_normalization_val(zipcode_df, enduse_cols)
 
-            normal_loads = normal_loads.append(zipcode_df)
+        # Normalize by peak total
+        zipcode_df[enduse_cols] = zipcode_df[enduse_cols]/normalization_val
 
-        self.validate(normal_loads)
-        self.on_complete({self.output_artifact_normal_loads: normal_loads})
+        return zipcode_df
 
-    def get_normalization_val(self, zipcode_df):
+    @staticmethod
+    def get_normalization_val(zipcode_df, enduse_cols):
         """
         returns peak total
         """        
-        totals = zipcode_df[self.enduse_cols].sum(axis=1)
+        totals = zipcode_df[enduse_cols].sum(axis=1)
         totals.index = zipcode_df['time']
         normalization_val = totals.max() # can be adjusted if normalizing for summer peak
 
@@ -36,24 +36,25 @@ class UndiscountGas(t.Task):
         self.gas_fraction = data_map[self.input_artifact_gas_fraction]
         self.zip_zone_map = data_map[self.input_artifact_zip_zone_map]
 
-        total_loads = pd.DataFrame()
-        zipcodes = self.df.zipcode.unique()
-
-        for zipcode in zipcodes:
-            # force DF to be a copy so we don't have a warning on the assignment below
-            zipcode_df = self.df.loc[self.df.zipcode == zipcode].copy()
-            zone = self.zip_zone_map['mapping'][str(zipcode)]
-            electric_percentage = self.gas_fraction['electrification'][zone]   
-
-            # add gas fraction
-            for enduse in electric_percentage.keys():
-                zipcode_df[enduse] = zipcode_df[enduse] / electric_percentage[enduse]
-            
-            total_loads = total_loads.append(zipcode_df)
+        total_loads = pd.concat(self.map_groups(self.df, 'zipcode', self.undiscount_zipcode, self.zip_zone_map, self.gas_fraction))
 
         self.validate(total_loads)
         self.on_complete({self.output_artifact_total_loads: total_loads})
 
+    @staticmethod
+    def undiscount_zipcode(zipcode, zipcode_df, zip_zone_map, gas_fraction):
+        """
+        Add the gas fraction back to the enduse loads of a single zipcode
+        """
+        zone = zip_zone_map['mapping'][str(zipcode)]
+        electric_percentage = gas_fraction['electrification'][zone]
+
+        # add gas fraction
+        for enduse in electric_percentage.keys():
+            zipcode_df[enduse] = zipcode_df[enduse] / electric_percentage[enduse]
+
+        return zipcode_df
+
     def validate(self, df):
         """
         Validation
@@ -18,6 +18,7 @@ class ZipcodeCorrelation(t.Task):
         self.pipeline_artifact_dir = pipeline_artifact_dir
         self.input_artifact_projection_locations = 'PROJECTION_LOCATIONS.json'
         self.input_artifact_excluded_locations = 'EXCLUDED_LOCATIONS.json'
+        self.config_sections = { self.input_artifact_excluded_locations: ['Residential'] }
         self.input_artifact_full_zipcodes = f'{pipeline_artifact_dir}/full_zipcodes.csv'
         self.output_artifact_correlation_matrix = f'{pipeline_artifact_dir}/correlation_matrix.csv'
         
@@ -30,7 +31,7 @@ class ZipcodeCorrelation(t.Task):
 
     def _get_data(self):
         self.pre_data_map = self.load_data(self.pre_data_files) 
-        self.full_zipcodes = list(self.pre_data_map[f'{self.pipeline_artifact_dir}/full_zipcodes.csv']['zipcodes'])  
+        self.full_zipcodes = list(self.pre_data_map[self.input_artifact_full_zipcodes]['zipcodes'])  
         self.projection_locations = list(self.pre_data_map['PROJECTION_LOCATIONS.json']['cities'].keys())
         self.excluded_locations = self.pre_data_map['EXCLUDED_LOCATIONS.json']['Residential']
 
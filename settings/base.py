@@ -7,14 +7,93 @@ LOCAL_PATH = 'local_data'
 # path to the remove data store
 REMOTE_PATH = 'lctk.data'
 
+# number of S3 objects (and pooled connections) downloaded concurrently
+S3_MAX_CONCURRENCY = 16
+
+# objects larger than this are downloaded with ranged GETs of S3_MULTIPART_CHUNKSIZE bytes
+S3_MULTIPART_THRESHOLD = 64 * 1024 ** 2
+S3_MULTIPART_CHUNKSIZE = 16 * 1024 ** 2
+
 # path to config files
 CONFIG_PATH = 'config'
 
 # flag to enable use of the memory cache for data
-USE_CACHE = True
+USE_CACHE = False
+
+# memory budget, in bytes, for the in-process artifact cache
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# flag to keep parsed copies of raw csv/excel sources on disk, under PARSE_CACHE_DIR in LOCAL_PATH
+USE_PARSE_CACHE = False
+PARSE_CACHE_DIR = '.parse_cache'
+
+# disk budget, in bytes, for the parse cache
+PARSE_CACHE_MAX_BYTES = 10 * 1024 ** 3
+
+# number of workers used to load a task's input files concurrently, 1 loads them serially
+LOAD_WORKERS = 1
+
+# 'thread' to overlap S3/disk waits, 'process' to also parse csv/excel files in parallel
+LOAD_EXECUTOR = 'thread'
+
+# flag to hand tasks lazily loaded inputs, only parsing the ones a task reads
+LAZY_LOAD = False
+
+# flag to stream the raw RBSA metering files in chunks of STREAM_CHUNK_ROWS rows instead of loading them whole
+STREAM_INGEST = False
+STREAM_CHUNK_ROWS = 500000
+
+# parsed timestamp strings remembered for each format, so columns covering the same hours are parsed once, see generics.timeseries
+TIMESTAMP_CACHE_ENTRIES = 500000
+
+# number of tasks run concurrently once the tasks they depend on have finished, 1 runs tasks one after the other
+PIPELINE_WORKERS = 1
+
+# flag to skip tasks whose inputs, parameters, code and outputs are unchanged since their last successful run,
+# records are kept in TASK_STATE_DIR under LOCAL_PATH. FORCE_RUN runs every task regardless, FORCE_TASKS the named ones
+SKIP_UNCHANGED = False
+TASK_STATE_DIR = '.task_state'
+FORCE_RUN = False
+FORCE_TASKS = []
+
+# artifacts to produce, e.g. ['rbsa/components.csv'], only the tasks needed for them are run, every task when empty
+TARGET_ARTIFACTS = []
+
+# folder under LOCAL_PATH every scenario of a sweep writes its configs and the outputs of its own tasks to, see generics.scenario
+SCENARIO_DIR = 'scenarios'
+
+# every run records the tasks it completed in a manifest in RUN_MANIFEST_DIR under LOCAL_PATH,
+# flag to resume from the first incomplete task of the last run, reusing the artifacts of the completed ones
+RESUME = False
+RUN_MANIFEST_DIR = '.runs'
+
+# folder under LOCAL_PATH the json resource report of every pipeline run is written to, one file per run
+RUN_REPORT_DIR = '.reports'
+
+# number of workers Task.map_groups spreads the groups of a task over, 1 maps them one after the other,
+# and whether they are threads or processes (all cores, at the cost of pickling every group): 'thread' or 'process'
+MAP_WORKERS = 1
+MAP_EXECUTOR = 'thread'
 
 # flag to enable cleanup of file copies of cached data
 CLEAN_LOCAL = True
 
-# flag to enable saving data in cache to named csv files
-SAVE_DATA = True 
\ No newline at end of file
+# flag to hand the outputs of a task to the tasks that read them in memory, writing their files behind
+# on a single writer thread. Only artifacts with a registered schema are handed over, see generics.schema
+ARTIFACT_BUS = False
+
+# memory budget, in bytes, for the frames handed over in memory by the ARTIFACT_BUS. Past it the frames least
+# recently needed are dropped when written to disk already, or spilled as .npz to SPILL_DIR under LOCAL_PATH
+MEMORY_BUDGET_BYTES = 4 * 1024 ** 3
+SPILL_DIR = '.spill'
+
+# flag to let go of the frames and data maps a task holds on to as soon as its pipeline recorded its results
+RELEASE_TASK_DATA = True
+
+# flag to enable saving data in cache to named csv files, with ARTIFACT_BUS disabled
+# intermediate artifacts handed over in memory are never written
+SAVE_DATA = True
+
+# file type used to store intermediate artifacts handed between tasks,
+# one of .csv, .parquet, .feather or .npz - final deliverables stay .csv
+INTERMEDIATE_FILE_TYPE = '.csv' 
\ No newline at end of file
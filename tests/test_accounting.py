@@ -0,0 +1,95 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
+from generics import accounting, pipeline as p, task as t
+from generics.accounting import TaskAccount
+from generics.file_type_enum import SupportedFileReadType
+
+class ValidatingTask(t.Task):
+
+    def validate(self, df):
+        self.validated_rows = len(df)
+
+class TestLctkAccounting(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(base, 'LOCAL_PATH', self.tmp_dir),
+            patch.object(base, 'SKIP_UNCHANGED', False),
+            patch.object(base, 'USE_PARSE_CACHE', False),
+        ]
+        for settings_patch in self.patches:
+            settings_patch.start()
+        pd.DataFrame({'a': range(10)}).to_csv(os.path.join(self.tmp_dir, 'in.csv'), index=False)
+
+    def tearDown(self):
+        for settings_patch in self.patches:
+            settings_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_nested_phases_are_charged_to_the_innermost(self):
+        account = TaskAccount()
+        account.start()
+        account.enter('load')
+        sum(range(200000))
+        account.exit()
+        account.stop()
+
+        self.assertGreater(account.phases['load']['wall'], 0)
+        self.assertAlmostEqual(account.phases['load']['wall'] + account.phases['compute']['wall'], account.wall, places=3)
+        self.assertEqual(account.phases['save']['wall'], 0)
+
+    def test_cpu_time_of_mapped_work_is_counted(self):
+        task = t.Task('mapped')
+        task.account = TaskAccount()
+        task.account.start()
+        with patch.object(base, 'MAP_WORKERS', 2), patch.object(base, 'MAP_EXECUTOR', 'thread'):
+            task.map_items(lambda count: sum(range(count)), [300000, 300000])
+        task.account.stop()
+
+        self.assertGreater(task.account.worker_cpu, 0)
+        self.assertGreaterEqual(task.account.phases['compute']['cpu'], task.account.worker_cpu)
+        self.assertGreaterEqual(task.account.cpu, task.account.worker_cpu)
+
+    def test_process_wide_cpu_time_is_not_counted_twice(self):
+        account = TaskAccount()
+        with patch.object(accounting, 'THREAD_CPU', False):
+            account.record_worker_cpu('load', 1.0)
+            account.record_worker_cpu('load', 2.0, in_process=True)
+
+        self.assertEqual((account.worker_cpu, account.phases['load']['cpu']), (2.0, 2.0))
+
+    def test_pipeline_run_writes_a_resource_report(self):
+        task = ValidatingTask('account')
+        task.input_artifact_in = 'in.csv'
+        task.output_artifact_out = 'out.csv'
+
+        def task_function():
+            df = task.load_data([{ 'name': 'in.csv', 'read_type': SupportedFileReadType.DATA }])['in.csv']
+            task.validate(df)
+            task.on_complete({'out.csv': df.head(4)})
+
+        task.task_function = task_function
+        pipe = p.Pipeline('accounted')
+        pipe.add_task(task)
+        pipe.run()
+
+        report_dir = os.path.join(self.tmp_dir, base.RUN_REPORT_DIR, 'accounted')
+        with open(os.path.join(report_dir, os.listdir(report_dir)[0])) as report_file:
+            report = json.load(report_file)
+
+        self.assertEqual(report['status'], 'complete')
+        task_report = report['tasks'][0]
+        self.assertEqual(task_report['status'], 'complete')
+        self.assertEqual((task_report['files_read'], task_report['rows_in']), (1, 10))
+        self.assertEqual(task_report['bytes_read'], os.path.getsize(os.path.join(self.tmp_dir, 'in.csv')))
+        self.assertEqual((task_report['files_written'], task_report['rows_out']), (1, 4))
+        self.assertEqual(task.validated_rows, 10)
+        for phase in ['load', 'compute', 'validate', 'save']:
+            self.assertGreater(task_report['phases'][phase]['wall'], 0)
@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+import pandas as pd
+from pipelines.rbsa.tasks import apply_devicemap
+
+class TestLctkDeviceProjection(unittest.TestCase):
+
+    def setUp(self):
+        self.projection = apply_devicemap.DeviceProjection(pd.DataFrame({
+            'enduse_code': ['HP', 'ERH', 'AC', 'TV', 'IAT', 'UNKN'],
+            'eu': ['HeatCool', 'Heating', 'Cooling', 'Electronics', 'Temperature', 'ignore'],
+            'units': ['kWh', 'kWh', 'kWh', 'kWh', 'F', 'kWh']
+        }))
+
+    def test_both_naming_conventions_resolve_to_the_device(self):
+        self.assertEqual(self.projection.enduses, ['HeatCool', 'Heating', 'Cooling', 'Electronics'])
+        self.assertEqual(self.projection.get_enduse('HP'), 0)
+        self.assertEqual(self.projection.get_enduse('HP Heat Pump'), 0)
+        self.assertIsNone(self.projection.get_enduse('IAT Indoor Air Temperature'))
+        self.assertIsNone(self.projection.get_enduse('UNKN'))
+        self.assertIsNone(self.projection.get_enduse('Hours Of Occupancy'))
+        self.assertIsNone(self.projection.get_enduse('siteid'))
+
+    def test_device_columns_sum_into_their_enduses(self):
+        df = pd.DataFrame({
+            'siteid': [1, 1],
+            'HP Heat Pump': [1.0, 2.0],
+            'ERH Electric Resistance Heat': [0.5, np.nan],
+            'TV Television': [0.25, 0.25],
+            'TV Second Television': [0.25, 0.5],
+            'IAT Indoor Air Temperature': [68.0, 70.0]
+        })
+
+        projected = self.projection.project(df)
+        self.assertEqual(list(projected.columns), ['HeatCool', 'Heating', 'Cooling', 'Electronics'])
+        self.assertEqual(projected.values.tolist(), [[1.0, 0.5, 0.0, 0.5], [2.0, 0.0, 0.0, 0.75]])
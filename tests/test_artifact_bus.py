@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
+from generics import artifact_bus as ab, pipeline as p, task as t
+from generics.schema import ArtifactSchema, SchemaRegistry
+from generics.fingerprint import fingerprint_frame
+from generics.file_type_enum import SupportedFileReadType
+
+class TestLctkArtifactBus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.registry = SchemaRegistry()
+        self.registry.register('loads', ArtifactSchema(datetimes=['time']))
+        self.patches = [
+            patch.object(base, 'LOCAL_PATH', self.tmp_dir),
+            patch.object(base, 'ARTIFACT_BUS', True),
+            patch.object(base, 'SKIP_UNCHANGED', False),
+            patch.object(ab._artifact_bus, 'instance', ab.ArtifactBus()),
+            patch('generics.artifact.artifact_schemas', self.registry),
+        ]
+        for settings_patch in self.patches:
+            settings_patch.start()
+        self.received = []
+
+    def tearDown(self):
+        for settings_patch in self.patches:
+            settings_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _make_pipeline(self):
+        produce = t.Task('produce')
+        produce.output_artifact_loads = 'loads.csv'
+        produce.task_function = lambda: produce.on_complete({'loads.csv': pd.DataFrame({
+            'time': pd.to_datetime(['2011-01-01 00:00', '2011-01-01 01:00']),
+            'load': [0.5, 1.5]
+        })})
+
+        consume = t.Task('consume')
+        consume.my_data_files = [{ 'name': 'loads.csv', 'read_type': SupportedFileReadType.DATA }]
+        consume.task_function = lambda: self.received.append(consume.load_data(consume.my_data_files)['loads.csv'])
+
+        pipe = p.Pipeline()
+        pipe.add_task(produce)
+        pipe.add_task(consume)
+        return pipe
+
+    def test_outputs_are_handed_over_in_memory_and_written_behind(self):
+        pipe = self._make_pipeline()
+
+        with patch.object(t.Task, '_parse_file') as mock_parse:
+            pipe.run()
+            mock_parse.assert_not_called()
+
+        df = self.received[0]
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['time']))
+        self.assertEqual(list(df['load']), [0.5, 1.5])
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, 'loads.csv')))
+        self.assertEqual(pipe.result_map['produce'][0]['output_filename'], 'loads.csv')
+
+    def test_intermediate_artifacts_stay_in_memory_without_save_data(self):
+        pipe = self._make_pipeline()
+        pipe.intermediate_artifacts.add('loads.csv')
+
+        with patch.object(base, 'SAVE_DATA', False):
+            pipe.run()
+
+        self.assertEqual(list(self.received[0]['load']), [0.5, 1.5])
+        self.assertFalse(os.path.isfile(os.path.join(self.tmp_dir, 'loads.csv')))
+        # the run is over, nothing it handed over is held anymore
+        self.assertFalse(ab.get_artifact_bus().holds('loads.csv'))
+
+    def test_intermediate_artifacts_over_the_memory_budget_are_spilled(self):
+        pipe = self._make_pipeline()
+        pipe.intermediate_artifacts.add('loads.csv')
+        ab.get_artifact_bus().memory.max_bytes = 0
+
+        with patch.object(base, 'SAVE_DATA', False):
+            pipe.run()
+
+        self.assertEqual(list(self.received[0]['load']), [0.5, 1.5])
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(self.received[0]['time']))
+        self.assertFalse(os.path.isfile(os.path.join(self.tmp_dir, 'loads.csv')))
+        self.assertEqual(ab.get_artifact_bus().memory.spilled, 1)
+        self.assertFalse(ab.get_artifact_bus().holds('loads.csv'))
+        self.assertEqual(os.listdir(os.path.join(self.tmp_dir, base.SPILL_DIR)), [])
+
+    def test_frames_only_in_memory_are_fingerprinted(self):
+        pipe = self._make_pipeline()
+        pipe.intermediate_artifacts.add('loads.csv')
+        bus = ab.get_artifact_bus()
+
+        with patch.object(base, 'SAVE_DATA', False), patch.object(bus, 'clear'):
+            pipe.run()
+
+            fingerprints = pipe.tasks[0].get_output_fingerprints()
+            self.assertEqual(fingerprints, {'loads.csv': fingerprint_frame(bus.memory.get('loads.csv'))})
+            self.assertEqual([record['outputs'] for record in pipe.run_manifest.record['tasks'].values()], [fingerprints])
+
+    def test_written_frames_are_dropped_after_their_last_read(self):
+        pipe = self._make_pipeline()
+        bus = ab.get_artifact_bus()
+
+        with patch.object(bus, 'clear'):
+            pipe.run()
+
+        self.assertEqual(bus.memory.dropped, 1)
+        self.assertNotIn('loads.csv', bus.memory)
+
+    def test_received_frames_are_copies(self):
+        bus = ab.get_artifact_bus()
+        bus.publish('loads.csv', pd.DataFrame({'load': [0.5]}))
+        bus.get('loads.csv')['load'] = 2.0
+        self.assertEqual(list(bus.get('loads.csv')['load']), [0.5])
+
+    def test_bus_is_disabled_by_default(self):
+        with patch.object(base, 'ARTIFACT_BUS', False):
+            self.assertIsNone(ab.get_artifact_bus())
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
+from generics.cache import ArtifactCache
+from generics.artifact import ArtifactDataManager
+
+class TestLctkArtifactCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'data.csv')
+        pd.DataFrame({'a': [0, 1], 'b': [2, 3]}).to_csv(self.path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_hit_does_not_call_loader(self):
+        cache = ArtifactCache(max_bytes=1024 ** 2)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return pd.read_csv(self.path)
+
+        for read in range(3):
+            cache.get_or_load(self.path, loader)
+
+        # the file is kept from its second read on
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cache.hits, 1)
+
+    def test_first_read_returns_the_loaded_frame(self):
+        cache = ArtifactCache(max_bytes=1024 ** 2)
+        df = pd.read_csv(self.path)
+
+        self.assertIs(cache.get_or_load(self.path, lambda: df), df)
+        self.assertIsNot(cache.get_or_load(self.path, lambda: df), df)
+        self.assertIsNot(cache.get_or_load(self.path, lambda: df), df)
+        self.assertEqual(len(cache._entries), 1)
+
+    def test_hit_returns_a_copy(self):
+        cache = ArtifactCache(max_bytes=1024 ** 2)
+        df = cache.get_or_load(self.path, lambda: pd.read_csv(self.path))
+        df['a'] = 100
+
+        cached_df = cache.get_or_load(self.path, lambda: pd.read_csv(self.path))
+        self.assertEqual(list(cached_df['a']), [0, 1])
+
+    def test_changed_file_is_reloaded(self):
+        cache = ArtifactCache(max_bytes=1024 ** 2)
+        for read in range(2):
+            cache.get_or_load(self.path, lambda: pd.read_csv(self.path))
+
+        pd.DataFrame({'a': [5, 6, 7]}).to_csv(self.path, index=False)
+        for read in range(2):
+            df = cache.get_or_load(self.path, lambda: pd.read_csv(self.path))
+
+        self.assertEqual(list(df['a']), [5, 6, 7])
+        self.assertEqual(len(cache._entries), 1)
+
+    def test_evicts_least_recently_used_over_budget(self):
+        other_path = os.path.join(self.tmp_dir, 'other.csv')
+        pd.DataFrame({'a': [0, 1], 'b': [2, 3]}).to_csv(other_path, index=False)
+
+        entry_size = int(pd.read_csv(self.path).memory_usage(index=True, deep=True).sum())
+        cache = ArtifactCache(max_bytes=entry_size)
+
+        for path in [self.path, self.path, other_path, other_path]:
+            cache.get_or_load(path, lambda: pd.read_csv(path))
+
+        cached_paths = [key[0] for key in cache._entries]
+        self.assertEqual(cached_paths, [os.path.abspath(other_path)])
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+
+    def test_read_file_respects_use_cache(self):
+        adm = ArtifactDataManager()
+
+        with patch.object(base, 'LOCAL_PATH', self.tmp_dir), patch.object(base, 'USE_CACHE', False), \
+                patch('generics.artifact.get_artifact_cache') as mock_get_cache:
+            df = adm._read_file('data.csv')
+            mock_get_cache.assert_not_called()
+
+        self.assertEqual(list(df.columns), ['a', 'b'])
@@ -1,10 +1,13 @@
+import os
 import json
+import shutil
+import tempfile
 import unittest
 import pandas as pd
 from settings import base
 from unittest.mock import patch, mock_open
 from generics.artifact import ArtifactDataManager
-from generics.file_type_enum import SupportedFileType
+from generics.file_type_enum import SupportedFileType, SupportedFileReadType
 
 class TestLctkArtifactDataManager(unittest.TestCase):
 
@@ -24,6 +27,12 @@ class TestLctkArtifactDataManager(unittest.TestCase):
         valid_extension_xlsx = self.adm._parse_extension('supported_extension.xlsx')
         self.assertEqual(valid_extension_xlsx, SupportedFileType.XLSX.value)
 
+        valid_extension_parquet = self.adm._parse_extension('supported_extension.parquet')
+        self.assertEqual(valid_extension_parquet, SupportedFileType.PARQUET.value)
+
+        valid_extension_npz = self.adm._parse_extension('supported_extension.npz')
+        self.assertEqual(valid_extension_npz, SupportedFileType.NPZ.value)
+
         with self.assertRaises(TypeError):
             self.adm._parse_extension('unsupported_extension.txt')
 
@@ -55,4 +64,76 @@ class TestLctkArtifactDataManager(unittest.TestCase):
 
     def test_load_data_raises_with_unsupported_read_type(self):
         with self.assertRaises(ValueError):
-            self.adm.load_data([{'name': 'random', 'read_type': 'a random read type'}])
\ No newline at end of file
+            self.adm.load_data([{'name': 'random', 'read_type': 'a random read type'}])
+
+    def test_concurrent_load_data_keeps_order_and_first_error(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+
+        data_files = []
+        for idx in range(6):
+            pd.DataFrame({'value': [idx]}).to_csv(os.path.join(tmp_dir, f'{idx}.csv'), index=False)
+            data_files.append({'name': f'{idx}.csv', 'read_type': SupportedFileReadType.DATA})
+
+        for executor in ['thread', 'process']:
+            with patch.object(base, 'LOCAL_PATH', tmp_dir), patch.object(base, 'LOAD_WORKERS', 3), \
+                    patch.object(base, 'LOAD_EXECUTOR', executor), patch.object(base, 'USE_CACHE', False):
+                data_dict = self.adm.load_data(data_files)
+                self.assertEqual(list(data_dict.keys()), [entry['name'] for entry in data_files])
+                self.assertEqual([df['value'][0] for df in data_dict.values()], list(range(6)))
+
+                bad_entries = [{'name': 'random', 'read_type': 'a random read type'}, data_files[0]]
+                with self.assertRaises(ValueError):
+                    self.adm.load_data(data_files[:2] + bad_entries)
+
+    def test_lazy_load_data_only_parses_what_is_read(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+
+        data_files = []
+        for idx in range(3):
+            pd.DataFrame({'value': [idx]}).to_csv(os.path.join(tmp_dir, f'{idx}.csv'), index=False)
+            data_files.append({'name': f'{idx}.csv', 'read_type': SupportedFileReadType.DATA})
+
+        with patch.object(base, 'LOCAL_PATH', tmp_dir), patch.object(base, 'LAZY_LOAD', True), \
+                patch.object(base, 'USE_CACHE', False), patch.object(base, 'USE_PARSE_CACHE', False):
+            with patch('generics.artifact.parse_local_file', side_effect=lambda path, extension, read_options: pd.read_csv(path)) as mock_parse:
+                data_map = self.adm.load_data(data_files)
+                mock_parse.assert_not_called()
+
+                self.assertEqual(data_map['1.csv']['value'][0], 1)
+                self.assertEqual(data_map['1.csv']['value'][0], 1)
+                self.assertEqual(mock_parse.call_count, 1)
+
+            self.assertEqual(list(data_map), ['0.csv', '1.csv', '2.csv'])
+            self.assertEqual(data_map.touched(), ['1.csv'])
+            self.assertEqual(data_map.untouched(), ['0.csv', '2.csv'])
+
+    def test_lazy_load_data_checks_every_entry_exists(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+
+        with patch.object(base, 'LOCAL_PATH', tmp_dir), patch.object(base, 'LAZY_LOAD', True), \
+                patch('generics.artifact.get_s3_transfer_manager') as mock_get_manager:
+            mock_get_manager.return_value.exists.return_value = False
+
+            with self.assertRaises(FileNotFoundError):
+                self.adm.load_data([{'name': 'missing.csv', 'read_type': SupportedFileReadType.DATA}])
+            mock_get_manager.return_value.exists.assert_called_with('missing.csv')
+
+            with self.assertRaises(ValueError):
+                self.adm.load_data([{'name': 'random', 'read_type': 'a random read type'}])
+
+    def test_read_csv_chunks_streams_selected_columns(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        pd.DataFrame({'siteid': range(5), 'a': range(5), 'b': range(5)}).to_csv(os.path.join(tmp_dir, 'raw.csv'), index=False)
+
+        with patch.object(base, 'LOCAL_PATH', tmp_dir):
+            chunks = list(self.adm.read_csv_chunks('raw.csv', 2, usecols=lambda column: column != 'b'))
+
+            with self.assertRaises(TypeError):
+                list(self.adm.read_csv_chunks('config.json', 2))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(list(chunks[0].columns), ['siteid', 'a'])
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
+from utilities import benchmark, synthetic_data
+from pipelines.rbsa.tasks import apply_devicemap, find_sensitivities as rbsa_find_sensitivities
+from pipelines.ceus.tasks import find_sensitivities as ceus_find_sensitivities
+
+class TestLctkSyntheticData(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        synthetic_data.generate(cls.tmp_dir, sites=5, days=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_declared_weather_inputs_are_written(self):
+        tasks = [
+            rbsa_find_sensitivities.FindSensitivities('t-rbsa', 'rbsa'),
+            ceus_find_sensitivities.FindSensitivities('t-ceus', 'ceus')
+        ]
+
+        for task in tasks:
+            for entry in task.get_input_entries():
+                if 'noaa/' in entry['name']:
+                    self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, entry['name'])), entry['name'])
+
+    def test_raw_metering_is_cleaned_by_the_pipeline(self):
+        task = apply_devicemap.ApplyDevicemap('t-devicemap', 'rbsa')
+
+        with patch.object(base, 'LOCAL_PATH', self.tmp_dir), patch.object(base, 'SKIP_UNCHANGED', False), \
+                patch.object(base, 'USE_CACHE', False):
+            task.run()
+
+        self.assertTrue(task.did_task_pass_validation)
+        clean_data = pd.read_csv(os.path.join(self.tmp_dir, 'rbsa/rbsa_cleandata.csv'))
+        # every site metered for a day in each of the two years
+        self.assertEqual(sorted(clean_data['siteid'].unique()), [30000, 30001, 30002, 30003, 30004])
+        self.assertEqual(len(clean_data), 5 * 2 * 24)
+        self.assertTrue({'Heating', 'Cooling', 'HeatCool', 'Vehicle'} <= set(clean_data.columns))
+
+    def test_same_arguments_write_the_same_files(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            synthetic_data.generate(tmp_dir, sites=5, days=1)
+            for filename in ['rbsa/rbsa_zipmap.csv', 'rbsa/raw/RBSAM_Y2_PART 1 OF 5.csv', 'ceus/ceus_cleandata.csv']:
+                with open(os.path.join(tmp_dir, filename)) as new_file, open(os.path.join(self.tmp_dir, filename)) as old_file:
+                    self.assertEqual(new_file.read(), old_file.read())
+        finally:
+            shutil.rmtree(tmp_dir)
+
+class TestLctkBenchmarkCompare(unittest.TestCase):
+
+    def _results(self, task_wall, task_status='complete'):
+        return {'scales': [{
+            'scale': '10x7',
+            'wall': 10.0,
+            'pipelines': {'rbsa': {'status': 'complete', 'wall': 10.0, 'tasks': {
+                'apply_devicemap_task': {'status': task_status, 'wall': task_wall},
+                'site_grouping_task': {'status': 'complete', 'wall': 0.1}
+            }}}
+        }]}
+
+    def test_slower_task_is_a_regression(self):
+        regressions = benchmark.compare(self._results(6.0), self._results(4.0), threshold=0.25)
+        self.assertEqual(regressions, ['10x7/rbsa/apply_devicemap_task: 6.00s, was 4.00s'])
+
+    def test_slowdown_within_threshold_or_noise_is_not(self):
+        self.assertEqual(benchmark.compare(self._results(4.9), self._results(4.0), threshold=0.25), [])
+        self.assertEqual(benchmark.compare(self._results(0.4), self._results(0.1), threshold=0.25), [])
+
+    def test_task_that_stopped_completing_is_a_regression(self):
+        regressions = benchmark.compare(self._results(0.0, task_status='failed'), self._results(4.0))
+        self.assertEqual(regressions, ['10x7/rbsa/apply_devicemap_task: failed, was complete'])
+
+    def test_fastest_completed_repeat_is_kept(self):
+        def report(wall, status):
+            return {'status': status, 'tasks': [{'name': 'apply_devicemap_task', 'status': status, 'wall': wall}]}
+
+        best = None
+        for wall, status in [(1.0, 'failed'), (3.0, 'complete'), (2.0, 'complete'), (5.0, 'complete')]:
+            best = benchmark.keep_fastest(best, report(wall, status))
+
+        self.assertEqual(best['status'], 'complete')
+        self.assertEqual(best['wall'], 2.0)
+        self.assertEqual(best['tasks']['apply_devicemap_task']['wall'], 2.0)
+
+class TestLctkBenchmarkRun(unittest.TestCase):
+
+    def test_every_repeat_starts_with_cold_caches(self):
+        from generics import pipeline as p
+        from generics.parse_cache import get_parse_cache
+        from generics.timeseries import get_timestamp_parser
+
+        tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(tmp_dir, 'data.csv')
+        pd.DataFrame({'a': [0.5]}).to_csv(path, index=False)
+
+        try:
+            with patch.object(base, 'LOCAL_PATH', tmp_dir), patch.object(benchmark, 'get_pipelines', return_value=[]), \
+                    patch.object(p, 'run_pipelines'):
+                get_parse_cache().get_or_parse(path, lambda: pd.read_csv(path))
+                get_timestamp_parser().parse(['2012-04-01T01:00:00'])
+                benchmark.run_once()
+
+                self.assertEqual(get_parse_cache().size(), 0)
+                self.assertEqual(get_timestamp_parser()._parsed, {})
+        finally:
+            shutil.rmtree(tmp_dir)
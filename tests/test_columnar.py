@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from settings import base
+from unittest.mock import patch
+from generics import columnar
+from generics.artifact import ArtifactDataManager
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+class TestLctkColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.df = pd.DataFrame({
+            'siteid': ['10001', '10001', None],
+            'time': pd.to_datetime(['2011-01-01 00:00', '2011-01-01 01:00', '2011-01-01 02:00']),
+            'zone': pd.Categorical(['SEC', 'FRC', 'SEC']),
+            'Heating': np.array([0.5, 1.5, 2.0]),
+            'count': np.array([1, 2, 3], dtype='int32')
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_npz_round_trip_preserves_dtypes(self):
+        path = os.path.join(self.tmp_dir, 'frame.npz')
+        columnar.write_npz(self.df, path)
+        pd.testing.assert_frame_equal(columnar.read_npz(path), self.df)
+
+    def test_npz_round_trip_preserves_multi_index(self):
+        path = os.path.join(self.tmp_dir, 'frame.npz')
+        df = self.df.set_index(['siteid', 'time'])
+        columnar.write_npz(df, path)
+        pd.testing.assert_frame_equal(columnar.read_npz(path), df)
+
+    def test_npz_raises_on_non_string_objects(self):
+        path = os.path.join(self.tmp_dir, 'frame.npz')
+        with self.assertRaises(TypeError):
+            columnar.write_npz(pd.DataFrame({'a': [{'not': 'a string'}]}), path)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet_and_feather_round_trip(self):
+        df = self.df.set_index('time')
+
+        for extension, writer, reader in [('parquet', columnar.write_parquet, columnar.read_parquet),
+                                          ('feather', columnar.write_feather, columnar.read_feather)]:
+            path = os.path.join(self.tmp_dir, f'frame.{extension}')
+            writer(df, path)
+            pd.testing.assert_frame_equal(reader(path).reset_index(), df.reset_index())
+
+    def test_intermediate_artifacts_use_configured_file_type(self):
+        adm = ArtifactDataManager()
+        adm.intermediate_artifacts = {'loads.csv'}
+        df = self.df.set_index(['siteid', 'time'])
+
+        with patch.object(base, 'LOCAL_PATH', self.tmp_dir), patch.object(base, 'INTERMEDIATE_FILE_TYPE', '.npz'), \
+                patch.object(base, 'USE_CACHE', False):
+            adm.save_data('loads.csv', df)
+            self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, 'loads.npz')))
+            self.assertTrue(adm.does_file_exist('loads.csv'))
+
+            read_df = adm._read_file('loads.csv')
+
+        # named index levels come back as columns, like they would from a csv
+        self.assertEqual(list(read_df.columns), list(self.df.columns))
+        self.assertEqual(read_df['time'].dtype, self.df['time'].dtype)
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pandas as pd
+from generics.fingerprint import FrameFingerprint, fingerprint_frame
+
+class TestLctkFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'siteid': ['10001', '10002', None, '10004'],
+            'time': pd.to_datetime(['2011-01-01 00:00', '2011-01-01 01:00', '2011-01-01 02:00', '2011-01-01 03:00']),
+            'zone': pd.Categorical(['SEC', 'FRC', 'SEC', 'FRC']),
+            'Heating': np.array([0.5, 1.5, np.nan, 2.0]),
+            'count': np.array([1, 2, 3, 4], dtype='int32')
+        })
+
+    def test_equal_frames_have_equal_fingerprints(self):
+        self.assertEqual(fingerprint_frame(self.df), fingerprint_frame(self.df.copy()))
+
+    def test_fingerprint_changes_with_values_dtypes_names_and_index(self):
+        fingerprint = fingerprint_frame(self.df)
+
+        changed_value = self.df.copy()
+        changed_value.loc[1, 'Heating'] = 1.25
+        changed_dtype = self.df.astype({'count': 'int64'})
+        changed_name = self.df.rename(columns={'Heating': 'Cooling'})
+        changed_index = self.df.set_index('siteid')
+
+        for other in [changed_value, changed_dtype, changed_name, changed_index, self.df[self.df.columns[::-1]]]:
+            self.assertNotEqual(fingerprint, fingerprint_frame(other))
+
+    def test_tz_aware_fingerprint_depends_on_zone(self):
+        utc = self.df.assign(time=self.df.time.dt.tz_localize('UTC'))
+        pacific = utc.assign(time=utc.time.dt.tz_convert('US/Pacific'))
+        self.assertNotEqual(fingerprint_frame(utc), fingerprint_frame(pacific))
+
+    def test_incremental_fingerprint_matches_whole_frame(self):
+        fingerprint = FrameFingerprint().update(self.df.iloc[:1]).update(self.df.iloc[1:3]).update(self.df.iloc[3:])
+
+        self.assertEqual(fingerprint.rows, len(self.df))
+        self.assertEqual(fingerprint.hexdigest(), fingerprint_frame(self.df))
+
+    def test_incremental_fingerprint_raises_on_schema_change(self):
+        fingerprint = FrameFingerprint().update(self.df)
+        with self.assertRaises(ValueError):
+            fingerprint.update(self.df.drop(columns='zone'))
+
+    def test_fingerprint_is_stable(self):
+        # a change here invalidates every stored fingerprint, bump FINGERPRINT_VERSION with it
+        df = pd.DataFrame({'a': np.array([0, 1], dtype='int64'), 'b': [0.5, 1.5], 'c': ['x', 'y']})
+        self.assertEqual(fingerprint_frame(df), '32ed2e7b466d5911696c6e1b12d1a4579d5d11b6')
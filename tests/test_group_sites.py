@@ -0,0 +1,58 @@
+import unittest
+import pandas as pd
+from unittest.mock import patch
+from pipelines.rbsa.tasks import group_sites
+
+class TestLctkSitesGrouper(unittest.TestCase):
+
+    def _site(self, siteid, first, hours, load):
+        return pd.DataFrame({
+            'siteid': siteid,
+            'time': pd.date_range('2012-04-01', periods=6, freq='H')[first:first + hours],
+            'load': float(load)
+        })
+
+    def _group(self, clean_data, zip_map):
+        task = group_sites.SitesGrouper('group_sites', 'rbsa')
+        outputs = {}
+        data_map = {task.input_artifact_clean_data: clean_data, task.input_artifact_zip_map: zip_map}
+
+        with patch.object(task, '_get_data', return_value=data_map), patch.object(task, 'on_complete', side_effect=outputs.update):
+            task._task()
+
+        return outputs[task.output_artifact_area_load], outputs[task.output_artifact_full_zipcodes]
+
+    def test_sites_are_summed_into_their_3_digit_zip(self):
+        clean_data = pd.concat([
+            self._site('a', 0, 6, 1),
+            # within the hours of the zip so far, added on them
+            self._site('b', 1, 2, 2),
+            self._site('c', 3, 3, 4),
+            self._site('d', 0, 3, 1),
+            # overlapping the zip's hours only in part, its hours replace them
+            self._site('e', 1, 3, 10),
+            # a negative reading leaves the site out
+            self._site('f', 0, 6, -1)
+        ], ignore_index=True)
+        zip_map = pd.DataFrame({'siteid': list('abcdef'), 'postcode': ['98101', '98102', '98101', '98201', '98202', '98103']})
+
+        area_loads, full_zipcodes = self._group(clean_data, zip_map)
+
+        self.assertEqual(list(area_loads.columns), ['zipcode', 'load', 'Appliances'])
+        self.assertEqual(list(area_loads['zipcode']), ['981'] * 6 + ['982'] * 3)
+        self.assertEqual(list(area_loads.index), list(pd.date_range('2012-04-01', periods=6, freq='H')) +
+                         list(pd.date_range('2012-04-01 01:00', periods=3, freq='H')))
+        self.assertEqual(list(area_loads['load']), [1, 3, 3, 5, 5, 5, 11, 11, 10])
+        self.assertEqual(list(full_zipcodes['zipcodes']), ['98101', '98102', '98201', '98202'])
+
+    def test_integer_loads_stay_integers_unless_hours_were_filled_in(self):
+        zip_map = pd.DataFrame({'siteid': list('ab'), 'postcode': ['98101', '98102']})
+
+        same_hours = pd.concat([self._site('a', 0, 3, 1), self._site('b', 0, 3, 2)], ignore_index=True).astype({'load': int})
+        area_loads, _ = self._group(same_hours, zip_map)
+        self.assertEqual(area_loads['load'].dtype, int)
+        self.assertEqual(list(area_loads['load']), [3, 3, 3])
+
+        other_hours = pd.concat([self._site('a', 0, 3, 1), self._site('b', 1, 2, 2)], ignore_index=True).astype({'load': int})
+        area_loads, _ = self._group(other_hours, zip_map)
+        self.assertEqual(area_loads['load'].dtype, float)
@@ -0,0 +1,31 @@
+import unittest
+import numpy as np
+import pandas as pd
+from pipelines.rbsa.tasks import index_heatcool
+
+class TestLctkHeatcoolIndexer(unittest.TestCase):
+
+    def test_heatcool_is_split_by_the_temperature_at_the_same_hour(self):
+        times = pd.date_range('2012-04-01', periods=5, freq='H')
+        loads = pd.DataFrame({
+            'time': list(times[:4]) + list(times[:1]),
+            'zipcode': [981, 981, 981, 981, 594],
+            'HeatCool': [3.0, 6.0, 9.0, 12.0, 3.0],
+            'Heating': 1.0,
+            'Cooling': 0.0,
+            'Ventilation': 0.0
+        })
+        # the weather starts an hour before the loads and has no reading for their last hour,
+        # which ventilates like the hour with no temperature
+        weather = pd.DataFrame({
+            'zipcode': [981, 981, 981, 981, 594],
+            'DATE': [times[0] - pd.Timedelta('1H'), times[2], times[1], times[0], times[0]],
+            'Temperature': [30.0, 10.0, np.nan, 30.0, 20.0]
+        })
+
+        indexed = index_heatcool.HeatcoolIndexer.index_heatcool(loads, weather, 15, 25)
+
+        self.assertEqual(list(indexed['zipcode']), [981, 981, 981, 981, 594])
+        self.assertEqual(list(indexed['Heating']), [1.0, 3.0, 10.0, 5.0, 2.0])
+        self.assertEqual(list(indexed['Cooling']), [3.0, 2.0, 0.0, 4.0, 1.0])
+        self.assertEqual(list(indexed['Ventilation']), [0.0, 2.0, 0.0, 4.0, 1.0])
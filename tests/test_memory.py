@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
+from generics import memory, pipeline as p, task as t
+
+class TestLctkMemoryGovernor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.local_path_patch = patch.object(base, 'LOCAL_PATH', self.tmp_dir)
+        self.local_path_patch.start()
+        self.df = pd.DataFrame({
+            'time': pd.date_range('2011-01-01', periods=100, freq='H'),
+            'zipcode': ['981'] * 100,
+            'load': [float(hour) for hour in range(100)]
+        })
+        self.size = memory.get_frame_size(self.df)
+
+    def tearDown(self):
+        self.local_path_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _spill_files(self):
+        spill_dir = os.path.join(self.tmp_dir, base.SPILL_DIR)
+        return os.listdir(spill_dir) if os.path.isdir(spill_dir) else []
+
+    def test_frames_within_budget_stay_in_memory(self):
+        governor = memory.MemoryGovernor(2 * self.size)
+        governor.put('a.csv', self.df)
+        governor.put('b.csv', self.df)
+
+        self.assertEqual(governor.current_bytes, 2 * self.size)
+        self.assertIs(governor.get('a.csv'), self.df)
+        self.assertEqual(self._spill_files(), [])
+
+    def test_least_recently_used_frame_is_spilled_and_read_back(self):
+        governor = memory.MemoryGovernor(2 * self.size)
+        governor.put('a.csv', self.df)
+        governor.put('b.csv', self.df)
+        governor.get('a.csv')
+        governor.put('c.csv', self.df)
+
+        self.assertEqual(governor.spilled, 1)
+        self.assertEqual(len(self._spill_files()), 1)
+        self.assertLessEqual(governor.current_bytes, 2 * self.size)
+
+        pd.testing.assert_frame_equal(governor.get('b.csv'), self.df)
+        self.assertEqual(governor.reloaded, 1)
+        self.assertIn('b.csv', governor)
+
+    def test_frames_nothing_reads_anymore_go_first(self):
+        governor = memory.MemoryGovernor(2 * self.size)
+        governor.expect_reads({'a.csv': 1, 'b.csv': 1})
+        governor.put('a.csv', self.df)
+        governor.put('b.csv', self.df)
+        governor.done_reading(['b.csv'])
+        governor.put('c.csv', self.df)
+
+        self.assertIn('a.csv', governor._frames)
+        self.assertNotIn('b.csv', governor._frames)
+
+    def test_frames_written_to_disk_are_dropped_not_spilled(self):
+        governor = memory.MemoryGovernor(self.size, is_on_disk=lambda name: name == 'a.csv')
+        governor.put('a.csv', self.df)
+        governor.put('b.csv', self.df)
+
+        self.assertEqual((governor.dropped, governor.spilled), (1, 0))
+        self.assertNotIn('a.csv', governor)
+        self.assertIsNone(governor.get('a.csv'))
+
+    def test_frames_npz_cannot_store_stay_in_memory(self):
+        governor = memory.MemoryGovernor(0)
+        governor.put('a.csv', pd.DataFrame({'mixed': [1, 'a']}))
+
+        self.assertEqual(governor.spilled, 0)
+        self.assertEqual(list(governor.get('a.csv')['mixed']), [1, 'a'])
+
+    def test_clear_removes_spilled_frames(self):
+        governor = memory.MemoryGovernor(0)
+        governor.put('a.csv', self.df)
+        self.assertEqual(len(self._spill_files()), 1)
+
+        governor.clear()
+        self.assertEqual(self._spill_files(), [])
+        self.assertNotIn('a.csv', governor)
+        self.assertEqual(governor.current_bytes, 0)
+
+class TestLctkReleaseTaskData(unittest.TestCase):
+
+    def _make_task(self):
+        task = t.Task('hold')
+        task.output_artifact_loads = 'loads.csv'
+        task.theat = 60
+
+        def run():
+            task.df = pd.DataFrame({'load': [0.5]})
+            task.data_map = {'loads.csv': task.df}
+            task.zipcodes = ['981', '982']
+            task.task_results = [{'output_filename': 'loads.csv'}]
+
+        task.task_function = run
+        return task
+
+    def test_frames_and_data_maps_are_released(self):
+        task = self._make_task()
+        task.run()
+
+        self.assertEqual(sorted(task.release_data()), ['data_map', 'df'])
+        self.assertIsNone(task.df)
+        self.assertIsNone(task.data_map)
+        self.assertEqual(task.zipcodes, ['981', '982'])
+        self.assertEqual(task.task_results, [{'output_filename': 'loads.csv'}])
+        self.assertEqual(task.get_output_artifacts(), ['loads.csv'])
+        self.assertEqual(task.get_parameters()['theat'], 60)
+
+    def test_pipeline_releases_task_data_once_recorded(self):
+        task = self._make_task()
+        pipe = p.Pipeline()
+        pipe.add_task(task)
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            with patch.object(base, 'LOCAL_PATH', tmp_dir), patch.object(base, 'SKIP_UNCHANGED', False):
+                pipe.run()
+                self.assertIsNone(task.df)
+
+                with patch.object(base, 'RELEASE_TASK_DATA', False):
+                    pipe.run()
+                    self.assertIsInstance(task.df, pd.DataFrame)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        self.assertEqual(pipe.result_map['hold'], [{'output_filename': 'loads.csv'}])
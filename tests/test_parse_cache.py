@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
+from generics.parse_cache import ParseCache
+from generics.artifact import ArtifactDataManager
+from generics.schema import ArtifactSchema, SchemaRegistry
+from utilities import parse_cache
+
+class TestLctkParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, '.parse_cache')
+        self.path = os.path.join(self.tmp_dir, 'data.csv')
+        self.parse_calls = 0
+        pd.DataFrame({'siteid': ['site-a', None], 'a': [0.5, 1.5]}).to_csv(self.path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def parse(self, path=None):
+        self.parse_calls += 1
+        return pd.read_csv(path or self.path)
+
+    def test_second_read_is_served_from_disk(self):
+        cache = ParseCache(self.cache_dir, 1024 ** 2)
+        df = cache.get_or_parse(self.path, self.parse)
+        cached_df = ParseCache(self.cache_dir, 1024 ** 2).get_or_parse(self.path, self.parse)
+
+        self.assertEqual(self.parse_calls, 1)
+        pd.testing.assert_frame_equal(df, cached_df)
+
+    def test_changed_source_is_parsed_again(self):
+        cache = ParseCache(self.cache_dir, 1024 ** 2)
+        cache.get_or_parse(self.path, self.parse)
+
+        pd.DataFrame({'siteid': ['site-b'], 'a': [2.5]}).to_csv(self.path, index=False)
+        df = cache.get_or_parse(self.path, self.parse)
+
+        self.assertEqual(self.parse_calls, 2)
+        self.assertEqual(list(df['siteid']), ['site-b'])
+
+    def test_eviction_keeps_cache_within_budget(self):
+        other_path = os.path.join(self.tmp_dir, 'other.csv')
+        shutil.copyfile(self.path, other_path)
+
+        cache = ParseCache(self.cache_dir, 1024 ** 2)
+        cache.get_or_parse(self.path, self.parse)
+        cache.max_bytes = cache.size()
+        os.utime(os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0]), (0, 0))
+        cache.get_or_parse(other_path, lambda: self.parse(other_path))
+
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        self.assertLessEqual(cache.size(), cache.max_bytes)
+
+        cache.purge()
+        self.assertEqual(cache.size(), 0)
+
+    def test_misses_do_not_list_the_cache_folder(self):
+        other_path = os.path.join(self.tmp_dir, 'other.csv')
+        shutil.copyfile(self.path, other_path)
+
+        cache = ParseCache(self.cache_dir, 1024 ** 2)
+        cache.get_or_parse(self.path, self.parse)
+        size = cache.size()
+
+        with patch('generics.parse_cache.os.listdir') as mock_listdir:
+            cache.get_or_parse(other_path, lambda: self.parse(other_path))
+            mock_listdir.assert_not_called()
+
+        self.assertEqual(cache.size(), 2 * size)
+        self.assertEqual(cache.size(), sum(os.path.getsize(os.path.join(self.cache_dir, name)) for name in os.listdir(self.cache_dir)))
+
+    def test_read_file_uses_parse_cache_for_raw_sources_only(self):
+        adm = ArtifactDataManager()
+        adm.intermediate_artifacts = {'loads.csv'}
+        shutil.copyfile(self.path, os.path.join(self.tmp_dir, 'loads.csv'))
+
+        with patch.object(base, 'LOCAL_PATH', self.tmp_dir), patch.object(base, 'USE_CACHE', False), \
+                patch.object(base, 'USE_PARSE_CACHE', True):
+            adm._read_file('data.csv')
+            adm._read_file('loads.csv')
+            self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+            with patch('generics.artifact.parse_local_file') as mock_parse:
+                df = adm._read_file('data.csv')
+                mock_parse.assert_not_called()
+
+        self.assertEqual(list(df.columns), ['siteid', 'a'])
+
+    def test_prewarmed_entries_are_the_ones_reads_look_up(self):
+        registry = SchemaRegistry()
+        registry.register('data', ArtifactSchema(dtypes={'siteid': str}))
+
+        with patch.object(base, 'LOCAL_PATH', self.tmp_dir), patch.object(base, 'USE_CACHE', False), \
+                patch.object(base, 'USE_PARSE_CACHE', True), \
+                patch('generics.artifact.artifact_schemas', registry):
+            parse_cache.prewarm(['data.csv'], ArtifactDataManager())
+            self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+            with patch('generics.artifact.parse_local_file') as mock_parse:
+                ArtifactDataManager()._read_file('data.csv')
+                mock_parse.assert_not_called()
+
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
@@ -1,8 +1,25 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
 import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
 from generics import pipeline as p, task as t
 
 class TestLctkTask(unittest.TestCase):
 
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.local_path_patch = patch.object(base, 'LOCAL_PATH', self.tmp_dir)
+        self.local_path_patch.start()
+
+    def tearDown(self):
+        self.local_path_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
     def test_pipeline_only_accepts_task_instance(self):
         name = 'I am not of type <Task>!!!'
         pipe = p.Pipeline()
@@ -20,3 +37,170 @@ class TestLctkTask(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             pipe.run()
+
+    def _make_task(self, name, inputs, outputs, task_function=None):
+        task = t.Task(name)
+        task.did_task_pass_validation = True
+        for position, input_artifact in enumerate(inputs):
+            setattr(task, f'input_artifact_{position}', input_artifact)
+        for position, output_artifact in enumerate(outputs):
+            setattr(task, f'output_artifact_{position}', output_artifact)
+        task.task_function = task_function or (lambda: None)
+        return task
+
+    def test_task_graph_follows_shared_artifacts(self):
+        tasks = [
+            self._make_task('clean', ['raw.csv'], ['clean.csv']),
+            self._make_task('weather', ['noaa.csv'], ['weather.csv']),
+            self._make_task('join', ['clean.csv', 'weather.csv'], ['joined.csv']),
+            self._make_task('rewrite_raw', [], ['raw.csv']),
+        ]
+
+        graph = p.build_task_graph(tasks)
+
+        self.assertEqual(graph, {0: set(), 1: set(), 2: {0, 1}, 3: {0}})
+
+    def test_independent_tasks_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        order = []
+
+        def meet(name):
+            def run():
+                barrier.wait()
+                order.append(name)
+            return run
+
+        first = self._make_task('first', ['a.csv'], ['b.csv'], meet('first'))
+        second = self._make_task('second', ['c.csv'], ['d.csv'], meet('second'))
+        last = self._make_task('last', ['b.csv', 'd.csv'], ['e.csv'], lambda: order.append('last'))
+
+        pipe = p.Pipeline()
+        for task in [first, second, last]:
+            pipe.add_task(task)
+        p.run_task_graph([(pipe, task) for task in pipe.tasks], max_workers=2)
+
+        self.assertEqual(order[-1], 'last')
+        self.assertEqual(sorted(pipe.result_map), ['first', 'last', 'second'])
+
+    def test_failed_task_skips_only_its_dependents(self):
+        ran = []
+        failing = self._make_task('failing', [], ['a.csv'])
+        failing.did_task_pass_validation = False
+        dependent = self._make_task('dependent', ['a.csv'], ['b.csv'], lambda: ran.append('dependent'))
+        independent = self._make_task('independent', ['c.csv'], ['d.csv'], lambda: ran.append('independent'))
+
+        rbsa_pipe, ceus_pipe = p.Pipeline('rbsa'), p.Pipeline('ceus')
+        rbsa_pipe.add_task(failing)
+        rbsa_pipe.add_task(dependent)
+        ceus_pipe.add_task(independent)
+
+        with self.assertRaises(ValueError):
+            p.run_pipelines([rbsa_pipe, ceus_pipe], max_workers=2)
+
+        self.assertEqual(ran, ['independent'])
+        self.assertEqual(rbsa_pipe.failed_tasks, ['failing', 'dependent'])
+        self.assertEqual(ceus_pipe.failed_tasks, [])
+
+    def test_pipelines_are_cleaned_up_after_the_run(self):
+        failing = self._make_task('failing', [], ['a.csv'])
+        failing.did_task_pass_validation = False
+        pipe = p.Pipeline('rbsa')
+        pipe.add_task(failing)
+
+        with patch.object(base, 'CLEAN_LOCAL', True), patch.object(pipe, 'cleanup') as mock_cleanup:
+            with self.assertRaises(ValueError):
+                p.run_pipelines([pipe])
+            mock_cleanup.assert_called_once_with(True)
+
+    def _make_resumable_pipeline(self, runs, fail_last):
+        first = self._make_task('first', [], ['first.csv'])
+        first.task_function = lambda: runs.append('first') or first.on_complete({'first.csv': pd.DataFrame({'a': [0, 1]})})
+
+        def run_last():
+            runs.append('last')
+            last.did_task_pass_validation = not fail_last
+
+        last = self._make_task('last', ['first.csv'], [], run_last)
+
+        pipe = p.Pipeline('resumable')
+        pipe.add_task(first)
+        pipe.add_task(last)
+        return pipe
+
+    def test_resume_restarts_from_first_incomplete_task(self):
+        runs = []
+
+        with patch.object(base, 'SKIP_UNCHANGED', False):
+            with self.assertRaises(ValueError):
+                self._make_resumable_pipeline(runs, fail_last=True).run()
+
+            with open(os.path.join(self.tmp_dir, base.RUN_MANIFEST_DIR, 'resumable.json')) as manifest_file:
+                manifest = json.load(manifest_file)
+            self.assertEqual(manifest['status'], 'failed')
+            self.assertEqual([record['task'] for record in manifest['tasks'].values()], ['first'])
+
+            with patch.object(base, 'RESUME', True):
+                pipe = self._make_resumable_pipeline(runs, fail_last=False)
+                pipe.run()
+
+        self.assertEqual(runs, ['first', 'last', 'last'])
+        self.assertEqual(pipe.result_map['first'][0]['output_filename'], 'first.csv')
+
+    def test_resume_reruns_task_whose_checkpointed_output_changed(self):
+        runs = []
+
+        with patch.object(base, 'SKIP_UNCHANGED', False):
+            with self.assertRaises(ValueError):
+                self._make_resumable_pipeline(runs, fail_last=True).run()
+
+            pd.DataFrame({'a': [2, 3]}).to_csv(os.path.join(self.tmp_dir, 'first.csv'))
+
+            with patch.object(base, 'RESUME', True):
+                self._make_resumable_pipeline(runs, fail_last=False).run()
+
+        self.assertEqual(runs, ['first', 'last', 'first', 'last'])
+
+    def test_resume_reruns_task_whose_parameters_changed(self):
+        runs = []
+
+        with patch.object(base, 'SKIP_UNCHANGED', False):
+            with self.assertRaises(ValueError):
+                self._make_resumable_pipeline(runs, fail_last=True).run()
+
+            with patch.object(base, 'RESUME', True):
+                pipe = self._make_resumable_pipeline(runs, fail_last=False)
+                pipe.tasks[0].theat = 60
+                pipe.run()
+
+        self.assertEqual(runs, ['first', 'last', 'first', 'last'])
+
+    def test_targets_select_only_the_tasks_producing_them(self):
+        tasks = [
+            self._make_task('clean', ['raw.csv'], ['clean.csv']),
+            self._make_task('weather', ['noaa.csv'], ['weather.csv']),
+            self._make_task('group', ['clean.csv'], ['groups.csv']),
+            self._make_task('join', ['groups.csv', 'weather.csv'], ['joined.csv']),
+            self._make_task('correlate', ['weather.csv'], ['correlation.csv']),
+        ]
+
+        self.assertEqual(p.select_tasks(tasks, ['groups.csv']), [0, 2])
+        self.assertEqual(p.select_tasks(tasks, ['correlation.csv', 'clean.csv']), [0, 1, 4])
+        self.assertEqual(p.select_tasks(tasks, ['joined.csv']), [0, 1, 2, 3])
+
+        with self.assertRaises(ValueError):
+            p.select_tasks(tasks, ['raw.csv'])
+
+    def test_pipelines_run_only_the_tasks_needed_for_targets(self):
+        ran = []
+        rbsa_pipe, ceus_pipe = p.Pipeline('rbsa'), p.Pipeline('ceus')
+        rbsa_pipe.add_task(self._make_task('clean', [], ['clean.csv'], lambda: ran.append('clean')))
+        rbsa_pipe.add_task(self._make_task('group', ['clean.csv'], ['groups.csv'], lambda: ran.append('group')))
+        rbsa_pipe.add_task(self._make_task('plot', ['groups.csv'], ['plots.csv'], lambda: ran.append('plot')))
+        ceus_pipe.add_task(self._make_task('ceus_clean', [], ['ceus_clean.csv'], lambda: ran.append('ceus_clean')))
+
+        with patch.object(base, 'SKIP_UNCHANGED', False):
+            p.run_pipelines([rbsa_pipe, ceus_pipe], targets=['groups.csv'])
+
+        self.assertEqual(ran, ['clean', 'group'])
+        self.assertEqual([task['status'] for task in rbsa_pipe.get_run_report()['tasks']], ['complete', 'complete', 'not run'])
+        self.assertIsNone(ceus_pipe.run_manifest)
@@ -0,0 +1,13 @@
+import unittest
+from generics.process_wide import ProcessWide
+
+class TestLctkProcessWide(unittest.TestCase):
+
+    def test_object_is_made_once_per_key(self):
+        made = []
+        shared = ProcessWide(lambda: made.append(len(made)) or object())
+
+        first = shared.get()
+        self.assertIs(shared.get(), first)
+        self.assertIsNot(shared.get(key='elsewhere'), first)
+        self.assertEqual(len(made), 2)
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+import botocore
+from settings import base
+from unittest.mock import patch
+from generics.s3_transfer import S3TransferManager
+
+class FakeS3Client(object):
+    """
+    Filesystem backed stand-in for the parts of the S3 client we use
+    """
+    def __init__(self, bucket_dir):
+        self.bucket_dir = bucket_dir
+        self.requested_keys = []
+
+    def download_file(self, bucket, key, filename, Config=None):
+        self.requested_keys.append(key)
+        source = os.path.join(self.bucket_dir, key)
+
+        if key.endswith('.timeout'):
+            raise botocore.exceptions.ConnectTimeoutError(endpoint_url='https://s3.amazonaws.com')
+
+        if not os.path.isfile(source):
+            raise botocore.exceptions.ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+
+        shutil.copyfile(source, filename)
+
+    def head_object(self, Bucket=None, Key=None):
+        if not os.path.isfile(os.path.join(self.bucket_dir, Key)):
+            raise botocore.exceptions.ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+        return {'ContentLength': os.path.getsize(os.path.join(self.bucket_dir, Key))}
+
+class TestLctkS3Transfer(unittest.TestCase):
+
+    def setUp(self):
+        self.bucket_dir = tempfile.mkdtemp()
+        self.local_dir = tempfile.mkdtemp()
+        self.client = FakeS3Client(self.bucket_dir)
+        self.manager = S3TransferManager('lctk.test', self.local_dir, client=self.client, max_workers=4)
+
+        os.makedirs(os.path.join(self.bucket_dir, 'rbsa', 'noaa'))
+        for zip3 in ['594', '596', '597']:
+            with open(os.path.join(self.bucket_dir, 'rbsa', 'noaa', f'{zip3}.csv'), 'w') as remote_file:
+                remote_file.write(f'DATE,Temperature\n2011-01-01,{zip3}\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.bucket_dir)
+        shutil.rmtree(self.local_dir)
+
+    def test_download_lands_file_in_local_path(self):
+        self.manager.download('rbsa/noaa/594.csv')
+
+        with open(os.path.join(self.local_dir, 'rbsa', 'noaa', '594.csv')) as local_file:
+            self.assertIn('594', local_file.read())
+
+    def test_download_many_fetches_all_keys_with_one_client(self):
+        keys = ['rbsa/noaa/594.csv', 'rbsa/noaa/596.csv', 'rbsa/noaa/597.csv']
+        errors = self.manager.download_many(keys)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(sorted(self.client.requested_keys), keys)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.local_dir, 'rbsa', 'noaa'))), ['594.csv', '596.csv', '597.csv'])
+
+    def test_missing_key_leaves_no_partial_file(self):
+        errors = self.manager.download_many(['rbsa/noaa/594.csv', 'rbsa/noaa/999.csv'])
+        self.assertEqual(list(errors.keys()), ['rbsa/noaa/999.csv'])
+
+        with self.assertRaises(botocore.exceptions.ClientError):
+            self.manager.download('rbsa/noaa/999.csv')
+
+        self.assertEqual(os.listdir(os.path.join(self.local_dir, 'rbsa', 'noaa')), ['594.csv'])
+
+    def test_connection_errors_are_returned_not_raised(self):
+        errors = self.manager.download_many(['rbsa/noaa/594.csv', 'rbsa/noaa/594.timeout'])
+
+        self.assertEqual(list(errors.keys()), ['rbsa/noaa/594.timeout'])
+        self.assertIsInstance(errors['rbsa/noaa/594.timeout'], botocore.exceptions.BotoCoreError)
+
+    def test_local_path_is_read_on_every_download(self):
+        manager = S3TransferManager('lctk.test', client=self.client)
+        other_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_dir)
+
+        for local_dir in [self.local_dir, other_dir]:
+            with patch.object(base, 'LOCAL_PATH', local_dir):
+                manager.download('rbsa/noaa/594.csv')
+            self.assertTrue(os.path.isfile(os.path.join(local_dir, 'rbsa', 'noaa', '594.csv')))
+
+    def test_exists_does_not_download(self):
+        self.assertTrue(self.manager.exists('rbsa/noaa/594.csv'))
+        self.assertFalse(self.manager.exists('rbsa/noaa/999.csv'))
+        self.assertEqual(self.client.requested_keys, [])
@@ -0,0 +1,111 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
+from generics import pipeline as p, scenario as s, task as t
+from generics.file_type_enum import SupportedFileReadType
+
+class TestLctkScenarioSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config_dir = os.path.join(self.tmp_dir, 'config')
+        self.local_dir = os.path.join(self.tmp_dir, 'local_data')
+        os.makedirs(self.config_dir)
+        os.makedirs(self.local_dir)
+
+        with open(os.path.join(self.config_dir, 'TEMPERATURES.json'), 'w') as config_file:
+            json.dump({'residential': {'theat': 15, 'tcool': 25}, 'commercial': {'theat': 15, 'tcool': 20}}, config_file)
+        pd.DataFrame({'load': [1.0, 2.0]}).to_csv(os.path.join(self.local_dir, 'raw.csv'), index=False)
+
+        self.patches = [
+            patch.object(base, 'LOCAL_PATH', self.local_dir),
+            patch.object(base, 'CONFIG_PATH', self.config_dir),
+            patch.object(base, 'SKIP_UNCHANGED', False)
+        ]
+        for settings_patch in self.patches:
+            settings_patch.start()
+        self.runs = []
+
+    def tearDown(self):
+        for settings_patch in self.patches:
+            settings_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _make_task(self, name, inputs, output, section=None):
+        task = t.Task(name)
+        task.output_artifact_0 = output
+        task.my_data_files = [{ 'name': name, 'read_type': SupportedFileReadType.DATA } for name in inputs]
+        if section:
+            task.input_artifact_temperatures = 'TEMPERATURES.json'
+            task.my_data_files.append({ 'name': 'TEMPERATURES.json', 'read_type': SupportedFileReadType.CONFIG })
+            task.config_sections = { 'TEMPERATURES.json': [section] }
+
+        def run():
+            data_map = task.load_data(task.my_data_files)
+            df = data_map[task.my_data_files[0]['name']]
+            if section:
+                df = df + data_map['TEMPERATURES.json'][section]['theat']
+            self.runs.append((name, task.config_dir))
+            task.on_complete({task.output_artifact_0: df})
+
+        task.task_function = run
+        return task
+
+    def _build_pipelines(self):
+        residential, commercial = p.Pipeline('residential'), p.Pipeline('commercial')
+        residential.add_task(self._make_task('clean', ['raw.csv'], 'clean.csv'))
+        residential.add_task(self._make_task('shape', ['clean.csv'], 'shape.csv', section='residential'))
+        residential.add_task(self._make_task('total', ['shape.csv'], 'total.csv'))
+        commercial.add_task(self._make_task('commercial_shape', ['clean.csv'], 'commercial_shape.csv', section='commercial'))
+        return [residential, commercial]
+
+    def test_only_tasks_reading_an_overridden_section_and_their_dependents_diverge(self):
+        tasks = [task for pipeline in self._build_pipelines() for task in pipeline.tasks]
+
+        self.assertEqual(s.find_divergent_tasks(tasks, s.parse_overrides({'TEMPERATURES.json:residential.theat': 12})), [1, 2])
+        self.assertEqual(s.find_divergent_tasks(tasks, s.parse_overrides({'TEMPERATURES.json:commercial.theat': 12})), [3])
+        self.assertEqual(s.find_divergent_tasks(tasks, s.parse_overrides({'OTHER.json:theat': 12})), [])
+
+    def test_grid_expands_to_every_combination(self):
+        scenarios = s.expand_grid({'TEMPERATURES.json:residential.theat': [12, 18], 'TEMPERATURES.json:residential.tcool': [22]})
+
+        self.assertEqual(list(scenarios), ['residential.theat=12__residential.tcool=22', 'residential.theat=18__residential.tcool=22'])
+        self.assertEqual(scenarios['residential.theat=18__residential.tcool=22']['TEMPERATURES.json:residential.theat'], 18)
+
+    def test_sweep_shares_upstream_tasks_and_namespaces_divergent_outputs(self):
+        sweep = s.run_sweep(self._build_pipelines, s.expand_grid({'TEMPERATURES.json:residential.theat': [12, 18]}), max_workers=2)
+
+        self.assertEqual([name for name, config_dir in self.runs].count('clean'), 1)
+        self.assertEqual([name for name, config_dir in self.runs].count('shape'), 3)
+        self.assertEqual([name for name, config_dir in self.runs].count('commercial_shape'), 1)
+
+        scenario = sweep[1]
+        self.assertEqual(scenario.name, 'residential.theat=18')
+        self.assertIn(('total', scenario.config_dir), self.runs)
+
+        def read(name):
+            return list(pd.read_csv(os.path.join(self.local_dir, name))['load'])
+
+        self.assertEqual(read('total.csv'), [16.0, 17.0])
+        self.assertEqual(read(f'{base.SCENARIO_DIR}/residential.theat=12/total.csv'), [13.0, 14.0])
+        self.assertEqual(read(f'{base.SCENARIO_DIR}/residential.theat=18/total.csv'), [19.0, 20.0])
+
+        with open(os.path.join(self.local_dir, base.SCENARIO_DIR, 'residential.theat=18', 'scenario.json')) as record_file:
+            record = json.load(record_file)
+        self.assertEqual(record['status'], 'complete')
+        self.assertEqual(record['tasks'], ['shape', 'total'])
+        self.assertEqual(record['artifacts'], {
+            'clean.csv': 'clean.csv',
+            'shape.csv': f'{base.SCENARIO_DIR}/residential.theat=18/shape.csv',
+            'total.csv': f'{base.SCENARIO_DIR}/residential.theat=18/total.csv',
+            'commercial_shape.csv': 'commercial_shape.csv'
+        })
+
+    def test_override_of_a_missing_key_is_rejected(self):
+        with self.assertRaises(KeyError):
+            s.run_sweep(self._build_pipelines, {'typo': {'TEMPERATURES.json:residential.theta': 12}})
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
+from generics.artifact import ArtifactDataManager
+from generics.schema import ArtifactSchema, SchemaRegistry
+
+class TestLctkSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.registry = SchemaRegistry()
+        self.schema = ArtifactSchema(dtypes={'siteid': str}, datetimes=['time'], leading=['siteid', 'time'])
+        self.registry.register('rbsa/cleandata', self.schema)
+        self.registry.register('rbsa/noaa/*', ArtifactSchema(datetimes={'DATE': '%Y-%m-%d'}))
+        self.df = pd.DataFrame({
+            'siteid': ['10001', '10002'],
+            'time': pd.to_datetime(['2011-01-01 00:00', '2011-01-01 01:00']),
+            'Heating': [0.5, 1.5]
+        }).set_index(['siteid', 'time'])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_registry_matches_names_without_extension(self):
+        self.assertIs(self.registry.lookup('rbsa/cleandata.csv'), self.schema)
+        self.assertIs(self.registry.lookup('rbsa/cleandata.npz'), self.schema)
+        self.assertIsNotNone(self.registry.lookup('rbsa/noaa/594.csv'))
+        self.assertIsNone(self.registry.lookup('rbsa/area_loads.csv'))
+
+    def test_on_write_flattens_index_and_drops_anonymous_index(self):
+        stored = self.schema.on_write(self.df.reset_index()[['Heating', 'time', 'siteid']])
+        self.assertEqual(list(stored.columns), ['siteid', 'time', 'Heating'])
+        self.assertEqual(list(self.schema.on_write(self.df).columns), ['siteid', 'time', 'Heating'])
+
+        with self.assertRaises(ValueError):
+            self.schema.on_write(self.df.reset_index(level='time', drop=True))
+
+    def test_artifacts_round_trip_typed(self):
+        adm = ArtifactDataManager()
+        self.df.reset_index().assign(siteid=[10001, 10002]).to_csv(os.path.join(self.tmp_dir, 'legacy.csv'))
+        os.makedirs(os.path.join(self.tmp_dir, 'rbsa'))
+
+        with patch.object(base, 'LOCAL_PATH', self.tmp_dir), patch.object(base, 'USE_CACHE', False), \
+                patch('generics.artifact.artifact_schemas', self.registry):
+            adm.save_data('rbsa/cleandata.csv', self.df)
+            read_df = adm._read_file('rbsa/cleandata.csv')
+
+            # files written before the schema existed still carry their index
+            shutil.move(os.path.join(self.tmp_dir, 'legacy.csv'), os.path.join(self.tmp_dir, 'rbsa', 'cleandata.csv'))
+            legacy_df = adm._read_file('rbsa/cleandata.csv')
+
+        for df in [read_df, legacy_df]:
+            self.assertEqual(list(df.columns), ['siteid', 'time', 'Heating'])
+            self.assertEqual(list(df.siteid), ['10001', '10002'])
+            self.assertTrue(pd.api.types.is_datetime64_any_dtype(df.time))
+
+    def test_only_intermediates_are_stored_in_the_schema_layout(self):
+        adm = ArtifactDataManager()
+        adm.intermediate_artifacts = {'rbsa/cleandata.csv'}
+        os.makedirs(os.path.join(self.tmp_dir, 'rbsa', 'noaa'))
+        weather = pd.DataFrame({'Temperature': [50.0], 'DATE': ['2011-01-01']})
+
+        with patch.object(base, 'LOCAL_PATH', self.tmp_dir), patch('generics.artifact.artifact_schemas', self.registry):
+            adm.save_data('rbsa/cleandata.csv', self.df.reset_index()[['Heating', 'time', 'siteid']])
+            adm.save_data('rbsa/noaa/594.csv', weather)
+
+        intermediate = pd.read_csv(os.path.join(self.tmp_dir, 'rbsa', 'cleandata.csv'))
+        self.assertEqual(list(intermediate.columns), ['siteid', 'time', 'Heating'])
+        # deliverables are written as they always were, index column and column order included
+        deliverable = pd.read_csv(os.path.join(self.tmp_dir, 'rbsa', 'noaa', '594.csv'))
+        self.assertEqual(list(deliverable.columns), ['Unnamed: 0', 'Temperature', 'DATE'])
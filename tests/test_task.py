@@ -1,5 +1,15 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
 import unittest
+import pandas as pd
+from settings import base
+from unittest.mock import patch
 from generics import task as t
+from generics.schema import ArtifactSchema, SchemaRegistry
+from generics.file_type_enum import SupportedFileReadType
 
 class TestLctkTask(unittest.TestCase):
 
@@ -22,4 +32,201 @@ class TestLctkTask(unittest.TestCase):
         task = t.Task('t-three')
         task.task_function = lambda: None
         run_result = task.run()
-        self.assertEqual(run_result, None)
\ No newline at end of file
+        self.assertEqual(run_result, None)
+
+    def test_task_reports_lazily_loaded_input_usage(self):
+        task = t.Task('t-four')
+        self.assertEqual(task.get_input_usage(), {'touched': [], 'untouched': []})
+
+        data_files = [{'name': f'{idx}.json', 'read_type': SupportedFileReadType.CONFIG} for idx in range(2)]
+        with patch.object(base, 'LAZY_LOAD', True), patch.object(task, '_check_entry'), \
+                patch.object(task, '_load_entry', return_value={}):
+            data_map = task.load_data(data_files)
+            data_map['1.json']
+
+        self.assertEqual(task.get_input_usage(), {'touched': ['1.json'], 'untouched': ['0.json']})
+
+class TestLctkTaskOnComplete(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.local_path_patch = patch.object(base, 'LOCAL_PATH', self.tmp_dir)
+        self.local_path_patch.start()
+        self.task = t.Task('t-complete')
+
+    def tearDown(self):
+        self.local_path_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_on_complete_writes_new_file_and_records_its_digest(self):
+        df = pd.DataFrame({'a': [0, 1]})
+        self.task.on_complete({'out.csv': df})
+
+        with open(os.path.join(self.tmp_dir, 'out.csv'), 'rb') as out_file:
+            expected_digest = hashlib.sha1(out_file.read()).hexdigest()
+
+        self.assertEqual(self.task.task_results[0]['output_file_sha1'], expected_digest)
+        self.assertEqual(self.task.get_file_hash('out.csv'), expected_digest)
+
+    def test_hashing_an_input_writes_no_digest_file(self):
+        with open(os.path.join(self.tmp_dir, 'in.csv'), 'w') as in_file:
+            in_file.write('a\n0\n1\n')
+
+        with patch.object(self.task, 'check_file_contents_hash', return_value='abc') as mock_check_hash:
+            self.assertEqual(self.task.get_file_hash('in.csv'), 'abc')
+            self.assertEqual(self.task.get_file_hash('in.csv'), 'abc')
+            mock_check_hash.assert_called_once_with('in.csv')
+
+        self.assertEqual(os.listdir(self.tmp_dir), ['in.csv'])
+
+    def test_on_complete_keeps_unchanged_file(self):
+        df = pd.DataFrame({'a': [0, 1]})
+        self.task.on_complete({'out.csv': df})
+
+        with patch.object(self.task, 'check_file_contents_hash') as mock_check_hash:
+            self.task.on_complete({'out.csv': df})
+            mock_check_hash.assert_not_called()
+
+        self.assertIsNone(self.task.task_results[0]['versioned_filename'])
+        self.assertEqual(sorted(f for f in os.listdir(self.tmp_dir) if not f.startswith('.')), ['out.csv'])
+
+    def test_on_complete_versions_changed_file(self):
+        self.task.on_complete({'out.csv': pd.DataFrame({'a': [0, 1]})})
+        self.task.on_complete({'out.csv': pd.DataFrame({'a': [2, 3]})})
+
+        result = self.task.task_results[0]
+        self.assertIsNotNone(result['versioned_filename'])
+        self.assertNotEqual(result['new_file_hash'], result['old_file_hash'])
+        self.assertEqual(list(pd.read_csv(os.path.join(self.tmp_dir, 'out.csv'))['a']), [2, 3])
+
+class TestLctkTaskSkipUnchanged(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config_dir = os.path.join(self.tmp_dir, 'config')
+        os.makedirs(self.config_dir)
+        self.patches = [
+            patch.object(base, 'LOCAL_PATH', self.tmp_dir),
+            patch.object(base, 'CONFIG_PATH', self.config_dir),
+            patch.object(base, 'SKIP_UNCHANGED', True),
+            patch.object(base, 'FORCE_RUN', False),
+            patch.object(base, 'FORCE_TASKS', []),
+        ]
+        for settings_patch in self.patches:
+            settings_patch.start()
+
+        pd.DataFrame({'a': [0, 1]}).to_csv(os.path.join(self.tmp_dir, 'in.csv'), index=False)
+        self._write_config({'factor': 2})
+        self.runs = 0
+
+    def tearDown(self):
+        for settings_patch in self.patches:
+            settings_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_config(self, config):
+        with open(os.path.join(self.config_dir, 'FACTOR.json'), 'w') as config_file:
+            json.dump(config, config_file)
+
+    def _make_task(self, offset=0):
+        task = t.Task('t-incremental')
+        task.offset = offset
+        task.input_artifact_in = 'in.csv'
+        task.input_artifact_factor = 'FACTOR.json'
+        task.output_artifact_out = 'out.csv'
+        task.my_data_files = [
+            { 'name': task.input_artifact_in, 'read_type': SupportedFileReadType.DATA },
+            { 'name': task.input_artifact_factor, 'read_type': SupportedFileReadType.CONFIG },
+        ]
+
+        def task_function():
+            self.runs += 1
+            data_map = task.load_data(task.my_data_files)
+            df = data_map['in.csv'] * data_map['FACTOR.json']['factor'] + task.offset
+            task.on_complete({task.output_artifact_out: df})
+
+        task.task_function = task_function
+        return task
+
+    def test_unchanged_task_is_skipped(self):
+        self._make_task().run()
+        task = self._make_task()
+        task.run()
+
+        self.assertEqual(self.runs, 1)
+        self.assertTrue(task.skipped)
+        self.assertEqual(task.task_results[0]['output_filename'], 'out.csv')
+
+    def test_changed_config_or_parameter_reruns_task(self):
+        self._make_task().run()
+        self._write_config({'factor': 3})
+        self._make_task().run()
+        self._make_task(offset=1).run()
+
+        self.assertEqual(self.runs, 3)
+        self.assertEqual(list(pd.read_csv(os.path.join(self.tmp_dir, 'out.csv'))['a']), [1, 4])
+
+    def test_changed_schema_or_generics_reruns_task(self):
+        registry = SchemaRegistry()
+
+        with patch('generics.artifact.artifact_schemas', registry):
+            self._make_task().run()
+            registry.register('out', ArtifactSchema(dtypes={'a': 'float64'}))
+            self._make_task().run()
+
+            with patch.object(t._generics_fingerprint, 'instance', 'changed'):
+                self._make_task().run()
+
+        self.assertEqual(self.runs, 3)
+
+    def test_missing_output_reruns_task(self):
+        self._make_task().run()
+        os.remove(os.path.join(self.tmp_dir, 'out.csv'))
+        self._make_task().run()
+
+        self.assertEqual(self.runs, 2)
+
+    def test_forced_task_reruns(self):
+        self._make_task().run()
+
+        with patch.object(base, 'FORCE_TASKS', ['t-incremental']):
+            self._make_task().run()
+
+        task = self._make_task()
+        task.invalidate()
+        task.run()
+
+        self.assertEqual(self.runs, 3)
+
+def _group_total(key, group, offset=0):
+    return (key, int(group['v'].sum()) + offset)
+
+class TestLctkTaskMapGroups(unittest.TestCase):
+
+    def setUp(self):
+        self.task = t.Task('t-map')
+        self.df = pd.DataFrame({
+            'outer': ['b', 'a', 'b', 'a', 'c'],
+            'inner': [2, 1, 1, 2, 1],
+            'v': [1, 2, 3, 4, 5]
+        })
+
+    def test_groups_follow_nested_loop_order(self):
+        for workers in [1, 4]:
+            with patch.object(base, 'MAP_WORKERS', workers):
+                results = self.task.map_groups(self.df, ['outer', 'inner'], _group_total)
+            self.assertEqual(results, [(('b', 2), 1), (('b', 1), 3), (('a', 1), 2), (('a', 2), 4), (('c', 1), 5)])
+
+    def test_group_data_is_handed_after_the_group(self):
+        with patch.object(base, 'MAP_WORKERS', 4):
+            results = self.task.map_groups(self.df, 'outer', _group_total, group_data=lambda key: 10)
+        self.assertEqual(results, [('b', 14), ('a', 16), ('c', 15)])
+
+    def test_first_error_is_raised(self):
+        def fail_on_a(key, group):
+            if key == 'a':
+                raise ValueError(key)
+            return key
+
+        with patch.object(base, 'MAP_WORKERS', 4), self.assertRaises(ValueError):
+            self.task.map_groups(self.df, 'outer', fail_on_a)
@@ -0,0 +1,67 @@
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from generics import timeseries
+
+class TestLctkResampleHourly(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        rows = 2000
+        self.df = pd.DataFrame({
+            'siteid': rng.choice(['30010', '30002', '9'], rows),
+            # two weeks of readings a month apart, the hours in between have none
+            'time': pd.Timestamp('2012-04-01') + pd.to_timedelta(rng.randint(0, 14 * 24 * 60, rows) + rng.randint(0, 2, rows) * 43200, unit='m'),
+            'Heating': rng.rand(rows),
+            'Vehicle': rng.randint(0, 3, rows),
+            'label': 'meter'
+        })
+        self.df.loc[::7, 'Heating'] = np.nan
+        self.df.loc[::101, 'time'] = pd.NaT
+
+    def _pandas_resample(self, df):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return df.groupby('siteid').resample('60T', on='time').sum()[['Heating', 'Vehicle']]
+
+    def test_matches_pandas_groupby_resample(self):
+        hourly = timeseries.resample_hourly(self.df)
+
+        self.assertEqual(list(hourly.columns), ['Heating', 'Vehicle'])
+        self.assertEqual(list(hourly.index.names), ['siteid', 'time'])
+        self.assertEqual(list(hourly.index.get_level_values('siteid').unique()), ['30002', '30010', '9'])
+        pd.testing.assert_frame_equal(hourly, self._pandas_resample(self.df))
+
+    def test_resampling_partial_sums_again_gives_the_same_hours(self):
+        halves = [timeseries.resample_hourly(half).reset_index() for half in [self.df.iloc[:1000], self.df.iloc[1000:]]]
+        hourly = timeseries.resample_hourly(pd.concat(halves, ignore_index=True))
+
+        pd.testing.assert_frame_equal(hourly, self._pandas_resample(self.df))
+
+class TestLctkTimestampParser(unittest.TestCase):
+
+    def setUp(self):
+        times = pd.date_range('2012-04-01', periods=96, freq='15T')
+        # every site repeats the same timestamps
+        self.values = pd.Series(np.tile(times.strftime('%d%b%y:%H:%M:%S').str.upper(), 3), name='time')
+        self.values[5] = np.nan
+
+    def test_matches_pandas_to_datetime(self):
+        parser = timeseries.TimestampParser(1000)
+
+        pd.testing.assert_series_equal(parser.parse(self.values, format='%d%b%y:%H:%M:%S'), pd.to_datetime(self.values, format='%d%b%y:%H:%M:%S'))
+        pd.testing.assert_series_equal(parser.parse(['2012-04-01T01:00:00', None]), pd.to_datetime(pd.Series(['2012-04-01T01:00:00', None])))
+
+    def test_each_string_is_parsed_once(self):
+        parser = timeseries.TimestampParser(1000)
+        parser.parse(self.values.iloc[:54], format='%d%b%y:%H:%M:%S')
+
+        with patch.object(pd, 'to_datetime', wraps=pd.to_datetime) as to_datetime:
+            parsed = parser.parse(self.values, format='%d%b%y:%H:%M:%S')
+
+        # only the timestamps the first 54 rows, one of them missing, did not have are parsed
+        self.assertEqual(len(to_datetime.call_args[0][0]), 96 - 53)
+        self.assertEqual(parsed.iloc[-1], pd.Timestamp('2012-04-01 23:45'))
+        self.assertEqual(len(parser._parsed['%d%b%y:%H:%M:%S']), 96)
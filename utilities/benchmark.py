@@ -0,0 +1,275 @@
+"""
+Scale benchmark of the RBSA, CEUS and mix pipelines on synthetic inputs, see utilities.synthetic_data.
+Every scale point gets its own scratch LOCAL_PATH, every task is run and every repeat starts
+with the artifact cache, parse cache and parsed timestamps emptied. The wall time of the
+whole run, of each pipeline (the sum of its tasks, they overlap) and of each task is recorded,
+keeping the fastest of the repeats.
+Run from the repository root:
+    python -m utilities.benchmark run                          # the default scale points
+    python -m utilities.benchmark run 10x7 40x14 ...           # <sites>x<days> scale points
+    python -m utilities.benchmark run -n 3 -o <file>           # best of 3 runs, results written to <file>
+    python -m utilities.benchmark run -s <seed>                # on other synthetic inputs, 0 by default
+    python -m utilities.benchmark run -b <baseline>            # and compare them against a baseline
+    python -m utilities.benchmark compare <results> <baseline> # compare two results files
+    python -m utilities.benchmark compare ... -t 0.1           # flag anything 10% slower, 25% by default
+Results are written to BENCHMARK_DIR under LOCAL_PATH unless -o is given. Comparing exits
+with status 1 when a pipeline or task got slower than the threshold or stopped completing.
+"""
+import os
+import sys
+import json
+import getopt
+import shutil
+import logging
+import platform
+import tempfile
+import pandas as pd
+from time import time, perf_counter
+from settings import base
+from utilities import synthetic_data
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+# folder under LOCAL_PATH results are written to
+BENCHMARK_DIR = '.benchmarks'
+
+DEFAULT_SCALES = ['10x7', '40x14', '160x28']
+
+# slowdown, as a fraction of the baseline, past which a time is a regression
+REGRESSION_THRESHOLD = 0.25
+
+# differences of less seconds than this are noise, whatever the ratio
+NOISE_FLOOR = 0.5
+
+# settings in force for every run: nothing is skipped or resumed, every task does its work
+RUN_SETTINGS = {'SKIP_UNCHANGED': False, 'FORCE_RUN': True, 'RESUME': False}
+
+# settings that change what is measured, recorded alongside the results
+RECORDED_SETTINGS = [
+    'USE_CACHE', 'USE_PARSE_CACHE', 'LOAD_WORKERS', 'LOAD_EXECUTOR', 'LAZY_LOAD', 'STREAM_INGEST', 'PIPELINE_WORKERS',
+    'MAP_WORKERS', 'MAP_EXECUTOR', 'ARTIFACT_BUS', 'MEMORY_BUDGET_BYTES', 'RELEASE_TASK_DATA', 'SAVE_DATA', 'INTERMEDIATE_FILE_TYPE'
+]
+
+
+def parse_scale(scale):
+    """
+    Return (sites, days) of a <sites>x<days> scale point
+    """
+    sites, days = scale.lower().split('x')
+    return int(sites), int(days)
+
+
+def get_pipelines():
+    # imported here, the pipelines create their folders under LOCAL_PATH
+    from pipelines.rbsa import rbsa
+    from pipelines.ceus import ceus
+    from pipelines.mix import mix
+
+    return [rbsa.RbsaPipeline(), ceus.CeusPipeline(), mix.MixedFeederPipeline()]
+
+
+def run_once():
+    """
+    Run every pipeline once as one task graph, returning the wall time and the run report of each pipeline.
+    Every run starts cold, nothing parsed by an earlier repeat is reused.
+    """
+    from generics import pipeline as p
+    from generics.cache import get_artifact_cache
+    from generics.parse_cache import get_parse_cache
+    from generics.timeseries import get_timestamp_parser
+
+    # warm caches would hide the cost of reading and parsing
+    get_artifact_cache().clear()
+    get_parse_cache().purge()
+    get_timestamp_parser().clear()
+    lctk_pipelines = get_pipelines()
+
+    started = perf_counter()
+    try:
+        p.run_pipelines([lctk_pipeline.pipeline for lctk_pipeline in lctk_pipelines])
+    except ValueError:
+        logger.exception('Benchmark run did not complete')
+    wall = perf_counter() - started
+
+    return wall, [lctk_pipeline.pipeline.get_run_report() for lctk_pipeline in lctk_pipelines]
+
+
+def is_faster(timing, best):
+    """
+    True when timing beats the best so far: it is the first, the first to complete or a faster completion
+    """
+    if best is None:
+        return True
+    if timing['status'] != 'complete':
+        return False
+    return best['status'] != 'complete' or timing.get('wall', 0) < best['wall']
+
+
+def keep_fastest(best, report):
+    """
+    Merge a pipeline run report into the fastest times seen so far of the pipeline and its tasks
+    """
+    # pipelines of one run overlap, a pipeline costs the time its own tasks took
+    timing = {'status': report['status'], 'wall': sum(task.get('wall', 0) for task in report['tasks'])}
+
+    if is_faster(timing, best):
+        best = dict(timing, tasks=best['tasks'] if best else {})
+
+    for task in report['tasks']:
+        if is_faster(task, best['tasks'].get(task['name'])):
+            best['tasks'][task['name']] = {
+                'status': task['status'],
+                'wall': task.get('wall', 0),
+                'cpu': task.get('cpu', 0),
+                'rows_in': task.get('rows_in', 0),
+                'bytes_read': task.get('bytes_read', 0)
+            }
+    return best
+
+
+def run_scale(sites, days, repeats=1, seed=0):
+    """
+    Generate the inputs of a scale point in a scratch LOCAL_PATH and run the pipelines on them
+    """
+    scratch_path = tempfile.mkdtemp(prefix=f'lctk-benchmark-{sites}x{days}-')
+    saved_settings = {name: getattr(base, name) for name in list(RUN_SETTINGS) + ['LOCAL_PATH']}
+
+    try:
+        started = perf_counter()
+        synthetic_data.generate(scratch_path, sites, days, seed=seed)
+        generate_wall = perf_counter() - started
+
+        for name, value in dict(RUN_SETTINGS, LOCAL_PATH=scratch_path).items():
+            setattr(base, name, value)
+
+        result = {'scale': f'{sites}x{days}', 'sites': sites, 'days': days, 'seed': seed, 'generate_wall': generate_wall, 'wall': None, 'pipelines': {}}
+
+        for repeat in range(repeats):
+            logger.info(f'Benchmarking {sites} sites over {days} days, run {repeat + 1} of {repeats}')
+            wall, reports = run_once()
+            result['wall'] = wall if result['wall'] is None else min(result['wall'], wall)
+
+            for report in reports:
+                result['pipelines'][report['pipeline']] = keep_fastest(result['pipelines'].get(report['pipeline']), report)
+
+        return result
+    finally:
+        for name, value in saved_settings.items():
+            setattr(base, name, value)
+        shutil.rmtree(scratch_path, ignore_errors=True)
+
+
+def run(scales, repeats=1, seed=0):
+    return {
+        'created': time(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeats': repeats,
+        'settings': {name: getattr(base, name) for name in RECORDED_SETTINGS},
+        'run_settings': RUN_SETTINGS,
+        'cold_caches': True,
+        'scales': [run_scale(*parse_scale(scale), repeats=repeats, seed=seed) for scale in scales]
+    }
+
+
+def get_timings(results):
+    """
+    Return {name: (status, wall)} for every scale point in results and every pipeline and task run at it
+    """
+    timings = {}
+    for scale in results['scales']:
+        statuses = set(pipeline['status'] for pipeline in scale['pipelines'].values())
+        timings[scale['scale']] = ('complete' if statuses == {'complete'} else 'failed', scale['wall'])
+        for pipeline_name, pipeline in scale['pipelines'].items():
+            timings[f'{scale["scale"]}/{pipeline_name}'] = (pipeline['status'], pipeline['wall'])
+            for task_name, task in pipeline['tasks'].items():
+                timings[f'{scale["scale"]}/{pipeline_name}/{task_name}'] = (task['status'], task['wall'])
+    return timings
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD, noise_floor=NOISE_FLOOR):
+    """
+    Return a line for every pipeline or task of results slower than in baseline by more than
+    threshold, or that completed in baseline and not in results. Only names in both count.
+    """
+    current_timings = get_timings(results)
+    baseline_timings = get_timings(baseline)
+    regressions = []
+
+    for name, (baseline_status, baseline_wall) in baseline_timings.items():
+        if name not in current_timings:
+            continue
+
+        status, wall = current_timings[name]
+
+        if baseline_status == 'complete' and status != 'complete':
+            regressions.append(f'{name}: {status}, was complete')
+        elif status == 'complete' and wall - baseline_wall > max(baseline_wall * threshold, noise_floor):
+            regressions.append(f'{name}: {wall:.2f}s, was {baseline_wall:.2f}s')
+
+    return regressions
+
+
+def print_results(results):
+    for scale in results['scales']:
+        print(f'{scale["scale"]}: {scale["wall"]:.2f}s, inputs generated in {scale["generate_wall"]:.2f}s')
+        for pipeline_name, pipeline in scale['pipelines'].items():
+            print(f'  {pipeline_name}: {pipeline["wall"]:.2f}s {pipeline["status"]}')
+            for task_name, task in pipeline['tasks'].items():
+                print(f'    {task_name}: {task["wall"]:.2f}s {task["status"]}')
+
+
+def read_results(path):
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def write_results(results, path=None):
+    if path is None:
+        path = os.path.join(base.LOCAL_PATH, BENCHMARK_DIR, f'{int(results["created"])}.json')
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+    return path
+
+
+def report_regressions(results, baseline, threshold):
+    regressions = compare(results, baseline, threshold)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    print(f'{len(regressions)} regressions against the baseline at a {threshold * 100:.0f}% threshold')
+    return 1 if regressions else 0
+
+
+def main(argv):
+    try:
+        opts, args = getopt.gnu_getopt(argv, 'n:o:b:t:s:')
+        options = dict(opts)
+        threshold = float(options.get('-t', REGRESSION_THRESHOLD))
+        command = args[0]
+    except (getopt.GetoptError, IndexError, ValueError):
+        print(__doc__)
+        sys.exit(1)
+
+    if command == 'run':
+        results = run(args[1:] or DEFAULT_SCALES, repeats=int(options.get('-n', 1)), seed=int(options.get('-s', 0)))
+        print_results(results)
+        print(f'Results written to {write_results(results, options.get("-o"))}')
+        if '-b' in options:
+            sys.exit(report_regressions(results, read_results(options['-b']), threshold))
+
+    elif command == 'compare' and len(args) == 3:
+        sys.exit(report_regressions(read_results(args[1]), read_results(args[2]), threshold))
+
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    main(sys.argv[1:])
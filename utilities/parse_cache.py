@@ -0,0 +1,81 @@
+"""
+Maintenance command for the on-disk parse cache, used when settings.USE_PARSE_CACHE is enabled.
+Run from the repository root:
+    python -m utilities.parse_cache prewarm            # parse every csv/excel file under LOCAL_PATH
+    python -m utilities.parse_cache prewarm <file> ... # parse the given files, relative to LOCAL_PATH
+    python -m utilities.parse_cache purge              # remove every cache entry
+    python -m utilities.parse_cache size               # print the size of the cache in bytes
+"""
+import os
+import sys
+import logging
+from settings import base
+from generics.artifact import ArtifactDataManager
+from generics.parse_cache import get_parse_cache
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+def find_sources():
+    """
+    Return every file under LOCAL_PATH the parse cache would store, relative to LOCAL_PATH
+    """
+    sources = []
+    for directory, subdirectories, filenames in os.walk(base.LOCAL_PATH):
+        # skip the cache itself and any other hidden folders
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith('.'))
+        for filename in sorted(filenames):
+            extension = os.path.splitext(filename)[1].lower()
+            if not filename.startswith('.') and extension in ArtifactDataManager.parse_cached_file_types:
+                sources.append(os.path.relpath(os.path.join(directory, filename), base.LOCAL_PATH))
+    return sources
+
+def get_reader():
+    """
+    Return an ArtifactDataManager that parses files the way the pipelines'
+    tasks do, with their schemas registered and their intermediates known,
+    so prewarmed entries are the ones their reads look up
+    """
+    # imported here, the pipelines create their folders under LOCAL_PATH
+    from utilities.sweep import get_pipeline_builders
+
+    intermediate_artifacts = set()
+    for build in get_pipeline_builders().values():
+        intermediate_artifacts.update(build().intermediate_artifacts)
+
+    reader = ArtifactDataManager()
+    reader.intermediate_artifacts = frozenset(intermediate_artifacts)
+    return reader
+
+def prewarm(filenames, reader=None):
+    if not base.USE_PARSE_CACHE:
+        logger.warning('USE_PARSE_CACHE is off, enable it in the settings to prewarm the parse cache')
+        return
+
+    reader = reader or get_reader()
+    for filename in filenames:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in reader.parse_cached_file_types or filename in reader.intermediate_artifacts:
+            logger.info(f'Not prewarming the parse cache with {filename}, it is never cached')
+            continue
+
+        logger.info(f'Prewarming the parse cache with {filename}')
+        reader._parse_file(filename, extension)
+
+def main(argv):
+    if not argv or argv[0] not in ['prewarm', 'purge', 'size']:
+        print(__doc__)
+        sys.exit(1)
+
+    command = argv[0]
+
+    if command == 'prewarm':
+        prewarm(argv[1:] or find_sources())
+
+    elif command == 'purge':
+        get_parse_cache().purge()
+
+    print(f'Parse cache size: {get_parse_cache().size()} bytes')
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])
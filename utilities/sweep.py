@@ -0,0 +1,85 @@
+"""
+Run the LCTK pipelines under every scenario of a sweep, see generics.scenario.
+Run from the repository root:
+    python -m utilities.sweep <sweep.json>         # every scenario of the sweep
+    python -m utilities.sweep <sweep.json> -w 8    # on 8 task workers, settings.PIPELINE_WORKERS by default
+A sweep file lists the pipelines to run, rbsa, ceus and mix by default, and the
+scenarios, as a grid of override values and/or by name:
+    {
+        "pipelines": ["rbsa", "ceus"],
+        "grid": {
+            "SENSITIVITY_TEMPERATURES.json:residential.theat": [12, 15, 18],
+            "GAS_FRACTIONS.json:electrification.NWC.Heating": [0.48, 1.0]
+        },
+        "scenarios": {
+            "no_exclusions": { "EXCLUDED_LOCATIONS.json:Residential.sites": [] }
+        }
+    }
+Every scenario's configs and outputs are under SCENARIO_DIR in LOCAL_PATH, its
+scenario.json maps each artifact of the pipelines to the scenario's version of it.
+"""
+import sys
+import json
+import getopt
+import logging
+from collections import OrderedDict
+from generics import scenario as s
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+def get_pipeline_builders():
+    # imported here, the pipelines create their folders under LOCAL_PATH
+    from pipelines.rbsa import rbsa
+    from pipelines.ceus import ceus
+    from pipelines.mix import mix
+
+    return OrderedDict([
+        ('rbsa', lambda: rbsa.RbsaPipeline().pipeline),
+        ('ceus', lambda: ceus.CeusPipeline().pipeline),
+        ('mix', lambda: mix.MixedFeederPipeline().pipeline)
+    ])
+
+
+def read_sweep(path):
+    """
+    Return the pipeline names and the { name: overrides } scenarios of a sweep file
+    """
+    with open(path) as sweep_file:
+        sweep = json.load(sweep_file, object_pairs_hook=OrderedDict)
+
+    scenarios = s.expand_grid(sweep.get('grid', {})) if sweep.get('grid') else OrderedDict()
+    scenarios.update(sweep.get('scenarios', {}))
+    return sweep.get('pipelines', ['rbsa', 'ceus', 'mix']), scenarios
+
+
+def main(argv):
+    try:
+        opts, args = getopt.gnu_getopt(argv, 'w:')
+        options = dict(opts)
+        max_workers = int(options['-w']) if '-w' in options else None
+        pipeline_names, scenarios = read_sweep(args[0])
+    except (getopt.GetoptError, IndexError, ValueError):
+        print(__doc__)
+        sys.exit(1)
+
+    builders = get_pipeline_builders()
+    unknown = [name for name in pipeline_names if name not in builders]
+    if unknown:
+        print(f'Unknown pipelines {unknown}, choose from {list(builders)}')
+        sys.exit(1)
+
+    try:
+        sweep = s.run_sweep(lambda: [builders[name]() for name in pipeline_names], scenarios, max_workers)
+    except ValueError:
+        logger.exception('The sweep did not complete')
+        sys.exit(1)
+
+    for scenario in sweep:
+        record = scenario.get_record()
+        print(f'{scenario.name}: {record["status"]}, ran {len(record["tasks"])} tasks of its own')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])
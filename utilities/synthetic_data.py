@@ -0,0 +1,354 @@
+"""
+Synthetic inputs for the RBSA, CEUS and mix pipelines, laid out like the real
+data in S3 so the pipelines run end to end without it, e.g. to benchmark them.
+Run from the repository root:
+    python -m utilities.synthetic_data <sites> <days>               # write into LOCAL_PATH
+    python -m utilities.synthetic_data <sites> <days> -p <path>     # write into another folder
+    python -m utilities.synthetic_data <sites> <days> -s <seed>     # vary the data, 0 by default
+<sites> RBSA metered sites and <days> days of metering per RBSA year and of CEUS loads.
+The same arguments always write the same files.
+"""
+import os
+import sys
+import json
+import getopt
+import logging
+import numpy as np
+import pandas as pd
+from settings import base
+
+logger = logging.getLogger('LCTK_APPLICATION_LOGGER')
+
+
+# minutes between two readings of the raw RBSA metering
+METERING_INTERVAL = 15
+
+# first timestamp of each RBSA metering year and of the CEUS loads
+RBSA_START = pd.Timestamp('2012-04-01')
+CEUS_START = pd.Timestamp('2002-01-01')
+
+# the raw metering files the RBSA pipeline reads, sites are spread over the parts of each year
+RBSA_Y1_FILES = [f'RBSAM_Y1_PART {part} OF 4.csv' for part in range(1, 5)]
+RBSA_Y2_FILES = [f'RBSAM_Y2_PART {part} OF 5.csv' for part in range(1, 6)]
+
+# 3 digit zipcodes the RBSA tasks read noaa weather for, see FindSensitivities
+RBSA_ZIP3 = [
+    '594', '596', '597', '598', '833', '835', '836', '837', '838', '970', '971', '972', '973', '974',
+    '980', '981', '982', '983', '984', '985', '988', '989', '990', '991', '992', '993'
+]
+
+# metered devices: code, description (part of the Y1 column names), enduse, units and mean kWh per hour
+RBSA_DEVICES = [
+    ('SERVICE', 'Service Total', 'Service', 'kWh', 1.2),
+    ('PANEL', 'Panel Total', 'Panel', 'kWh', 1.1),
+    ('TOTAL', 'Site Total', 'Total', 'kWh', 1.2),
+    ('HP', 'Heat Pump', 'HeatCool', 'kWh', 0.0),
+    ('ERH', 'Electric Resistance Heat', 'Heating', 'kWh', 0.0),
+    ('AC', 'Air Conditioner', 'Cooling', 'kWh', 0.0),
+    ('FAN', 'Furnace Fan', 'Ventilation', 'kWh', 0.05),
+    ('WH', 'Water Heater', 'WaterHeating', 'kWh', 0.2),
+    ('RANGE', 'Range', 'Cooking', 'kWh', 0.1),
+    ('REF', 'Refrigerator', 'Refrigeration', 'kWh', 0.08),
+    ('EXTLT', 'Exterior Lighting', 'ExteriorLighting', 'kWh', 0.03),
+    ('LTG', 'Lighting', 'InteriorLighting', 'kWh', 0.07),
+    ('TV', 'Television', 'Electronics', 'kWh', 0.06),
+    ('DRYER', 'Dryer', 'Appliances', 'kWh', 0.1),
+    ('PLUG', 'Plug Loads', 'Miscellaneous', 'kWh', 0.08),
+    ('UNKN', 'Unknown Circuit', 'ignore', 'kWh', 0.02),
+    ('IAT', 'Indoor Air Temperature', 'Temperature', 'F', 68.0)
+]
+
+# columns of the Y1 files the RBSA pipeline skips by name
+RBSA_Y1_EXTRA_COLUMNS = ['Hours Of Occupancy', 'Fahrenheit Outdoor']
+
+# climate zones the CEUS tasks read noaa weather for, see the CEUS FindSensitivities
+CEUS_FCZ = ['FCZ01', 'FCZ02', 'FCZ03', 'FCZ04', 'FCZ05', 'FCZ06', 'FCZ07', 'FCZ08', 'FCZ09', 'FCZ10', 'FCZ13']
+
+CEUS_ENDUSES = [
+    'Heating', 'Cooling', 'Ventilation', 'WaterHeating', 'Cooking', 'Refrigeration', 'ExteriorLighting',
+    'InteriorLighting', 'OfficeEquipment', 'Miscellaneous', 'AirCompressors', 'Motors', 'Process'
+]
+
+# enduses the load components are derived from
+RBSA_ROA_ENDUSES = [
+    'Heating', 'Cooling', 'Ventilation', 'WaterHeating', 'Cooking', 'Refrigeration', 'ExteriorLighting',
+    'InteriorLighting', 'Electronics', 'Appliances', 'Miscellaneous'
+]
+
+COMPONENTS = ['MotorA', 'MotorB', 'MotorC', 'MotorD', 'PE', 'Stat_P_Res', 'Stat_P_Cur']
+
+TMY_METRICS = ['Temperature', 'Solar Zenith Angle', 'GHI', 'DHI', 'DNI', 'Wind Speed', 'Wind Direction', 'Relative Humidity']
+
+MIX_CHARTS = ['residential_mix', 'commercial_mix', 'mixed_mix', 'rural_mix']
+
+
+def read_config(name):
+    with open(f'{base.CONFIG_PATH}/{name}') as config_file:
+        return json.load(config_file)
+
+
+def write_csv(root, filename, df, index=False):
+    path = os.path.join(root, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=index)
+
+
+def get_temperatures(rng, times):
+    """
+    Hourly dry bulb temperatures in C at times for a location: a yearly and a daily cycle plus noise.
+    The daily swing is wide enough for every day to need heating at night and cooling in the
+    afternoon, so the weather sensitivities can be fitted on a few days of data.
+    """
+    offset = rng.uniform(-2, 2)
+    day_of_year = np.asarray(times.dayofyear)
+    hour = np.asarray(times.hour)
+
+    yearly = -5 * np.cos(2 * np.pi * (day_of_year - 15) / 365)
+    daily = -13 * np.cos(2 * np.pi * (hour - 3) / 24)
+    return 19 + offset + yearly + daily + rng.normal(0, 1, len(times))
+
+
+def get_weather(rng, times):
+    """
+    Return a frame of the TMY weather metrics at times
+    """
+    hour = np.asarray(times.hour)
+    temperature = get_temperatures(rng, times)
+    zenith = 90 - 60 * np.clip(np.sin(np.pi * (hour - 6) / 12), 0, None)
+    ghi = np.clip(1000 * np.cos(np.radians(zenith)), 0, None) * rng.uniform(0.6, 1, len(times))
+
+    return pd.DataFrame({
+        'Temperature': temperature.round(1),
+        'Solar Zenith Angle': zenith.round(1),
+        'GHI': ghi.round(),
+        'DHI': (ghi * rng.uniform(0.1, 0.3, len(times))).round(),
+        'DNI': (ghi * rng.uniform(0.5, 0.9, len(times))).round(),
+        'Wind Speed': rng.gamma(2, 2, len(times)).round(1),
+        'Wind Direction': rng.uniform(0, 360, len(times)).round(),
+        'Relative Humidity': np.clip(70 - temperature + rng.normal(0, 5, len(times)), 5, 100).round()
+    }, index=times)
+
+
+def get_daily_profile(rng, hours, peaks):
+    """
+    Return a load shape over hours peaking around the given hours of the day
+    """
+    profile = np.full(len(hours), 0.3)
+    for peak in peaks:
+        profile += np.exp(-0.5 * ((hours - peak - rng.uniform(-1, 1)) / 2) ** 2)
+    return profile
+
+
+def write_weather(root, rng, rbsa_dir, ceus_dir, postcodes, cities, days):
+    """
+    Write the noaa, tmy and target weather files, returning the hourly temperatures of every RBSA 3 digit zipcode
+    """
+    # noaa weather covers both RBSA metering years, and the CEUS loads
+    rbsa_hours = pd.date_range(RBSA_START, periods=2 * days * 24, freq='H')
+    ceus_hours = pd.date_range(CEUS_START, periods=days * 24, freq='H')
+    # typical meteorological years are always a full year
+    tmy_hours = pd.date_range('2017-01-01', periods=8760, freq='H')
+
+    zip3_temperatures = {}
+    for zip3 in RBSA_ZIP3:
+        temperatures = get_temperatures(rng, rbsa_hours)
+        zip3_temperatures[zip3] = pd.Series(temperatures, index=rbsa_hours)
+        write_csv(root, f'{rbsa_dir}/noaa/{zip3}.csv', pd.DataFrame({'DATE': rbsa_hours, 'Temperature': temperatures.round(1)}))
+
+    for fcz in CEUS_FCZ:
+        temperatures = get_temperatures(rng, ceus_hours)
+        write_csv(root, f'{ceus_dir}/ceus_noaa/{fcz}.csv', pd.DataFrame({'DATE': ceus_hours, 'Temperature': temperatures.round(1)}))
+
+    for postcode in postcodes:
+        write_csv(root, f'{rbsa_dir}/tmy_base/{postcode}.csv', get_weather(rng, tmy_hours), index=True)
+
+    for fcz in CEUS_FCZ:
+        write_csv(root, f'{ceus_dir}/ceus_tmy_base/{fcz}.csv', get_weather(rng, tmy_hours), index=True)
+
+    for city in cities:
+        tmy = get_weather(rng, tmy_hours)
+        write_csv(root, f'{rbsa_dir}/tmy_target/{city}.csv', tmy, index=True)
+        write_csv(root, f'{ceus_dir}/ceus_tmy_target/{city}.csv', tmy, index=True)
+
+        # temperatures of the winter, spring and summer design days
+        design_days = {}
+        for season, day in [('winter', '2017-01-20'), ('spring', '2017-04-20'), ('summer', '2017-07-20')]:
+            design_days[season] = tmy.loc[day, 'Temperature'].values
+            design_days[f'{season}_adjusted'] = design_days[season] + rng.normal(0, 0.5, 24).round(1)
+
+        target_weather = pd.DataFrame(design_days, columns=['winter', 'spring', 'summer', 'winter_adjusted', 'spring_adjusted', 'summer_adjusted'])
+        write_csv(root, f'{rbsa_dir}/target_weather/{city}.csv', target_weather)
+        write_csv(root, f'{ceus_dir}/target_weather/{city}.csv', target_weather)
+
+    return zip3_temperatures
+
+
+def get_site_metering(rng, siteid, times, temperatures, theat, tcool):
+    """
+    Return the raw metering of a site at times, one column per device code
+    """
+    hours = np.asarray(times.hour) + np.asarray(times.minute) / 60
+    scale = METERING_INTERVAL / 60
+    size = rng.uniform(0.5, 1.5)
+    profile = get_daily_profile(rng, hours, peaks=[7, 19])
+
+    heating = np.clip(theat - temperatures, 0, None) * 0.08
+    cooling = np.clip(temperatures - tcool, 0, None) * 0.1
+    has_heat_pump = rng.uniform() < 0.5
+
+    metering = {'siteid': siteid, 'time': times.strftime('%d%b%y:%H:%M:%S').str.upper()}
+    for code, description, enduse, units, mean in RBSA_DEVICES:
+        if units != 'kWh':
+            metering[code] = (mean + rng.normal(0, 1, len(times))).round(1)
+            continue
+
+        if enduse == 'HeatCool':
+            load = (heating + cooling) if has_heat_pump else np.zeros(len(times))
+        elif enduse == 'Heating':
+            load = np.zeros(len(times)) if has_heat_pump else heating
+        elif enduse == 'Cooling':
+            load = np.zeros(len(times)) if has_heat_pump else cooling
+        else:
+            load = mean * profile * rng.uniform(0.7, 1.3, len(times))
+
+        metering[code] = (size * scale * load).round(4)
+
+    return pd.DataFrame(metering)
+
+
+def write_rbsa_metering(root, rng, rbsa_dir, sites, site_postcodes, zip3_temperatures, days):
+    """
+    Write the device map and the raw metering of both RBSA years, each site in one part of each year
+    """
+    theat = read_config('SENSITIVITY_TEMPERATURES.json')['residential']['theat']
+    tcool = read_config('SENSITIVITY_TEMPERATURES.json')['residential']['tcool']
+    periods = days * 24 * 60 // METERING_INTERVAL
+
+    device_map = pd.DataFrame([(code, enduse, units) for code, description, enduse, units, mean in RBSA_DEVICES], columns=['enduse_code', 'eu', 'units'])
+    write_csv(root, f'{rbsa_dir}/device_map.csv', device_map)
+
+    for year, filenames in [(0, RBSA_Y1_FILES), (1, RBSA_Y2_FILES)]:
+        times = pd.date_range(RBSA_START + pd.Timedelta(days=year * days), periods=periods, freq=f'{METERING_INTERVAL}T')
+        hours = times.floor('H')
+
+        for part, filename in enumerate(filenames):
+            part_sites = sites[part::len(filenames)]
+            metering = [
+                get_site_metering(rng, site, times, zip3_temperatures[site_postcodes[site][:3]].reindex(hours).values, theat, tcool)
+                for site in part_sites
+            ]
+            metering = pd.concat(metering)
+
+            if year == 0:
+                # the first year names its columns after the device code and its description
+                metering = metering.rename(columns={code: f'{code} {description}' for code, description, enduse, units, mean in RBSA_DEVICES})
+                for column in RBSA_Y1_EXTRA_COLUMNS:
+                    metering[column] = rng.uniform(0, 1, len(metering)).round(2)
+
+            write_csv(root, f'{rbsa_dir}/raw/{filename}', metering)
+            logger.info(f'Wrote {len(part_sites)} sites to {filename}')
+
+
+def write_ceus_loads(root, rng, ceus_dir, buildingtypes, days):
+    """
+    Write the hourly enduse loads of every CEUS climate zone and building type
+    """
+    theat = read_config('SENSITIVITY_TEMPERATURES.json')['commercial']['theat']
+    tcool = read_config('SENSITIVITY_TEMPERATURES.json')['commercial']['tcool']
+    times = pd.date_range(CEUS_START, periods=days * 24, freq='H')
+    hours = np.asarray(times.hour)
+    weekday = np.asarray(times.weekday) < 5
+
+    loads = []
+    for fcz in CEUS_FCZ:
+        noaa = pd.read_csv(os.path.join(root, f'{ceus_dir}/ceus_noaa/{fcz}.csv'))
+        temperatures = noaa['Temperature'].values
+
+        for buildingtype in buildingtypes:
+            size = rng.uniform(50, 500)
+            occupied = get_daily_profile(rng, hours, peaks=[10, 15]) * np.where(weekday, 1, 0.4)
+            buildingtype_loads = {'time': times, 'fcz': fcz, 'buildingtype': buildingtype}
+
+            for enduse in CEUS_ENDUSES:
+                if enduse == 'Heating':
+                    load = np.clip(theat - temperatures, 0, None) * 0.05
+                elif enduse == 'Cooling':
+                    load = np.clip(temperatures - tcool, 0, None) * 0.06
+                else:
+                    load = rng.uniform(0.02, 0.2) * occupied * rng.uniform(0.8, 1.2, len(times))
+                buildingtype_loads[enduse] = (size * load).round(3)
+
+            loads.append(pd.DataFrame(buildingtype_loads))
+
+    write_csv(root, f'{ceus_dir}/ceus_cleandata.csv', pd.concat(loads))
+
+
+def get_roa(rng, index_name, enduses):
+    """
+    Return a rules of association matrix splitting every enduse into load components
+    """
+    fractions = rng.uniform(0, 1, (len(COMPONENTS), len(enduses)))
+    roa = pd.DataFrame((fractions / fractions.sum(axis=0)).round(3), index=COMPONENTS, columns=enduses)
+    roa.index.name = index_name
+    return roa
+
+
+def generate(root, sites, days, seed=0):
+    """
+    Write every input the RBSA, CEUS and mix pipelines read from their artifact folders into root.
+    Configuration stays in settings.CONFIG_PATH, the locations written are the ones it lists.
+    """
+    if sites < len(RBSA_Y2_FILES):
+        raise ValueError(f'At least {len(RBSA_Y2_FILES)} sites are needed, one for each part of the raw RBSA metering')
+
+    rng = np.random.RandomState(seed)
+    rbsa_dir, ceus_dir, mix_dir = 'rbsa', 'ceus', 'mix'
+
+    cities = [city for city in read_config('PROJECTION_LOCATIONS.json')['cities'].keys()]
+    excluded_sites = set(read_config('EXCLUDED_LOCATIONS.json')['Residential']['sites'])
+    buildingtype_dict = read_config('BUILDINGTYPE_DICT.json')
+    buildingtypes = sorted(set(value for key, value in buildingtype_dict.items() if key not in ['version', 'application', 'name'] and value != 'RES'))
+
+    # site ids clear of the sites the pipeline excludes
+    site_ids = (str(siteid) for siteid in range(30000, 100000) if str(siteid) not in excluded_sites)
+    site_list = [next(site_ids) for site in range(sites)]
+    site_postcodes = {site: f'{RBSA_ZIP3[idx % len(RBSA_ZIP3)]}{rng.randint(0, 10):02d}' for idx, site in enumerate(site_list)}
+    zip_map = pd.DataFrame({'siteid': site_list, 'postcode': [site_postcodes[site] for site in site_list]})
+    write_csv(root, f'{rbsa_dir}/rbsa_zipmap.csv', zip_map)
+
+    logger.info(f'Writing synthetic weather to {root}')
+    zip3_temperatures = write_weather(root, rng, rbsa_dir, ceus_dir, sorted(set(site_postcodes.values())), cities, days)
+
+    logger.info(f'Writing synthetic metering of {sites} RBSA sites over 2 x {days} days to {root}')
+    write_rbsa_metering(root, rng, rbsa_dir, site_list, site_postcodes, zip3_temperatures, days)
+
+    logger.info(f'Writing synthetic CEUS loads of {len(CEUS_FCZ)} climate zones and {len(buildingtypes)} building types to {root}')
+    write_ceus_loads(root, rng, ceus_dir, buildingtypes, days)
+
+    write_csv(root, f'{rbsa_dir}/roa_res_motorc.csv', get_roa(rng, 'Residential', RBSA_ROA_ENDUSES), index=True)
+    write_csv(root, f'{ceus_dir}/roa_com.csv', get_roa(rng, 'Commercial', CEUS_ENDUSES), index=True)
+
+    # customer charts: the share of every building type in each feeder mix
+    buildings = [key for key in buildingtype_dict.keys() if key not in ['version', 'application', 'name']] + ['Pumping']
+    for chart in MIX_CHARTS:
+        shares = rng.uniform(0, 1, len(buildings))
+        write_csv(root, f'{mix_dir}/{chart}.csv', pd.DataFrame({'Building': buildings, 'Percent': (shares / shares.sum()).round(4)}))
+
+
+def main(argv):
+    try:
+        opts, args = getopt.gnu_getopt(argv, 'p:s:')
+        sites, days = int(args[0]), int(args[1])
+    except (getopt.GetoptError, IndexError, ValueError):
+        print(__doc__)
+        sys.exit(1)
+
+    options = dict(opts)
+    root = options.get('-p', base.LOCAL_PATH)
+    generate(root, sites, days, seed=int(options.get('-s', 0)))
+    print(f'Synthetic inputs for {sites} sites over {days} days written to {root}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])